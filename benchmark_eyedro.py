@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the Eyedro integration against simulated meters.
+
+Starts a local fleet with eyedro_simulator.py and measures, for each fleet
+size:
+
+- EyedroAPI fetch+parse throughput over the shared connection pool
+- EyedroDataUpdateCoordinator refresh latency
+- per-update sensor cost: the state and attributes every sensor entity
+  computes when its coordinator publishes
+
+Run from the repository root with Home Assistant installed. No hardware is
+needed, so the numbers can be compared between commits to catch
+performance regressions.
+
+Usage:
+    python3 benchmark_eyedro.py [--devices 1 10 100 500] [--rounds 5]
+
+Example:
+    python3 benchmark_eyedro.py --devices 1 10 100 500 --latency 5 --jitter 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.eyedro import sensor as sensor_platform
+from custom_components.eyedro.api import EyedroAPI
+from custom_components.eyedro.const import DOMAIN
+from custom_components.eyedro.coordinator import EyedroDataUpdateCoordinator
+from custom_components.eyedro.session import (
+    async_acquire_session,
+    async_release_session,
+)
+from eyedro_simulator import DEFAULT_BASE_PORT, EyedroSimulator, FaultProfile
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return the given percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def _timed(coro) -> float:
+    """Await a coroutine and return how long it took in seconds."""
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def _bench_fleet(devices: int, args: argparse.Namespace) -> dict[str, float]:
+    """Run every benchmark against a fleet of the given size."""
+    simulator = EyedroSimulator(
+        devices=devices,
+        channels=args.channels,
+        base_port=args.base_port,
+        faults=FaultProfile(latency=args.latency, jitter=args.jitter),
+        seed=1,
+    )
+    results: dict[str, float] = {}
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        async with simulator:
+            session = async_acquire_session(hass)
+            try:
+                # No response cache, every fetch is a request to the simulator
+                apis = [
+                    EyedroAPI(host=simulator.host, port=port, session=session, cache_ttl=0)
+                    for port in simulator.ports
+                ]
+
+                # Fetch + parse throughput over the pooled connections
+                await asyncio.gather(*(api.async_get_data() for api in apis))
+                latencies: list[float] = []
+                start = time.perf_counter()
+                for _ in range(args.rounds):
+                    latencies.extend(
+                        await asyncio.gather(
+                            *(_timed(api.async_get_data()) for api in apis)
+                        )
+                    )
+                elapsed = time.perf_counter() - start
+                results["fetch/s"] = len(latencies) / elapsed
+                results["fetch p50 ms"] = _percentile(latencies, 50) * 1000
+                results["fetch p95 ms"] = _percentile(latencies, 95) * 1000
+
+                # Coordinator refresh latency
+                coordinators = [EyedroDataUpdateCoordinator(hass, api) for api in apis]
+                await asyncio.gather(*(c.async_refresh() for c in coordinators))
+                latencies = []
+                for _ in range(args.rounds):
+                    latencies.extend(
+                        await asyncio.gather(
+                            *(_timed(c.async_refresh()) for c in coordinators)
+                        )
+                    )
+                results["refresh p50 ms"] = _percentile(latencies, 50) * 1000
+                results["refresh p95 ms"] = _percentile(latencies, 95) * 1000
+
+                # Per-update sensor cost, using the real platform setup
+                entities = []
+                hass.data[DOMAIN] = {}
+                for index, coordinator in enumerate(coordinators):
+                    entry = SimpleNamespace(entry_id=f"bench_{index}")
+                    hass.data[DOMAIN][entry.entry_id] = coordinator
+                    await sensor_platform.async_setup_entry(hass, entry, entities.extend)
+                start = time.perf_counter()
+                for _ in range(args.rounds):
+                    for entity in entities:
+                        entity.native_value
+                        entity.extra_state_attributes
+                elapsed = time.perf_counter() - start
+                results["sensor us/update"] = elapsed / (args.rounds * devices) * 1e6
+            finally:
+                await async_release_session(hass)
+
+    return results
+
+
+async def _run(args: argparse.Namespace) -> None:
+    """Run the suite and print one row per fleet size."""
+    columns = None
+    for devices in args.devices:
+        results = await _bench_fleet(devices, args)
+        if columns is None:
+            columns = list(results)
+            print(f"{'devices':>8} " + " ".join(f"{name:>17}" for name in columns))
+        print(f"{devices:>8} " + " ".join(f"{results[name]:>17.2f}" for name in columns))
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Eyedro integration against simulated meters"
+    )
+    parser.add_argument(
+        "--devices",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100, 500],
+        help="Fleet sizes to benchmark (default: 1 10 100 500)",
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="Polls per device (default: 5)")
+    parser.add_argument("--channels", type=int, default=2, help="Channels per meter (default: 2)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Simulated jitter in ms")
+    parser.add_argument(
+        "--base-port",
+        type=int,
+        default=DEFAULT_BASE_PORT,
+        help=f"Port of the first simulated meter (default: {DEFAULT_BASE_PORT})",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the Eyedro /getdata response parser.
+
+Compares the integration's parse path (raw bytes into an EyedroReading)
+against the previous path, which decoded the body with json.loads and built
+a list of per-channel dicts. Run from the repository root with Home
+Assistant installed.
+
+Usage:
+    python3 benchmark_parser.py [--channels 2 8 32] [--number 100000]
+"""
+import argparse
+import json
+import random
+import timeit
+
+from custom_components.eyedro.api import parse_getdata
+
+
+def make_body(channels: int) -> bytes:
+    """Build a realistic /getdata body with the given number of channels."""
+    rows = [
+        [
+            random.randint(850, 1000),
+            random.randint(11500, 12200),
+            random.randint(0, 40000),
+            random.randint(0, 4800),
+            0,
+        ]
+        for _ in range(channels)
+    ]
+    return json.dumps({"data": rows}).encode()
+
+
+def legacy_parse(body: bytes) -> dict:
+    """Parse the body the way the integration did before EyedroReading."""
+    json_data = json.loads(body.decode())
+    if "data" not in json_data:
+        raise ValueError("Missing 'data' key in API response")
+    data = json_data["data"]
+    if not isinstance(data, list) or len(data) < 2:
+        raise ValueError("Expected data array with at least 2 channels")
+    channels = []
+    for i, channel_data in enumerate(data):
+        if not isinstance(channel_data, list) or len(channel_data) < 4:
+            raise ValueError(f"Channel {i} data should be an array with at least 4 elements")
+        channels.append(
+            {
+                "power_factor": channel_data[0],
+                "voltage": channel_data[1],
+                "current": channel_data[2],
+                "power": channel_data[3],
+            }
+        )
+    return {"channels": channels}
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the Eyedro response parser")
+    parser.add_argument("--channels", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'channels':>8} {'legacy us':>10} {'reading us':>11} {'speedup':>8}")
+    for channels in args.channels:
+        body = make_body(channels)
+        legacy = min(timeit.repeat(lambda: legacy_parse(body), number=args.number, repeat=3))
+        reading = min(
+            timeit.repeat(lambda: parse_getdata(body, 0.0), number=args.number, repeat=3)
+        )
+        print(
+            f"{channels:>8} {legacy / args.number * 1e6:>10.2f} "
+            f"{reading / args.number * 1e6:>11.2f} {legacy / reading:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
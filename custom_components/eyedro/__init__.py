@@ -3,18 +3,69 @@ from __future__ import annotations
 
 from datetime import timedelta
 
-import aiohttp
-
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DOMAIN
+from .const import (
+    CONF_CACHE_TTL,
+    CONF_DEMAND,
+    CONF_FAST_START,
+    CONF_HISTORY,
+    CONF_HISTORY_RETENTION,
+    CONF_HUB_MODE,
+    CONF_LOAD_EVENTS,
+    CONF_LOAD_THRESHOLD,
+    CONF_MAX_CONCURRENT,
+    CONF_ROLLING_STATISTICS,
+    CONF_SAMPLE_INTERVAL,
+    CONF_STATISTICS,
+    CONF_STATISTICS_ONLY,
+    CONF_TARIFF,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_HISTORY_RETENTION,
+    DEFAULT_LOAD_THRESHOLD,
+    DEFAULT_MAX_CONCURRENT,
+    DEFAULT_PORT,
+    DEFAULT_SAMPLE_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    STORAGE_VERSION,
+)
+from .adaptive import AdaptivePollingPolicy
 from .coordinator import EyedroDataUpdateCoordinator
+from .deadband import DeadbandPolicy
+from .demand import (
+    DemandSettings,
+    DemandTracker,
+    async_join_site_demand,
+    async_leave_site_demand,
+)
+from .history import EyedroHistory, history_path, remove_history
 from .api import EyedroAPI
+from .hub import async_get_hub, async_leave_hub
+from .live import async_get_live_feed, async_remove_live_feed
+from .loads import LoadChangeDetector
+from .long_term import EyedroLongTermStatistics
+from .metrics import async_register_metrics_view
+from .rolling import RollingStatistics
+from .services import async_register_services
+from .session import async_acquire_session, async_release_session
+from .tariff import Tariff, TariffMeter
 
 PLATFORMS: list[str] = ["sensor"]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the services once, whether or not any device is loaded."""
+    async_register_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Eyedro from a config entry."""
@@ -28,22 +79,97 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
     )
 
-    # Create aiohttp session
-    session = aiohttp.ClientSession()
+    # Borrow the integration-wide connection pool
+    session = async_acquire_session(hass)
+    coordinator: EyedroDataUpdateCoordinator | None = None
 
     try:
         # Initialize API client
-        api = EyedroAPI(host=host, port=port, session=session)
+        api = EyedroAPI(
+            host=host,
+            port=port,
+            session=session,
+            cache_ttl=entry.options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+        )
+
+        # In hub mode the shared scheduler polls the device instead of its own timer
+        hub = async_get_hub(hass) if entry.options.get(CONF_HUB_MODE, False) else None
 
         # Initialize coordinator
-        coordinator = EyedroDataUpdateCoordinator(hass, api, update_interval=scan_interval)
+        coordinator = EyedroDataUpdateCoordinator(
+            hass,
+            api,
+            update_interval=scan_interval,
+            hub=hub,
+            sample_interval=entry.options.get(
+                CONF_SAMPLE_INTERVAL, DEFAULT_SAMPLE_INTERVAL
+            ),
+            entry_id=entry.entry_id,
+        )
+        coordinator.deadband = DeadbandPolicy.from_options(entry.options)
+        coordinator.live = async_get_live_feed(hass, entry.entry_id)
+        coordinator.adaptive = AdaptivePollingPolicy.from_options(entry.options)
+        coordinator.set_poll_interval(scan_interval)
+
+        if entry.options.get(CONF_LOAD_EVENTS, False):
+            coordinator.load_events = LoadChangeDetector(
+                entry.options.get(CONF_LOAD_THRESHOLD, DEFAULT_LOAD_THRESHOLD)
+            )
+
+        if (demand_settings := _demand_settings(entry)) is not None:
+            coordinator.demand = DemandTracker(demand_settings)
+            coordinator.site_demand = await async_join_site_demand(
+                hass, entry.entry_id, demand_settings
+            )
 
-        # Fetch initial data so we have data when the entities are added
-        await coordinator.async_config_entry_first_refresh()
+        if (tariff := _tariff(entry)) is not None:
+            coordinator.tariff = TariffMeter(tariff)
+
+        # Restore energy counters, load signatures, demand peaks and costs
+        # before the first reading
+        await coordinator.async_load_state()
+
+        if entry.options.get(CONF_HISTORY, False):
+            coordinator.history = EyedroHistory(
+                hass,
+                history_path(hass, entry.entry_id),
+                timedelta(
+                    days=entry.options.get(
+                        CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION
+                    )
+                ),
+            )
+            await coordinator.history.async_open()
+
+        if entry.options.get(CONF_ROLLING_STATISTICS, False):
+            coordinator.rolling = RollingStatistics()
+
+        if (statistics_only := _statistics_mode(entry)) is not None:
+            coordinator.statistics = EyedroLongTermStatistics(
+                hass, host, entry.title, only=statistics_only
+            )
+
+        # In fast-start mode the entities start from the last known values and
+        # the device is polled in the background, so setup never waits on it
+        fast_start = entry.options.get(
+            CONF_FAST_START, False
+        ) and coordinator.async_restore_data()
+        if not fast_start:
+            # Fetch initial data so we have data when the entities are added;
+            # in hub mode through the hub, so a restart polls no more than
+            # the concurrency cap of devices at once
+            if hub is not None:
+                await hub.async_first_refresh(
+                    coordinator,
+                    entry.options.get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+                )
+            else:
+                await coordinator.async_config_entry_first_refresh()
 
         # Store coordinator in hass data
         hass.data.setdefault(DOMAIN, {})
         hass.data[DOMAIN][entry.entry_id] = coordinator
+        async_register_metrics_view(hass)
 
         # Set up platforms
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -53,35 +179,142 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry.add_update_listener(async_update_options)
         )
 
+        if hub is not None:
+            hub.async_add(
+                coordinator,
+                entry.options.get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+            )
+
+        # The hub polls a fast-started device at its first slot
+        if fast_start and hub is None:
+            entry.async_create_background_task(
+                hass, coordinator.async_refresh(), f"eyedro first refresh {host}"
+            )
+
+        coordinator.async_start_sampling(entry)
+        if coordinator.history is not None:
+            entry.async_on_unload(coordinator.history.async_start())
+
         return True
     except Exception:
-        # Clean up session if setup fails
-        await session.close()
+        # Release the pool, hub, history file and site demand if setup fails
+        if coordinator is not None and coordinator.hub is not None:
+            async_leave_hub(hass, coordinator)
+        if coordinator is not None and coordinator.history is not None:
+            await coordinator.history.async_close()
+        if coordinator is not None and coordinator.demand is not None:
+            await async_leave_site_demand(
+                hass, entry.entry_id, coordinator.demand.settings
+            )
+        await async_release_session(hass)
         raise
 
 
+def _statistics_mode(entry: ConfigEntry) -> bool | None:
+    """Return None without statistics import, else whether it replaces the sensors."""
+    # Statistics-only mode implies importing statistics
+    if entry.options.get(CONF_STATISTICS_ONLY, False):
+        return True
+    if entry.options.get(CONF_STATISTICS, False):
+        return False
+    return None
+
+
+def _demand_settings(entry: ConfigEntry) -> DemandSettings | None:
+    """Return how demand is measured, or None without demand tracking."""
+    if not entry.options.get(CONF_DEMAND, False):
+        return None
+    return DemandSettings.from_options(entry.options)
+
+
+def _tariff(entry: ConfigEntry) -> Tariff | None:
+    """Return the time-of-use tariff, or None without one."""
+    if not (text := entry.options.get(CONF_TARIFF, "").strip()):
+        return None
+    # Checked by the options flow, so it parses
+    return Tariff.from_text(text)
+
+
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
-    # Update coordinator's update interval if scan_interval changed
     coordinator: EyedroDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    # Joining or leaving the hub, or changing the sampler, history,
+    # statistics, rolling statistics, load detection, demand settings or
+    # tariff, needs a fresh coordinator
+    hub_mode = entry.options.get(CONF_HUB_MODE, False)
+    sample_interval = entry.options.get(CONF_SAMPLE_INTERVAL, DEFAULT_SAMPLE_INTERVAL)
+    history = coordinator.history
+    if (
+        hub_mode != (coordinator.hub is not None)
+        or sample_interval != coordinator.sample_interval
+        or entry.options.get(CONF_HISTORY, False) != (history is not None)
+        or entry.options.get(CONF_ROLLING_STATISTICS, False)
+        != (coordinator.rolling is not None)
+        or entry.options.get(CONF_LOAD_EVENTS, False)
+        != (coordinator.load_events is not None)
+        or _demand_settings(entry)
+        != (None if coordinator.demand is None else coordinator.demand.settings)
+        or _statistics_mode(entry)
+        != (None if coordinator.statistics is None else coordinator.statistics.only)
+        or _tariff(entry)
+        != (None if coordinator.tariff is None else coordinator.tariff.tariff)
+        or (
+            history is not None
+            and entry.options.get(CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION)
+            != history.raw_retention.days
+        )
+    ):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    # Update coordinator's update interval if scan_interval changed
     new_scan_interval = timedelta(
         seconds=entry.options.get(
             CONF_SCAN_INTERVAL,
             entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.seconds),
         )
     )
-    coordinator.update_interval = new_scan_interval
+    coordinator.adaptive = AdaptivePollingPolicy.from_options(entry.options)
+    coordinator.set_poll_interval(new_scan_interval)
+    coordinator.deadband = DeadbandPolicy.from_options(entry.options)
+    coordinator.api.cache_ttl = entry.options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL)
+    if coordinator.load_events is not None:
+        coordinator.load_events.threshold = entry.options.get(
+            CONF_LOAD_THRESHOLD, DEFAULT_LOAD_THRESHOLD
+        )
+
+    if coordinator.hub is not None:
+        coordinator.hub.async_set_max_concurrent(
+            coordinator,
+            entry.options.get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+        )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        coordinator: EyedroDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-        # Close the aiohttp session
-        if coordinator.api._session and not coordinator.api._session.closed:
-            await coordinator.api._session.close()
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator: EyedroDataUpdateCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        if coordinator.hub is not None:
+            async_leave_hub(hass, coordinator)
+        await coordinator.async_save_state()
+        if coordinator.demand is not None:
+            await async_leave_site_demand(
+                hass, entry.entry_id, coordinator.demand.settings
+            )
+        if coordinator.history is not None:
+            await coordinator.history.async_close()
+        # Closes the connection pool once the last entry is gone
+        await async_release_session(hass)
 
     return unload_ok
 
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete persisted state when a config entry is removed."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+    async_remove_live_feed(hass, entry.entry_id)
+    await hass.async_add_executor_job(
+        remove_history, history_path(hass, entry.entry_id)
+    )
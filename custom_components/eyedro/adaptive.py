@@ -0,0 +1,55 @@
+"""Load-driven poll interval policy for Eyedro devices."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .const import (
+    ADAPTIVE_BACKOFF_FACTOR,
+    CONF_ADAPTIVE_POLLING,
+    CONF_ADAPTIVE_THRESHOLD,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    DEFAULT_ADAPTIVE_THRESHOLD,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class AdaptivePollingPolicy:
+    """Pick the next poll interval from how much the load just changed.
+
+    A change in total power of at least ``threshold`` watts drops the
+    interval straight to ``min_interval`` so cycling appliances are tracked
+    closely. Every stable poll stretches it by ADAPTIVE_BACKOFF_FACTOR up to
+    ``max_interval``. Intervals are whole seconds, which keeps devices in the
+    hub's interval groups instead of each on its own odd cadence.
+    """
+
+    enabled: bool
+    min_interval: int
+    max_interval: int
+    threshold: float
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> AdaptivePollingPolicy:
+        """Build the policy from config entry options."""
+        return cls(
+            enabled=options.get(CONF_ADAPTIVE_POLLING, False),
+            min_interval=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+            max_interval=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+            threshold=options.get(CONF_ADAPTIVE_THRESHOLD, DEFAULT_ADAPTIVE_THRESHOLD),
+        )
+
+    def clamp(self, interval: float) -> int:
+        """Return an interval in whole seconds within the configured bounds."""
+        return min(max(round(interval), self.min_interval), self.max_interval)
+
+    def next_interval(self, current: float, change: float) -> int:
+        """Return the interval to use after a poll that saw ``change`` watts."""
+        if change >= self.threshold:
+            return self.min_interval
+        # Always grow by at least a second so short intervals can back off too
+        return self.clamp(max(current * ADAPTIVE_BACKOFF_FACTOR, current + 1))
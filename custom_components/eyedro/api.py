@@ -1,79 +1,246 @@
 """API client for Eyedro device."""
+from __future__ import annotations
+
+import asyncio
 import aiohttp
+from itertools import chain
 import logging
-from typing import Any
-
-from .const import API_PATH_GETDATA, DEFAULT_TIMEOUT
+import time
+
+from homeassistant.util.json import json_loads
+
+from .const import (
+    API_PATH_GETDATA,
+    BREAKER_PROBE_CONNECT_TIMEOUT,
+    BREAKER_PROBE_TIMEOUT,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_TIMEOUT,
+    IDX_CURRENT,
+    IDX_POWER,
+    IDX_POWER_FACTOR,
+    IDX_VOLTAGE,
+)
+from .instrumentation import PollStats
 
 _LOGGER = logging.getLogger(__name__)
 
+# Per-channel fields in device order, matching the IDX_* constants
+READING_FIELDS = ("power_factor", "voltage", "current", "power")
+
+
+class EyedroReading:
+    """One /getdata response in raw device units.
+
+    Each field holds one integer per channel:
+    power_factor in milli-units (988 = 0.988), voltage in centivolts
+    (11665 = 116.65V), current in milliamps (11800 = 11.8A) and power in
+    watts. ``timestamp`` is the monotonic time the response arrived.
+    """
+
+    __slots__ = ("timestamp", "power_factor", "voltage", "current", "power")
+
+    def __init__(
+        self,
+        timestamp: float,
+        power_factor: tuple[int, ...],
+        voltage: tuple[int, ...],
+        current: tuple[int, ...],
+        power: tuple[int, ...],
+    ) -> None:
+        """Initialize the reading."""
+        self.timestamp = timestamp
+        self.power_factor = power_factor
+        self.voltage = voltage
+        self.current = current
+        self.power = power
+
+    @property
+    def channel_count(self) -> int:
+        """Return the number of channels in the reading."""
+        return len(self.power)
+
+    @property
+    def fields(self) -> tuple[tuple[int, ...], ...]:
+        """Return the per-channel values of every field in READING_FIELDS order."""
+        return (self.power_factor, self.voltage, self.current, self.power)
+
+    def __repr__(self) -> str:
+        """Return a debug representation."""
+        return (
+            f"EyedroReading(timestamp={self.timestamp}, "
+            f"power_factor={self.power_factor}, voltage={self.voltage}, "
+            f"current={self.current}, power={self.power})"
+        )
+
+
+def parse_getdata(body: bytes, timestamp: float) -> EyedroReading:
+    """Parse a raw /getdata body into a reading.
+
+    The response looks like
+    {"data": [[pf, voltage, current, power, ignore], ...]} with one entry per
+    channel. According to official API:
+    https://eyedro.com/eyefi-getdata-api-command-sample-code/
+    The 5th element of each channel is ignored (factory use only).
+
+    Raises:
+        ValueError: If the body is not JSON or does not have that shape
+    """
+    payload = json_loads(body)
+    if not isinstance(payload, dict) or "data" not in payload:
+        raise ValueError("Missing 'data' key in API response")
+
+    data = payload["data"]
+    if not isinstance(data, list) or not data:
+        raise ValueError(
+            f"Expected non-empty data array, got {len(data) if isinstance(data, list) else type(data)}"
+        )
+
+    try:
+        power_factor, voltage, current, power = zip(
+            *[
+                (
+                    channel_data[IDX_POWER_FACTOR],
+                    channel_data[IDX_VOLTAGE],
+                    channel_data[IDX_CURRENT],
+                    channel_data[IDX_POWER],
+                )
+                for channel_data in data
+            ]
+        )
+    except (IndexError, KeyError, TypeError) as err:
+        raise ValueError(
+            f"Channel {_first_invalid_channel(data)} data should be an array with at least 4 elements"
+        ) from err
+
+    # One pass over every value; bool is not a valid reading either
+    if set(map(type, chain(power_factor, voltage, current, power))) != {int}:
+        raise ValueError("Expected integer values in every channel")
+
+    return EyedroReading(timestamp, power_factor, voltage, current, power)
+
+
+def _first_invalid_channel(data: list) -> int:
+    """Return the index of the first malformed channel, for error messages."""
+    for index, channel_data in enumerate(data):
+        if not isinstance(channel_data, list) or len(channel_data) < 4:
+            return index
+    return 0
 
-class EyedroAPI:
-    """API client for Eyedro energy monitoring device."""
 
-    def __init__(self, host: str, port: int, session: aiohttp.ClientSession) -> None:
+class EyedroAPI:
+    """API client for Eyedro energy monitoring device.
+
+    The meters handle concurrent requests poorly, so callers never overlap:
+    one arriving while a request is in flight waits for that request, and
+    one arriving shortly after gets the reading it returned.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        session: aiohttp.ClientSession,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+    ) -> None:
         """Initialize the API client."""
         self._host = host
         self._port = port
         self._session = session
         self._base_url = f"http://{host}:{port}"
-
-    async def async_get_data(self) -> dict[str, Any]:
+        self._url = f"{self._base_url}{API_PATH_GETDATA}"
+        self._timeout = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
+        # Probes of a device that stopped answering give up quickly
+        self._probe_timeout = aiohttp.ClientTimeout(
+            total=BREAKER_PROBE_TIMEOUT, sock_connect=BREAKER_PROBE_CONNECT_TIMEOUT
+        )
+        # Connect and TTFB are recorded by the shared session's trace config
+        self.stats = PollStats()
+        # Seconds the last reading is served to later callers, 0 to always fetch
+        self.cache_ttl = cache_ttl
+        self._last_reading: EyedroReading | None = None
+        self._in_flight: asyncio.Task[EyedroReading] | None = None
+
+    async def async_get_data(
+        self, probe: bool = False, max_age: float | None = None
+    ) -> EyedroReading:
         """
         Fetch data from the Eyedro device.
 
+        Joins the request in flight if there is one, and returns the last
+        reading without a request if it is recent enough.
+
+        Args:
+            probe: Use the short probe timeout instead of the normal one
+            max_age: Oldest last reading to return, in seconds; defaults to
+                the cache TTL, 0 always waits for a response
+
         Returns:
-            Dictionary with parsed data structure containing channels with
-            power_factor, voltage, current, and power values.
+            The parsed reading with power_factor, voltage, current, and
+            power values for every channel the device reports.
 
         Raises:
             aiohttp.ClientError: If the request fails
+            TimeoutError: If the device does not answer in time
+            ValueError: If the response cannot be parsed
         """
-        url = f"{self._base_url}{API_PATH_GETDATA}"
-        timeout = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
-
+        if max_age is None:
+            max_age = self.cache_ttl
+        reading = self._last_reading
+        if reading is not None and time.monotonic() - reading.timestamp < max_age:
+            self.stats.cache_hits += 1
+            return reading
+
+        if (task := self._in_flight) is None:
+            task = self._in_flight = asyncio.get_running_loop().create_task(
+                self._async_request(probe), name=f"eyedro request {self._host}"
+            )
+            task.add_done_callback(self._request_done)
+        else:
+            self.stats.coalesced += 1
+        # A caller that gives up must not cancel the request the others wait on
+        return await asyncio.shield(task)
+
+    def _request_done(self, task: asyncio.Task[EyedroReading]) -> None:
+        """Keep the reading of a finished request for the callers after it."""
+        self._in_flight = None
+        if task.cancelled():
+            return
+        # Also marks the exception retrieved when every caller gave up; after
+        # a failure the previous reading no longer stands for the device
+        self._last_reading = None if task.exception() else task.result()
+
+    async def _async_request(self, probe: bool) -> EyedroReading:
+        """Request and parse one reading, recording its timings."""
+        stats = self.stats
+        start = time.perf_counter()
         try:
-            async with self._session.get(url, timeout=timeout) as response:
+            timeout = self._probe_timeout if probe else self._timeout
+            async with self._session.get(
+                self._url, timeout=timeout, trace_request_ctx=stats
+            ) as response:
                 response.raise_for_status()
-                json_data = await response.json()
-
-                # Parse the response structure
-                # {"data": [[pf, voltage, current, power, ignore], [pf, voltage, current, power, ignore]]}
-                # According to official API: https://eyedro.com/eyefi-getdata-api-command-sample-code/
-                if "data" not in json_data:
-                    raise ValueError("Missing 'data' key in API response")
-
-                data = json_data["data"]
-                if not isinstance(data, list) or len(data) < 2:
-                    raise ValueError(
-                        f"Expected data array with at least 2 channels, got {len(data) if isinstance(data, list) else type(data)}"
-                    )
-
-                # Structure the data for easier access
-                # Each channel has 5 elements: [power_factor, voltage, current, power, ignore]
-                # The 5th element is ignored (factory use only)
-                channels = []
-                for i, channel_data in enumerate(data[:2]):  # Process first 2 channels
-                    if not isinstance(channel_data, list) or len(channel_data) < 4:
-                        raise ValueError(
-                            f"Channel {i} data should be an array with at least 4 elements"
-                        )
-
-                    channels.append(
-                        {
-                            "power_factor": channel_data[0],  # milli-units (988 = 0.988)
-                            "voltage": channel_data[1],        # centivolts (11665 = 116.65V)
-                            "current": channel_data[2],        # milliamps (11800 = 11.8A)
-                            "power": channel_data[3],          # watts (1360 = 1360W)
-                        }
-                    )
-
-                return {"channels": channels}
-
+                body_start = time.perf_counter()
+                body = await response.read()
+            parse_start = time.perf_counter()
+            reading = parse_getdata(body, time.monotonic())
+
+        # Callers decide what is worth reporting; a dead meter fails every poll
+        except TimeoutError as err:
+            stats.timeouts += 1
+            _LOGGER.debug("Timeout fetching data from Eyedro device %s: %s", self._host, err)
+            raise
         except aiohttp.ClientError as err:
-            _LOGGER.error("Error fetching data from Eyedro device: %s", err)
+            stats.failures += 1
+            _LOGGER.debug("Error fetching data from Eyedro device %s: %s", self._host, err)
             raise
-        except (ValueError, KeyError, TypeError) as err:
-            _LOGGER.error("Error parsing Eyedro API response: %s", err)
+        except ValueError as err:
+            stats.failures += 1
+            _LOGGER.debug("Error parsing Eyedro API response from %s: %s", self._host, err)
             raise ValueError(f"Invalid API response format: {err}") from err
 
+        end = time.perf_counter()
+        stats.body.observe(parse_start - body_start)
+        stats.parse.observe(end - parse_start)
+        stats.request.observe(end - start)
+        stats.successes += 1
+        return reading
@@ -0,0 +1,105 @@
+"""Circuit breaker for unreachable Eyedro devices."""
+from __future__ import annotations
+
+import random
+
+from .const import (
+    BREAKER_BASE_BACKOFF,
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN,
+    BREAKER_MAX_BACKOFF,
+    BREAKER_OPEN,
+)
+
+
+class CircuitBreaker:
+    """Stop polling a device that keeps failing, and probe it back in.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    requests are refused until a backoff expires. The backoff doubles every
+    time a probe fails, up to ``max_backoff``, and is jittered so a fleet
+    that dropped off together does not come back in lockstep. Once it
+    expires the breaker is half-open and lets exactly one probe through; a
+    success closes it, a failure opens it again.
+
+    Times are ``time.monotonic()`` seconds supplied by the caller.
+    """
+
+    __slots__ = (
+        "failure_threshold",
+        "base_backoff",
+        "max_backoff",
+        "state",
+        "failures",
+        "trips",
+        "retry_at",
+        "_probing",
+        "_random",
+    )
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_backoff: float = BREAKER_BASE_BACKOFF,
+        max_backoff: float = BREAKER_MAX_BACKOFF,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        # Times the breaker opened since setup
+        self.trips = 0
+        self.retry_at = 0.0
+        self._probing = False
+        self._random = random.Random()
+
+    def allow_request(self, now: float) -> bool:
+        """Return True if a request may be sent now.
+
+        A True answer in the half-open state reserves the single probe, which
+        must be settled with ``record_success``, ``record_failure`` or
+        ``release``.
+        """
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN:
+            if now < self.retry_at:
+                return False
+            self.state = BREAKER_HALF_OPEN
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> bool:
+        """Close the breaker; return True if it was not closed before."""
+        recovered = self.state != BREAKER_CLOSED
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self._probing = False
+        return recovered
+
+    def record_failure(self, now: float) -> bool:
+        """Count a failure; return True if this opened the breaker."""
+        self.failures += 1
+        self._probing = False
+        if self.state == BREAKER_CLOSED and self.failures < self.failure_threshold:
+            return False
+
+        opened = self.state == BREAKER_CLOSED
+        if opened:
+            self.trips += 1
+        self.state = BREAKER_OPEN
+        # Failures beyond the threshold double the backoff, with full jitter
+        # over its upper half so the wait never collapses to nothing
+        exponent = self.failures - self.failure_threshold
+        backoff = min(self.base_backoff * 2 ** min(exponent, 32), self.max_backoff)
+        self.retry_at = now + self._random.uniform(backoff / 2, backoff)
+        return opened
+
+    def release(self) -> None:
+        """Give up the probe without a verdict, e.g. when it was cancelled."""
+        self._probing = False
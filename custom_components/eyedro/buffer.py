@@ -0,0 +1,82 @@
+"""Fixed-size ring buffer for high-rate Eyedro samples."""
+from __future__ import annotations
+
+from array import array
+
+from .api import READING_FIELDS, EyedroReading
+
+
+class EyedroRingBuffer:
+    """Circular buffer of raw integer readings, one typed array per field.
+
+    Samples are addressed by a monotonically increasing sequence number so
+    readers can ask for "everything since sequence N" without the buffer
+    tracking who has consumed what. Only the newest ``capacity`` samples
+    are retained.
+    """
+
+    __slots__ = ("capacity", "channel_count", "_timestamps", "_columns", "_total")
+
+    def __init__(self, channel_count: int, capacity: int) -> None:
+        """Allocate the buffer up front."""
+        self.capacity = capacity
+        self.channel_count = channel_count
+        self._timestamps = array("d", bytes(8 * capacity))
+        # _columns[field][channel] -> array of raw device units
+        self._columns = [
+            [array("i", bytes(4 * capacity)) for _ in range(channel_count)]
+            for _ in READING_FIELDS
+        ]
+        self._total = 0
+
+    @property
+    def total(self) -> int:
+        """Return the sequence number of the next sample to be written."""
+        return self._total
+
+    def __len__(self) -> int:
+        """Return the number of samples currently held."""
+        return min(self._total, self.capacity)
+
+    def append(self, reading: EyedroReading) -> None:
+        """Store one reading, overwriting the oldest sample when full."""
+        slot = self._total % self.capacity
+        self._timestamps[slot] = reading.timestamp
+        for columns, values in zip(self._columns, reading.fields):
+            for column, value in zip(columns, values):
+                column[slot] = value
+        self._total += 1
+
+    def _slots(self, since: int) -> range:
+        """Return sequence numbers of retained samples with sequence >= since."""
+        start = max(since, self._total - self.capacity)
+        return range(start, self._total)
+
+    def count_since(self, since: int) -> int:
+        """Return how many retained samples have sequence >= since."""
+        return len(self._slots(since))
+
+    def mean_reading(self, since: int) -> EyedroReading | None:
+        """Return the per-channel mean of samples since ``since`` as a reading.
+
+        Means are rounded to whole device units and the reading carries the
+        timestamp of the newest sample.
+        """
+        positions = [seq % self.capacity for seq in self._slots(since)]
+        if not positions:
+            return None
+        count = len(positions)
+        fields = [
+            tuple(round(sum(column[pos] for pos in positions) / count) for column in columns)
+            for columns in self._columns
+        ]
+        return EyedroReading(self._timestamps[positions[-1]], *fields)
+
+    def summed_stats(self, field: str, since: int) -> tuple[float, int, int] | None:
+        """Return (mean, min, max) of a field summed across channels per sample."""
+        positions = [seq % self.capacity for seq in self._slots(since)]
+        if not positions:
+            return None
+        columns = self._columns[READING_FIELDS.index(field)]
+        sums = [sum(column[pos] for column in columns) for pos in positions]
+        return sum(sums) / len(sums), min(sums), max(sums)
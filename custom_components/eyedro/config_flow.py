@@ -1,6 +1,8 @@
 """Config flow for Eyedro integration."""
 from __future__ import annotations
 
+import asyncio
+import ipaddress
 import logging
 import re
 from typing import Any
@@ -10,11 +12,71 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers import config_validation as cv
-
-from .const import API_PATH_GETDATA, DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DOMAIN
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.components import network
+from homeassistant.helpers import config_validation as cv, selector
+from homeassistant.helpers.typing import DiscoveryInfoType
+
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_ADAPTIVE_THRESHOLD,
+    CONF_BILLING_DAY,
+    CONF_CACHE_TTL,
+    CONF_DEADBAND_CURRENT,
+    CONF_DEADBAND_POWER,
+    CONF_DEADBAND_POWER_FACTOR,
+    CONF_DEADBAND_RELATIVE,
+    CONF_DEADBAND_VOLTAGE,
+    CONF_DEMAND,
+    CONF_DEMAND_MODE,
+    CONF_DEMAND_WINDOW,
+    CONF_DEVICES,
+    CONF_FAST_START,
+    CONF_HISTORY,
+    CONF_HISTORY_RETENTION,
+    CONF_HUB_MODE,
+    CONF_LOAD_EVENTS,
+    CONF_LOAD_THRESHOLD,
+    CONF_MAX_CONCURRENT,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MAX_SILENCE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_NETWORK,
+    CONF_ROLLING_STATISTICS,
+    CONF_SAMPLE_INTERVAL,
+    CONF_STATISTICS,
+    CONF_STATISTICS_ONLY,
+    CONF_TARIFF,
+    DEFAULT_ADAPTIVE_THRESHOLD,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_DEADBAND,
+    DEFAULT_DEMAND_MODE,
+    DEFAULT_DEMAND_WINDOW,
+    DEFAULT_HISTORY_RETENTION,
+    DEFAULT_LOAD_THRESHOLD,
+    DEFAULT_MAX_CONCURRENT,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_PORT,
+    DEFAULT_SAMPLE_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEMAND_MODE_BLOCK,
+    DEMAND_MODE_ROLLING,
+    DEMAND_WINDOWS,
+    DISCOVERY_MAX_HOSTS,
+    DOMAIN,
+    MAX_CACHE_TTL,
+    MAX_SAMPLE_INTERVAL,
+    MIN_SAMPLE_INTERVAL,
+)
+from .api import EyedroAPI
+from .discovery import DiscoveredDevice, async_scan
+from .session import async_acquire_session, async_release_session
+from .tariff import Tariff
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,6 +91,14 @@ def validate_ip_address(ip: str) -> bool:
     return IP_ADDRESS_PATTERN.match(ip) is not None
 
 
+def _loaded_api(hass: HomeAssistant, host: str, port: int) -> EyedroAPI | None:
+    """Return the client of a loaded entry for a device, if there is one."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        if coordinator.api._host == host and coordinator.api._port == port:
+            return coordinator.api
+    return None
+
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
     host = data[CONF_HOST].strip()
@@ -37,22 +107,19 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     # Validate IP address format
     if not validate_ip_address(host):
         raise ValueError("Invalid IP address format")
-    
-    url = f"http://{host}:{port}{API_PATH_GETDATA}"
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                response.raise_for_status()
-                json_data = await response.json()
-                # Official API returns: {"data": [[...], [...]]}
-                # See: https://eyedro.com/eyefi-getdata-api-command-sample-code/
-                if "data" not in json_data or not isinstance(json_data.get("data"), list):
-                    raise ValueError("Invalid response format from Eyedro device")
-        except aiohttp.ClientError as err:
-            raise CannotConnect from err
-        except (ValueError, KeyError) as err:
-            raise InvalidAuth from err
+    session = async_acquire_session(hass)
+    try:
+        # A device that is already set up (when reconfiguring) answers its own
+        # client's request or cached reading rather than a second request
+        api = _loaded_api(hass, host, port) or EyedroAPI(host, port, session)
+        await api.async_get_data()
+    except (aiohttp.ClientError, TimeoutError) as err:
+        raise CannotConnect from err
+    except ValueError as err:
+        raise InvalidAuth from err
+    finally:
+        await async_release_session(hass)
 
     return {"title": f"Eyedro {host}"}
 
@@ -62,6 +129,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._network: ipaddress.IPv4Network | None = None
+        self._scan_task: asyncio.Task | None = None
+        self._found: list[DiscoveredDevice] = []
+
     @staticmethod
     async def async_get_options_flow(
         config_entry: config_entries.ConfigEntry,
@@ -72,7 +145,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the initial step."""
+        """Let the user enter a device or scan the network for them."""
+        return self.async_show_menu(step_id="user", menu_options=["manual", "scan"])
+
+    async def async_step_manual(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle a device entered by hand."""
         errors: dict[str, str] = {}
 
         if user_input is not None:
@@ -123,11 +202,173 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         return self.async_show_form(
-            step_id="user",
+            step_id="manual",
             data_schema=data_schema,
             errors=errors,
         )
 
+    async def async_step_scan(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Ask which network to scan."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            try:
+                scan_network = ipaddress.IPv4Network(
+                    user_input[CONF_NETWORK].strip(), strict=False
+                )
+            except ValueError:
+                errors[CONF_NETWORK] = "invalid_network"
+            else:
+                if scan_network.num_addresses > DISCOVERY_MAX_HOSTS:
+                    errors[CONF_NETWORK] = "network_too_large"
+                else:
+                    self._network = scan_network
+                    return await self.async_step_scan_progress()
+
+        # Suggest the /24 Home Assistant itself is on
+        try:
+            source_ip = await network.async_get_source_ip(self.hass)
+            suggested = str(ipaddress.IPv4Network(f"{source_ip}/24", strict=False))
+        except (HomeAssistantError, ValueError):
+            suggested = ""
+
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=vol.Schema({vol.Required(CONF_NETWORK, default=suggested): str}),
+            errors=errors,
+        )
+
+    async def async_step_scan_progress(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Scan the network, showing progress while it runs."""
+        if self._scan_task is None:
+            self._found = []
+            self._scan_task = self.hass.async_create_task(self._async_scan())
+
+        if not self._scan_task.done():
+            return self.async_show_progress(
+                step_id="scan_progress",
+                progress_action="scan",
+                progress_task=self._scan_task,
+                description_placeholders={
+                    "network": str(self._network),
+                    "count": str(len(self._found)),
+                    "devices": ", ".join(device.host for device in self._found) or "-",
+                },
+            )
+
+        scan_task, self._scan_task = self._scan_task, None
+        if scan_task.exception() is not None:
+            _LOGGER.error("Scanning %s failed: %s", self._network, scan_task.exception())
+            return self.async_show_progress_done(next_step_id="scan_failed")
+        if not self._found:
+            return self.async_show_progress_done(next_step_id="scan_empty")
+        return self.async_show_progress_done(next_step_id="scan_select")
+
+    async def _async_scan(self) -> None:
+        """Collect every device on the network that is not configured yet.
+
+        Each device found is shown on the progress step straight away.
+        """
+        configured = {
+            entry.data[CONF_HOST] for entry in self._async_current_entries()
+        }
+
+        def _progress(probed: int, total: int) -> None:
+            self.async_update_progress(probed / total)
+
+        session = async_acquire_session(self.hass)
+        try:
+            async for device in async_scan(
+                session, self._network, DEFAULT_PORT, configured, _progress
+            ):
+                self._found.append(device)
+                # New placeholders make the frontend reload the progress step
+                await self.hass.config_entries.flow.async_configure(self.flow_id)
+        finally:
+            await async_release_session(self.hass)
+
+    @callback
+    def async_remove(self) -> None:
+        """Stop a scan still running when the flow is closed."""
+        if self._scan_task is not None:
+            self._scan_task.cancel()
+
+    async def async_step_scan_failed(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Abort after the scan itself failed."""
+        return self.async_abort(reason="cannot_connect")
+
+    async def async_step_scan_empty(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Abort when no unconfigured device answered."""
+        return self.async_abort(reason="no_devices_found")
+
+    async def async_step_scan_select(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Let the user pick which of the found devices to add."""
+        found = {device.host: device for device in self._found}
+
+        if user_input is not None:
+            selected = [found[host] for host in user_input[CONF_DEVICES] if host in found]
+            if not selected:
+                return self.async_abort(reason="no_devices_selected")
+            # This flow creates the first entry, one discovery flow each the rest
+            for device in selected[1:]:
+                self.hass.async_create_task(
+                    self.hass.config_entries.flow.async_init(
+                        DOMAIN,
+                        context={"source": config_entries.SOURCE_INTEGRATION_DISCOVERY},
+                        data={CONF_HOST: device.host, CONF_PORT: device.port},
+                    )
+                )
+            await self.async_set_unique_id(f"{selected[0].host}:{selected[0].port}")
+            self._abort_if_unique_id_configured()
+            return self._async_create_scanned_entry(selected[0].host, selected[0].port)
+
+        options = {
+            host: f"{host} ({device.channel_count} channels)"
+            for host, device in sorted(
+                found.items(), key=lambda item: ipaddress.IPv4Address(item[0])
+            )
+        }
+        return self.async_show_form(
+            step_id="scan_select",
+            data_schema=vol.Schema(
+                {vol.Required(CONF_DEVICES, default=list(options)): cv.multi_select(options)}
+            ),
+            description_placeholders={"count": str(len(options))},
+        )
+
+    async def async_step_integration_discovery(
+        self, discovery_info: DiscoveryInfoType
+    ) -> FlowResult:
+        """Add a device the user picked from a scan in another flow."""
+        host = discovery_info[CONF_HOST]
+        port = discovery_info.get(CONF_PORT, DEFAULT_PORT)
+        await self.async_set_unique_id(f"{host}:{port}")
+        self._abort_if_unique_id_configured()
+        return self._async_create_scanned_entry(host, port)
+
+    @callback
+    def _async_create_scanned_entry(self, host: str, port: int) -> FlowResult:
+        """Create the entry of a scanned device, which already answered /getdata."""
+        return self.async_create_entry(
+            title=f"Eyedro {host}",
+            data={
+                CONF_HOST: host,
+                CONF_PORT: port,
+                CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL.seconds,
+            },
+            options={CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL.seconds},
+        )
+
     async def async_step_reconfigure(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -202,17 +443,34 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     ) -> FlowResult:
         """Manage the options."""
         errors: dict[str, str] = {}
+        tariff_error = ""
 
         if user_input is not None:
+            if tariff := user_input.get(CONF_TARIFF, "").strip():
+                try:
+                    Tariff.from_text(tariff)
+                except ValueError as err:
+                    tariff_error = str(err)
+
             # Validate scan interval if changed
             scan_interval = user_input.get(CONF_SCAN_INTERVAL)
+            # Zero disables high-rate sampling
+            sample_interval = user_input.get(CONF_SAMPLE_INTERVAL, DEFAULT_SAMPLE_INTERVAL)
             if scan_interval is not None and (scan_interval < 5 or scan_interval > 300):
                 errors[CONF_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif sample_interval and not (
+                MIN_SAMPLE_INTERVAL <= sample_interval <= MAX_SAMPLE_INTERVAL
+            ):
+                errors[CONF_SAMPLE_INTERVAL] = "invalid_sample_interval"
+            elif user_input.get(
+                CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+            ) > user_input.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL):
+                errors[CONF_MAX_SCAN_INTERVAL] = "invalid_adaptive_bounds"
+            elif tariff_error:
+                errors[CONF_TARIFF] = "invalid_tariff"
             else:
                 # Update the config entry with new options
-                return self.async_create_entry(
-                    title="", data={CONF_SCAN_INTERVAL: scan_interval}
-                )
+                return self.async_create_entry(title="", data=user_input)
 
         # Pre-fill form with current values
         current_scan_interval = self.config_entry.options.get(
@@ -220,12 +478,122 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             self.config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.seconds),
         )
 
+        options = self.config_entry.options
+
         data_schema = vol.Schema(
             {
                 vol.Optional(
                     CONF_SCAN_INTERVAL,
                     default=current_scan_interval,
                 ): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+                vol.Optional(
+                    CONF_ADAPTIVE_POLLING,
+                    default=options.get(CONF_ADAPTIVE_POLLING, False),
+                ): bool,
+                vol.Optional(
+                    CONF_MIN_SCAN_INTERVAL,
+                    default=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=300)),
+                vol.Optional(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                vol.Optional(
+                    CONF_ADAPTIVE_THRESHOLD,
+                    default=options.get(CONF_ADAPTIVE_THRESHOLD, DEFAULT_ADAPTIVE_THRESHOLD),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_FAST_START,
+                    default=options.get(CONF_FAST_START, False),
+                ): bool,
+                vol.Optional(
+                    CONF_HUB_MODE,
+                    default=options.get(CONF_HUB_MODE, False),
+                ): bool,
+                vol.Optional(
+                    CONF_MAX_CONCURRENT,
+                    default=options.get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=64)),
+                vol.Optional(
+                    CONF_SAMPLE_INTERVAL,
+                    default=options.get(CONF_SAMPLE_INTERVAL, DEFAULT_SAMPLE_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=MAX_SAMPLE_INTERVAL)),
+                vol.Optional(
+                    CONF_CACHE_TTL,
+                    default=options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=MAX_CACHE_TTL)),
+                vol.Optional(
+                    CONF_DEADBAND_POWER,
+                    default=options.get(CONF_DEADBAND_POWER, DEFAULT_DEADBAND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DEADBAND_CURRENT,
+                    default=options.get(CONF_DEADBAND_CURRENT, DEFAULT_DEADBAND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DEADBAND_VOLTAGE,
+                    default=options.get(CONF_DEADBAND_VOLTAGE, DEFAULT_DEADBAND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DEADBAND_POWER_FACTOR,
+                    default=options.get(CONF_DEADBAND_POWER_FACTOR, DEFAULT_DEADBAND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Optional(
+                    CONF_DEADBAND_RELATIVE,
+                    default=options.get(CONF_DEADBAND_RELATIVE, DEFAULT_DEADBAND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Optional(
+                    CONF_MAX_SILENCE,
+                    default=options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Optional(
+                    CONF_ROLLING_STATISTICS,
+                    default=options.get(CONF_ROLLING_STATISTICS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_LOAD_EVENTS,
+                    default=options.get(CONF_LOAD_EVENTS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_LOAD_THRESHOLD,
+                    default=options.get(CONF_LOAD_THRESHOLD, DEFAULT_LOAD_THRESHOLD),
+                ): vol.All(vol.Coerce(int), vol.Range(min=20, max=20000)),
+                vol.Optional(
+                    CONF_DEMAND,
+                    default=options.get(CONF_DEMAND, False),
+                ): bool,
+                vol.Optional(
+                    CONF_DEMAND_WINDOW,
+                    default=options.get(CONF_DEMAND_WINDOW, DEFAULT_DEMAND_WINDOW),
+                ): vol.All(vol.Coerce(int), vol.In(DEMAND_WINDOWS)),
+                vol.Optional(
+                    CONF_DEMAND_MODE,
+                    default=options.get(CONF_DEMAND_MODE, DEFAULT_DEMAND_MODE),
+                ): vol.In([DEMAND_MODE_BLOCK, DEMAND_MODE_ROLLING]),
+                vol.Optional(
+                    CONF_BILLING_DAY,
+                    default=options.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=28)),
+                vol.Optional(
+                    CONF_TARIFF,
+                    default=options.get(CONF_TARIFF, ""),
+                ): selector.TextSelector(selector.TextSelectorConfig(multiline=True)),
+                vol.Optional(
+                    CONF_HISTORY,
+                    default=options.get(CONF_HISTORY, False),
+                ): bool,
+                vol.Optional(
+                    CONF_HISTORY_RETENTION,
+                    default=options.get(CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=365)),
+                vol.Optional(
+                    CONF_STATISTICS,
+                    default=options.get(CONF_STATISTICS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_STATISTICS_ONLY,
+                    default=options.get(CONF_STATISTICS_ONLY, False),
+                ): bool,
             }
         )
 
@@ -233,6 +601,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             step_id="init",
             data_schema=data_schema,
             errors=errors,
+            description_placeholders={"tariff_error": tariff_error},
         )
 
 
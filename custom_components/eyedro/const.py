@@ -8,6 +8,163 @@ DEFAULT_PORT = 8080
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=10)
 DEFAULT_TIMEOUT = 10
 
+# Shared HTTP connection pool
+DATA_SESSION = f"{DOMAIN}_session"
+SESSION_LIMIT_PER_HOST = 2
+SESSION_KEEPALIVE_TIMEOUT = 60
+SESSION_DNS_CACHE_TTL = 300
+
+# Concurrent requests to a device share one; repeats within the TTL get its reading
+CONF_CACHE_TTL = "cache_ttl"
+DEFAULT_CACHE_TTL = 1.0
+MAX_CACHE_TTL = 10
+
+# Hub mode
+DATA_HUB = f"{DOMAIN}_hub"
+CONF_HUB_MODE = "hub_mode"
+CONF_MAX_CONCURRENT = "max_concurrent"
+DEFAULT_MAX_CONCURRENT = 4
+
+# High-rate sampling
+CONF_SAMPLE_INTERVAL = "sample_interval"
+DEFAULT_SAMPLE_INTERVAL = 0.0
+MIN_SAMPLE_INTERVAL = 0.2
+MAX_SAMPLE_INTERVAL = 5.0
+SAMPLE_BUFFER_MIN_SAMPLES = 16
+SAMPLE_BUFFER_MAX_SAMPLES = 4096
+
+# Energy integration
+# Gaps longer than this many poll (or sample) intervals are not integrated
+ENERGY_MAX_GAP_INTERVALS = 3
+
+# Deadband publishing
+CONF_DEADBAND_POWER = "deadband_power"
+CONF_DEADBAND_CURRENT = "deadband_current"
+CONF_DEADBAND_VOLTAGE = "deadband_voltage"
+CONF_DEADBAND_POWER_FACTOR = "deadband_power_factor"
+CONF_DEADBAND_RELATIVE = "deadband_relative"
+CONF_MAX_SILENCE = "max_silence"
+DEFAULT_DEADBAND = 0.0
+DEFAULT_MAX_SILENCE = 300
+
+# Adaptive polling
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_ADAPTIVE_THRESHOLD = "adaptive_threshold"
+DEFAULT_MIN_SCAN_INTERVAL = 2
+DEFAULT_MAX_SCAN_INTERVAL = 60
+DEFAULT_ADAPTIVE_THRESHOLD = 100.0
+# Stable readings stretch the interval by this factor per poll
+ADAPTIVE_BACKOFF_FACTOR = 1.5
+
+# Circuit breaker for unreachable devices
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BASE_BACKOFF = 10
+BREAKER_MAX_BACKOFF = 600
+BREAKER_PROBE_TIMEOUT = 3
+BREAKER_PROBE_CONNECT_TIMEOUT = 1
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# Local time-series history
+CONF_HISTORY = "history"
+CONF_HISTORY_RETENTION = "history_retention"
+DEFAULT_HISTORY_RETENTION = 7
+HISTORY_MINUTE_RETENTION = timedelta(days=90)
+HISTORY_HOUR_RETENTION = timedelta(days=1825)
+HISTORY_FLUSH_INTERVAL = timedelta(seconds=30)
+HISTORY_COMPACT_INTERVAL = timedelta(minutes=15)
+HISTORY_BATCH_SIZE = 500
+# Samples held in memory while the database cannot keep up; older ones are dropped
+HISTORY_MAX_PENDING = 50000
+HISTORY_TIER_RAW = "raw"
+HISTORY_TIER_MINUTE = "minute"
+HISTORY_TIER_HOUR = "hour"
+# Rows read and written at a time by the export service
+HISTORY_EXPORT_CHUNK_ROWS = 5000
+SERVICE_EXPORT = "export"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_PARQUET = "parquet"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_FORMAT = "format"
+ATTR_TIER = "tier"
+ATTR_FILENAME = "filename"
+
+# Long-term statistics import
+CONF_STATISTICS = "statistics"
+CONF_STATISTICS_ONLY = "statistics_only"
+
+# OpenMetrics scrape endpoint
+DATA_METRICS = f"{DOMAIN}_metrics"
+METRICS_URL = "/api/eyedro/metrics"
+
+# Live readings over the websocket API, batch interval limits in seconds
+DATA_LIVE = f"{DOMAIN}_live"
+WS_TYPE_SUBSCRIBE_LIVE = f"{DOMAIN}/subscribe_live"
+LIVE_MIN_INTERVAL = 0.1
+LIVE_MAX_INTERVAL = 60
+
+# Subnet discovery
+CONF_NETWORK = "network"
+CONF_DEVICES = "devices"
+DISCOVERY_CONCURRENCY = 64
+DISCOVERY_CONNECT_TIMEOUT = 0.5
+DISCOVERY_TIMEOUT = 2
+DISCOVERY_MAX_HOSTS = 1024
+
+# Rolling-window statistics, window lengths in minutes
+CONF_ROLLING_STATISTICS = "rolling_statistics"
+ROLLING_WINDOWS = (1, 5, 15)
+
+# Appliance on/off detection
+CONF_LOAD_EVENTS = "load_events"
+CONF_LOAD_THRESHOLD = "load_threshold"
+DEFAULT_LOAD_THRESHOLD = 200
+EVENT_LOAD_CHANGE = f"{DOMAIN}_load_change"
+LOAD_STATE_ON = "on"
+LOAD_STATE_OFF = "off"
+# Samples a new level must hold before it counts as a step
+LOAD_CONFIRM_SAMPLES = 2
+# Samples a steady level, and steps a signature, are averaged over
+LOAD_BASELINE_SAMPLES = 20
+# Distance from a signature, relative to its size, that still matches it
+LOAD_SIGNATURE_TOLERANCE = 0.15
+LOAD_MAX_SIGNATURES = 64
+
+# Peak demand
+CONF_DEMAND = "demand"
+CONF_DEMAND_WINDOW = "demand_window"
+CONF_DEMAND_MODE = "demand_mode"
+CONF_BILLING_DAY = "billing_day"
+DEFAULT_DEMAND_WINDOW = 15
+DEFAULT_DEMAND_MODE = "block"
+DEFAULT_BILLING_DAY = 1
+DEMAND_MODE_BLOCK = "block"
+DEMAND_MODE_ROLLING = "rolling"
+# Window lengths that divide an hour, so blocks line up with the clock
+DEMAND_WINDOWS = (5, 10, 15, 20, 30, 60)
+DATA_SITE_DEMAND = f"{DOMAIN}_site_demand"
+# Sent when members added energy to a site, formatted with the settings key
+SIGNAL_SITE_DEMAND_UPDATED = f"{DOMAIN}_site_demand_updated_{{}}"
+# Seconds between site sensor updates, however many members feed the site
+SITE_DEMAND_UPDATE_DELAY = 1
+
+# Time-of-use tariff, as rules in the options
+CONF_TARIFF = "tariff"
+# Local days laid out in a tariff's interval index at a time
+TARIFF_COMPILE_DAYS = 7
+
+# Start from the last known values instead of waiting for the device
+CONF_FAST_START = "fast_start"
+
+# Persistent per-entry state
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60
+
 # API endpoint path
 API_PATH_GETDATA = "/getdata"
 
@@ -16,6 +173,67 @@ SENSOR_TOTAL_POWER = "total_power"
 SENSOR_TOTAL_CURRENT = "total_current"
 SENSOR_AVERAGE_VOLTAGE = "average_voltage"
 SENSOR_AVERAGE_POWER_FACTOR = "average_power_factor"
+SENSOR_TOTAL_APPARENT_POWER = "total_apparent_power"
+SENSOR_TOTAL_REACTIVE_POWER = "total_reactive_power"
+SENSOR_CURRENT_IMBALANCE = "current_imbalance"
+SENSOR_VOLTAGE_IMBALANCE = "voltage_imbalance"
+SENSOR_TOTAL_ENERGY = "total_energy"
+SENSOR_CHANNEL_POWER = "channel_{}_power"
+SENSOR_CHANNEL_CURRENT = "channel_{}_current"
+SENSOR_CHANNEL_VOLTAGE = "channel_{}_voltage"
+SENSOR_CHANNEL_POWER_FACTOR = "channel_{}_power_factor"
+SENSOR_CHANNEL_APPARENT_POWER = "channel_{}_apparent_power"
+SENSOR_CHANNEL_REACTIVE_POWER = "channel_{}_reactive_power"
+SENSOR_CHANNEL_ENERGY = "channel_{}_energy"
+SENSOR_SUPPRESSED_WRITES = "suppressed_writes"
+SENSOR_CONNECTION_STATE = "connection_state"
+SENSOR_TIMING = "{}_time"
+SENSOR_REQUEST_FAILURES = "request_failures"
+SENSOR_ROLLING = "{}_{}min"
+SENSOR_DEMAND = "demand"
+SENSOR_PEAK_DEMAND_TODAY = "peak_demand_today"
+SENSOR_PEAK_DEMAND_PERIOD = "peak_demand_billing_period"
+SENSOR_ENERGY_COST = "energy_cost"
+SENSOR_PERIOD_ENERGY_COST = "energy_cost_{}"
+SENSOR_TARIFF_RATE = "tariff_rate"
+
+# Window aggregate attributes
+ATTR_WINDOW_MIN = "window_min"
+ATTR_WINDOW_MAX = "window_max"
+ATTR_WINDOW_SAMPLES = "window_samples"
+
+# Rolling-window statistics attributes
+ATTR_MIN = "min"
+ATTR_MAX = "max"
+ATTR_STANDARD_DEVIATION = "standard_deviation"
+
+# Peak demand attributes
+ATTR_WINDOW = "window"
+ATTR_MODE = "mode"
+ATTR_PEAK_TIME = "peak_time"
+ATTR_PERIOD_START = "period_start"
+
+# Time-of-use tariff attributes
+ATTR_PERIOD = "period"
+ATTR_NEXT_CHANGE = "next_change"
+
+# Set while sensors show values restored from the previous run
+ATTR_STALE = "stale"
+
+# Circuit breaker attributes
+ATTR_CONSECUTIVE_FAILURES = "consecutive_failures"
+ATTR_NEXT_PROBE = "next_probe"
+ATTR_TRIPS = "trips"
+
+# Poll timing attributes
+ATTR_COUNT = "count"
+ATTR_MEAN = "mean"
+ATTR_MEDIAN = "median"
+ATTR_SUCCESSES = "successes"
+ATTR_FAILURES = "failures"
+ATTR_TIMEOUTS = "timeouts"
+ATTR_COALESCED = "coalesced"
+ATTR_CACHE_HITS = "cache_hits"
 
 # Data array indices
 IDX_POWER_FACTOR = 0
@@ -1,12 +1,49 @@
 """DataUpdateCoordinator for Eyedro integration."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
 from datetime import timedelta
 import logging
+import math
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
 
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import EyedroAPI
-from .const import DEFAULT_SCAN_INTERVAL, DOMAIN
+from .adaptive import AdaptivePollingPolicy
+from .api import READING_FIELDS, EyedroAPI, EyedroReading
+from .breaker import CircuitBreaker
+from .buffer import EyedroRingBuffer
+from .const import (
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    ENERGY_MAX_GAP_INTERVALS,
+    EVENT_LOAD_CHANGE,
+    SAMPLE_BUFFER_MAX_SAMPLES,
+    SAMPLE_BUFFER_MIN_SAMPLES,
+    STORAGE_SAVE_DELAY,
+    SENSOR_TOTAL_POWER,
+    STORAGE_VERSION,
+)
+from .deadband import DeadbandPolicy
+from .demand import DemandTracker, EyedroSiteDemand
+from .energy import EnergyIntegrator
+from .history import EyedroHistory
+from .live import LiveFeed
+from .loads import LoadChangeDetector
+from .measurements import EyedroMeasurements, window_extremes
+from .rolling import RollingStatistics
+from .tariff import TariffMeter
+
+if TYPE_CHECKING:
+    from .hub import EyedroHub
+    from .long_term import EyedroLongTermStatistics
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,21 +56,382 @@ class EyedroDataUpdateCoordinator(DataUpdateCoordinator):
         hass: HomeAssistant,
         api: EyedroAPI,
         update_interval: timedelta | None = None,
+        hub: EyedroHub | None = None,
+        sample_interval: float = 0.0,
+        entry_id: str | None = None,
     ) -> None:
-        """Initialize the coordinator."""
+        """Initialize the coordinator.
+
+        When a hub is given the coordinator has no timer of its own and is
+        refreshed by the hub instead. A non-zero ``sample_interval`` enables
+        high-rate sampling, in which case each refresh publishes aggregates
+        of the samples collected since the previous one. State such as the
+        energy counters is persisted per ``entry_id`` when one is given.
+        """
+        poll_interval = update_interval or DEFAULT_SCAN_INTERVAL
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=update_interval or DEFAULT_SCAN_INTERVAL,
+            update_interval=None if hub else poll_interval,
         )
         self.api = api
+        self.hub = hub
+        self.poll_interval = poll_interval
+        self.sample_interval = sample_interval
+        self._buffer: EyedroRingBuffer | None = None
+        self._published_seq = 0
+        self._energy_channels: list[EnergyIntegrator] = []
+        self._energy_total = EnergyIntegrator()
+        # Sensor publishing policy and how many writes it has saved, by sensor
+        self.deadband = DeadbandPolicy.from_options({})
+        self.suppressed_writes: Counter[str] = Counter()
+        # Poll interval policy and the total power it last compared against
+        self.adaptive = AdaptivePollingPolicy.from_options({})
+        self._adaptive_power: int | None = None
+        # Shared by refreshes and the sampler so a dead device is left alone
+        self.breaker = CircuitBreaker()
+        # Local time-series store of every raw sample, when enabled
+        self.history: EyedroHistory | None = None
+        # Hourly external statistics, when enabled
+        self.statistics: EyedroLongTermStatistics | None = None
+        # Rolling 1/5/15-minute windows over every raw sample, when enabled
+        self.rolling: RollingStatistics | None = None
+        # Appliance on/off detection over every raw sample, when enabled
+        self.load_events: LoadChangeDetector | None = None
+        # Peak demand of this device and of its site, when enabled
+        self.demand: DemandTracker | None = None
+        self.site_demand: EyedroSiteDemand | None = None
+        # Cost under a time-of-use tariff, when one is configured
+        self.tariff: TariffMeter | None = None
+        # Previous (monotonic time, total power) for demand and cost
+        self._wall_clock_sample: tuple[float, int] | None = None
+        # Websocket subscribers to every raw reading
+        self.live: LiveFeed | None = None
+        # Persisted so the next run can start from it
+        self._last_reading: EyedroReading | None = None
+        self._store: Store[dict[str, Any]] | None = None
+        if entry_id is not None:
+            self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+    async def async_load_state(self) -> None:
+        """Restore persisted state from a previous run."""
+        if self._store is None or (stored := await self._store.async_load()) is None:
+            return
+        if energy := stored.get("energy"):
+            self._energy_channels = [
+                EnergyIntegrator(kwh) for kwh in energy.get("channels", [])
+            ]
+            self._energy_total = EnergyIntegrator(energy.get("total", 0.0))
+        if self.load_events is not None and (signatures := stored.get("signatures")):
+            self.load_events.restore(signatures)
+        if self.demand is not None and (demand := stored.get("demand")):
+            self.demand.restore(demand)
+        if self.tariff is not None and (tariff := stored.get("tariff")):
+            self.tariff.restore(tariff)
+        if reading := stored.get("reading"):
+            self._last_reading = EyedroReading(
+                time.monotonic(), *(tuple(reading[field]) for field in READING_FIELDS)
+            )
+
+    @callback
+    def async_restore_data(self) -> bool:
+        """Publish the last reading of the previous run, marked stale.
+
+        Returns False when there is nothing to restore. The restored data is
+        replaced by the next successful refresh; it is never integrated into
+        energy or recorded anywhere.
+        """
+        if (reading := self._last_reading) is None:
+            return False
+        self.data = {
+            "reading": reading,
+            "measurements": EyedroMeasurements(reading),
+            "energy": self._energy_data(),
+            "stale": True,
+        }
+        return True
+
+    async def async_save_state(self) -> None:
+        """Write persisted state immediately."""
+        if self._store is not None:
+            await self._store.async_save(self._state_to_save())
+
+    @callback
+    def _state_to_save(self) -> dict[str, Any]:
+        """Return the state to persist."""
+        state: dict[str, Any] = {
+            "energy": {
+                "channels": [
+                    integrator.energy_kwh for integrator in self._energy_channels
+                ],
+                "total": self._energy_total.energy_kwh,
+            }
+        }
+        if self.load_events is not None:
+            state["signatures"] = self.load_events.as_list()
+        if self.demand is not None:
+            state["demand"] = self.demand.as_dict()
+        if self.tariff is not None:
+            state["tariff"] = self.tariff.as_dict()
+        if (reading := self._last_reading) is not None:
+            state["reading"] = {
+                field: list(values) for field, values in zip(READING_FIELDS, reading.fields)
+            }
+        return state
+
+    def set_poll_interval(self, poll_interval: timedelta) -> None:
+        """Change how often the device is polled.
+
+        With adaptive polling enabled this is only the starting point, clamped
+        to the adaptive bounds.
+        """
+        if self.adaptive.enabled:
+            poll_interval = timedelta(
+                seconds=self.adaptive.clamp(poll_interval.total_seconds())
+            )
+        # Resize the sample buffer for the new publish window on the next sample
+        self._buffer = None
+        self._apply_poll_interval(poll_interval)
+
+    def _apply_poll_interval(self, poll_interval: timedelta) -> None:
+        """Switch to a new poll interval on the coordinator's timer or the hub."""
+        self.poll_interval = poll_interval
+        if self.hub is None:
+            self.update_interval = poll_interval
+        else:
+            self.hub.async_reschedule(self)
+
+    @callback
+    def async_start_sampling(self, entry: ConfigEntry) -> None:
+        """Start the high-rate sampler for the lifetime of the entry."""
+        if not self.sample_interval:
+            return
+        entry.async_create_background_task(
+            self.hass,
+            self._async_sample_loop(),
+            f"eyedro sampler {self.api._host}",
+        )
+
+    async def _async_sample_loop(self) -> None:
+        """Sample the device on a fixed cadence until cancelled."""
+        loop = self.hass.loop
+        next_sample = loop.time()
+        while True:
+            try:
+                # Every sample is a fresh reading, never a cached one
+                reading = await self._async_fetch(max_age=0)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug("Sample from %s failed: %s", self.api._host, err)
+            else:
+                self._record_sample(reading)
+
+            next_sample += self.sample_interval
+            now = loop.time()
+            if next_sample < now:
+                # Skip the slots we overran rather than bursting to catch up
+                missed = math.floor((now - next_sample) / self.sample_interval) + 1
+                next_sample += missed * self.sample_interval
+            await asyncio.sleep(next_sample - now)
+
+    async def _async_fetch(self, max_age: float | None = None) -> EyedroReading:
+        """Fetch a reading through the circuit breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker is refusing requests
+        """
+        breaker = self.breaker
+        if not breaker.allow_request(time.monotonic()):
+            raise CircuitOpenError(
+                f"Device {self.api._host} is unreachable, next attempt in "
+                f"{max(breaker.retry_at - time.monotonic(), 0):.0f}s"
+            )
+
+        try:
+            # Once a request failed, don't let the next ones hold a slot for long
+            reading = await self.api.async_get_data(
+                probe=breaker.failures > 0, max_age=max_age
+            )
+        except (aiohttp.ClientError, TimeoutError) as err:
+            if breaker.record_failure(time.monotonic()):
+                _LOGGER.warning(
+                    "Eyedro device %s failed %s times in a row, backing off: %s",
+                    self.api._host,
+                    breaker.failures,
+                    err,
+                )
+            raise
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            # Bad payloads come from a device that is reachable after all
+            breaker.record_success()
+            raise
+
+        if breaker.record_success():
+            _LOGGER.info("Eyedro device %s is reachable again", self.api._host)
+        return reading
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify every entity, timing the fan-out."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.api.stats.fanout.observe(time.perf_counter() - start)
+
+    def _max_gap(self) -> float:
+        """Return the longest interval between readings that is not an outage."""
+        cadence = self.sample_interval or self.poll_interval.total_seconds()
+        return ENERGY_MAX_GAP_INTERVALS * cadence
+
+    def _integrate_energy(self, reading: EyedroReading) -> None:
+        """Add the interval since the previous reading to the energy counters."""
+        powers = reading.power
+        while len(self._energy_channels) < len(powers):
+            self._energy_channels.append(EnergyIntegrator())
+
+        max_gap = self._max_gap()
+        timestamp = reading.timestamp
+        for integrator, power in zip(self._energy_channels, powers):
+            integrator.add(timestamp, power, max_gap)
+        self._energy_total.add(timestamp, sum(powers), max_gap)
+
+        if self._store is not None:
+            self._store.async_delay_save(self._state_to_save, STORAGE_SAVE_DELAY)
+
+    def _record_reading(self, reading: EyedroReading) -> None:
+        """Feed one raw reading to everything that needs every sample."""
+        if reading is self._last_reading:
+            # Shared with a refresh or sample that already recorded it
+            return
+        self._last_reading = reading
+        if self.live is not None:
+            self.live.add(reading)
+        self._integrate_energy(reading)
+        if self.rolling is not None:
+            self.rolling.add(reading)
+        if self.demand is not None or self.tariff is not None:
+            self._record_wall_clock_energy(reading)
+        if self.load_events is not None:
+            for change in self.load_events.add(reading, self._max_gap()):
+                self.hass.bus.async_fire(
+                    EVENT_LOAD_CHANGE, {"host": self.api._host, **change}
+                )
+        if self.history is not None:
+            self.history.append(reading)
+        if self.statistics is not None:
+            self.statistics.add(
+                reading,
+                self._energy_total.energy_kwh,
+                [integrator.energy_kwh for integrator in self._energy_channels],
+            )
+
+    def _record_wall_clock_energy(self, reading: EyedroReading) -> None:
+        """Add the energy since the previous reading to demand windows and cost."""
+        power = sum(reading.power)
+        timestamp = reading.timestamp
+        previous, self._wall_clock_sample = self._wall_clock_sample, (timestamp, power)
+        if previous is None or not 0 < timestamp - previous[0] <= self._max_gap():
+            return
+        elapsed = timestamp - previous[0]
+        # Demand windows and prices follow the wall clock, durations the monotonic one
+        end = time.time() - (time.monotonic() - timestamp)
+        watt_seconds = (previous[1] + power) / 2 * elapsed
+        if self.tariff is not None:
+            self.tariff.add(end - elapsed, end, watt_seconds)
+        if self.demand is None:
+            return
+        self.demand.add(end - elapsed, end, watt_seconds)
+        if self.site_demand is not None:
+            self.site_demand.tracker.add(end - elapsed, end, watt_seconds)
+            self.site_demand.async_updated()
+
+    def _energy_data(self) -> dict[str, Any]:
+        """Return the current energy totals in kWh, rounded for the sensors."""
+        return {
+            "channels": [
+                round(integrator.energy_kwh, 4) for integrator in self._energy_channels
+            ],
+            "total": round(self._energy_total.energy_kwh, 4),
+        }
+
+    def _record_sample(self, reading: EyedroReading) -> None:
+        """Append one reading to the ring buffer."""
+        if reading is self._last_reading:
+            return
+        self._record_reading(reading)
+
+        if self._buffer is None or self._buffer.channel_count != reading.channel_count:
+            # Hold two of the longest publish windows, within fixed bounds
+            window = self.poll_interval.total_seconds()
+            if self.adaptive.enabled:
+                window = max(window, self.adaptive.max_interval)
+            per_window = math.ceil(window / self.sample_interval)
+            capacity = min(
+                max(2 * per_window, SAMPLE_BUFFER_MIN_SAMPLES),
+                SAMPLE_BUFFER_MAX_SAMPLES,
+            )
+            self._buffer = EyedroRingBuffer(reading.channel_count, capacity)
+            self._published_seq = 0
+        self._buffer.append(reading)
+
+    def _window_data(self) -> dict[str, Any]:
+        """Aggregate the samples collected since the previous refresh."""
+        buffer = self._buffer
+        since = self._published_seq
+        self._published_seq = buffer.total
+        reading = buffer.mean_reading(since)
+        stats = {field: buffer.summed_stats(field, since) for field in READING_FIELDS}
+        return {
+            "reading": reading,
+            "window": window_extremes(stats, reading.channel_count),
+            "samples": buffer.count_since(since),
+        }
 
     async def _async_update_data(self) -> dict:
         """Fetch data from Eyedro API."""
-        try:
-            data = await self.api.async_get_data()
-            return data
-        except Exception as err:
-            raise UpdateFailed(f"Error communicating with Eyedro API: {err}") from err
+        if self._buffer is not None and self._buffer.count_since(self._published_seq):
+            data = self._window_data()
+        else:
+            try:
+                reading = await self._async_fetch()
+            except Exception as err:
+                raise UpdateFailed(f"Error communicating with Eyedro API: {err}") from err
+            self._record_reading(reading)
+            data = {"reading": reading}
+
+        # Everything the sensors show is derived here, once per refresh
+        data["measurements"] = EyedroMeasurements(data["reading"])
+        data["energy"] = self._energy_data()
+        if self.rolling is not None:
+            data["rolling"] = self.rolling.snapshot()
+        # Only after energy was integrated over the interval that just elapsed
+        if self.adaptive.enabled:
+            self._adapt_poll_interval(data)
+        return data
+
+    def _adapt_poll_interval(self, data: dict[str, Any]) -> None:
+        """Shorten or stretch the poll interval from the change in total power."""
+        power = sum(data["reading"].power)
+        change = 0.0 if self._adaptive_power is None else abs(power - self._adaptive_power)
+        self._adaptive_power = power
+        # A busy sample window counts as a change even if its mean did not move
+        if (extremes := data.get("window", {}).get(SENSOR_TOTAL_POWER)) is not None:
+            low, high = extremes
+            change = max(change, (high - low) * 1000)
+
+        current = self.poll_interval.total_seconds()
+        interval = self.adaptive.next_interval(current, change)
+        if interval != current:
+            _LOGGER.debug(
+                "Polling %s every %ss after a %.0f W change",
+                self.api._host,
+                interval,
+                change,
+            )
+            self._apply_poll_interval(timedelta(seconds=interval))
+
 
+class CircuitOpenError(Exception):
+    """Error to indicate the device is not polled while its breaker is open."""
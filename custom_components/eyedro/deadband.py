@@ -0,0 +1,75 @@
+"""Change-threshold publishing policy for Eyedro sensors."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .const import (
+    CONF_DEADBAND_CURRENT,
+    CONF_DEADBAND_POWER,
+    CONF_DEADBAND_POWER_FACTOR,
+    CONF_DEADBAND_RELATIVE,
+    CONF_DEADBAND_VOLTAGE,
+    CONF_MAX_SILENCE,
+    DEFAULT_DEADBAND,
+    DEFAULT_MAX_SILENCE,
+    SENSOR_AVERAGE_POWER_FACTOR,
+    SENSOR_AVERAGE_VOLTAGE,
+    SENSOR_TOTAL_CURRENT,
+    SENSOR_TOTAL_POWER,
+)
+
+# Option holding the absolute deadband for each sensor, in the sensor's unit
+DEADBAND_OPTIONS = {
+    SENSOR_TOTAL_POWER: CONF_DEADBAND_POWER,
+    SENSOR_TOTAL_CURRENT: CONF_DEADBAND_CURRENT,
+    SENSOR_AVERAGE_VOLTAGE: CONF_DEADBAND_VOLTAGE,
+    SENSOR_AVERAGE_POWER_FACTOR: CONF_DEADBAND_POWER_FACTOR,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class DeadbandPolicy:
+    """Decide whether a new sensor value is worth writing.
+
+    A value is published when it differs from the last published one by
+    more than the larger of the absolute deadband and ``relative`` times the
+    last value, or when nothing has been published for ``max_silence``
+    seconds. Sensors with neither deadband set always publish.
+
+    Sensors showing part of a quantity, like one channel's share of the
+    total power, pass a ``scale`` that shrinks the absolute deadband to
+    match.
+    """
+
+    absolute: Mapping[str, float]
+    relative: float
+    max_silence: float
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> DeadbandPolicy:
+        """Build the policy from config entry options."""
+        return cls(
+            absolute={
+                key: options.get(option, DEFAULT_DEADBAND)
+                for key, option in DEADBAND_OPTIONS.items()
+            },
+            relative=options.get(CONF_DEADBAND_RELATIVE, DEFAULT_DEADBAND) / 100,
+            max_silence=options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+        )
+
+    def applies_to(self, key: str) -> bool:
+        """Return True if values of this sensor are filtered at all."""
+        return key in self.absolute and (self.absolute[key] > 0 or self.relative > 0)
+
+    def should_publish(
+        self, key: str, last: float, new: float, silent_for: float, scale: float = 1.0
+    ) -> bool:
+        """Return True if ``new`` should be written after ``last``."""
+        if not self.applies_to(key):
+            return True
+        if self.max_silence and silent_for >= self.max_silence:
+            return True
+        threshold = max(self.absolute[key] * scale, self.relative * abs(last))
+        return abs(new - last) > threshold
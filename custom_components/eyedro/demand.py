@@ -0,0 +1,420 @@
+"""Peak demand tracking for Eyedro devices and the whole site."""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from datetime import date, datetime
+import heapq
+import math
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_BILLING_DAY,
+    CONF_DEMAND_MODE,
+    CONF_DEMAND_WINDOW,
+    DATA_SITE_DEMAND,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_DEMAND_MODE,
+    DEFAULT_DEMAND_WINDOW,
+    DEMAND_MODE_ROLLING,
+    DOMAIN,
+    SIGNAL_SITE_DEMAND_UPDATED,
+    SITE_DEMAND_UPDATE_DELAY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DemandSettings:
+    """How demand is measured: window length, block or rolling, billing day."""
+
+    window: int
+    mode: str
+    billing_day: int
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> DemandSettings:
+        """Build the settings from config entry options."""
+        return cls(
+            window=options.get(CONF_DEMAND_WINDOW, DEFAULT_DEMAND_WINDOW),
+            mode=options.get(CONF_DEMAND_MODE, DEFAULT_DEMAND_MODE),
+            billing_day=options.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY),
+        )
+
+    @property
+    def key(self) -> str:
+        """Return a string identifying these settings."""
+        return f"{self.window}min_{self.mode}_day{self.billing_day}"
+
+
+def _local_date(timestamp: float) -> date:
+    """Return the local date of a Unix timestamp."""
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).date()
+
+
+def _to_datetime(timestamp: float | None) -> datetime | None:
+    """Return a Unix timestamp as an aware datetime."""
+    return None if timestamp is None else dt_util.utc_from_timestamp(timestamp)
+
+
+class DemandTracker:
+    """Average power over a demand window, with today's and the billing period's peak.
+
+    Fed consecutive pieces of energy with their wall-clock start and end. In
+    block mode windows are aligned to the local clock (a 15 minute window
+    runs :00-:15, :15-:30, ...) and a piece crossing a boundary is split in
+    proportion to time; a block's demand is its energy over the window
+    length and counts toward the peaks once the block is over. In rolling
+    mode the window ends at the latest piece and is checked against the
+    peaks after every piece; every piece straddling the start of the
+    window counts only for its part inside it, also when the pieces of
+    several devices of a site interleave. A piece costs O(1) in block mode
+    and O(log n) in the pieces of the window in rolling mode.
+
+    Peaks are attributed to the day and billing period the window started
+    in, and timestamped with the end of the window. Gaps in the data are
+    not filled in, so they only ever lower a window's demand.
+    """
+
+    def __init__(self, settings: DemandSettings) -> None:
+        """Start empty."""
+        self.settings = settings
+        self._window = settings.window * 60
+        self._rolling = settings.mode == DEMAND_MODE_ROLLING
+        self._since: float | None = None
+        self._last_end: float | None = None
+        # Block mode: current block start and energy, and the previous block
+        self._block_start: float | None = None
+        self._block_energy = 0.0
+        self._previous: tuple[float, float] | None = None
+        # Rolling mode: the start of the window, pieces that start after it
+        # by start, and pieces straddling it by end, as (start or end, other
+        # end, watts, watt-seconds)
+        self._cutoff: float | None = None
+        self._waiting: list[tuple[float, float, float, float]] = []
+        self._straddling: list[tuple[float, float, float, float]] = []
+        # Energy of the pieces not wholly before the cutoff, the part of the
+        # straddling ones that is, and the power at which that part grows
+        self._energy = 0.0
+        self._expired = 0.0
+        self._expiring_power = 0.0
+        # (watts, window end) and the day and billing period they belong to
+        self.peak_today: tuple[float, float] | None = None
+        self.peak_period: tuple[float, float] | None = None
+        self._day: date | None = None
+        self._period: date | None = None
+
+    @property
+    def demand(self) -> float | None:
+        """Return the average power in W over the current window so far."""
+        if self._last_end is None:
+            return None
+        if self._rolling:
+            covered = min(self._window, self._last_end - self._since)
+            energy = self._energy - self._expired
+        else:
+            covered = self._last_end - max(self._block_start, self._since)
+            energy = self._block_energy
+        return energy / covered if covered > 0 else None
+
+    @property
+    def period_start(self) -> date | None:
+        """Return the first day of the current billing period."""
+        return self._period
+
+    @property
+    def peak_today_time(self) -> datetime | None:
+        """Return when the window with today's peak ended."""
+        return _to_datetime(self.peak_today and self.peak_today[1])
+
+    @property
+    def peak_period_time(self) -> datetime | None:
+        """Return when the window with the billing period's peak ended."""
+        return _to_datetime(self.peak_period and self.peak_period[1])
+
+    @callback
+    def add(self, start: float, end: float, watt_seconds: float) -> None:
+        """Include the energy used between two Unix timestamps."""
+        if end <= start:
+            return
+        if self._since is None:
+            self._since = start
+        self._last_end = max(end, self._last_end or end)
+        self._roll_over(end)
+
+        if self._rolling:
+            cutoff = self._last_end - self._window
+            self._advance(cutoff)
+            self._add_piece(start, end, watt_seconds)
+            # Only a full window is a demand interval
+            if self._last_end - self._since >= self._window:
+                self._record_peak(self.demand, cutoff, self._last_end)
+            return
+
+        power = watt_seconds / (end - start)
+        while start < end:
+            block_start = self._block_start
+            if block_start is None or not 0 <= start - block_start < self._window:
+                block_start = self._block_of(start)
+            piece_end = min(end, block_start + self._window)
+            self._add_to_block(block_start, power * (piece_end - start))
+            start = piece_end
+
+    def _add_piece(self, start: float, end: float, watt_seconds: float) -> None:
+        """Add a piece to the rolling window, minus any part already before it."""
+        cutoff = self._cutoff
+        if end <= cutoff:
+            # A late piece of a slower device of the site, already out of the window
+            return
+        power = watt_seconds / (end - start)
+        self._energy += watt_seconds
+        if start < cutoff:
+            self._expired += power * (cutoff - start)
+            self._expiring_power += power
+            heapq.heappush(self._straddling, (end, start, power, watt_seconds))
+        else:
+            heapq.heappush(self._waiting, (start, end, power, watt_seconds))
+
+    def _advance(self, cutoff: float) -> None:
+        """Move the start of the rolling window, expiring energy piece by piece."""
+        if self._cutoff is None:
+            self._cutoff = cutoff
+            return
+        if cutoff <= self._cutoff:
+            return
+        now = self._cutoff
+        waiting, straddling = self._waiting, self._straddling
+        while True:
+            next_start = waiting[0][0] if waiting else math.inf
+            next_end = straddling[0][0] if straddling else math.inf
+            event = min(next_start, next_end)
+            if event > cutoff:
+                break
+            self._expired += self._expiring_power * (event - now)
+            now = event
+            if next_start <= next_end:
+                start, end, power, watt_seconds = heapq.heappop(waiting)
+                self._expiring_power += power
+                heapq.heappush(straddling, (end, start, power, watt_seconds))
+            else:
+                _, _, power, watt_seconds = heapq.heappop(straddling)
+                # Wholly before the window now
+                self._expiring_power -= power
+                self._expired -= watt_seconds
+                self._energy -= watt_seconds
+        if straddling:
+            self._expired += self._expiring_power * (cutoff - now)
+        else:
+            # Nothing is partly expired, so drop any rounding error
+            self._expired = self._expiring_power = 0.0
+        if not waiting and not straddling:
+            self._energy = 0.0
+        self._cutoff = cutoff
+
+    def _block_of(self, timestamp: float) -> float:
+        """Return the start of the local-clock aligned block containing a timestamp."""
+        local = dt_util.as_local(dt_util.utc_from_timestamp(timestamp))
+        offset = local.utcoffset().total_seconds()
+        return math.floor((timestamp + offset) / self._window) * self._window - offset
+
+    def _add_to_block(self, block_start: float, watt_seconds: float) -> None:
+        """Add energy to a block, closing the current one when a later one starts."""
+        if block_start == self._block_start:
+            self._block_energy += watt_seconds
+        elif self._block_start is None or block_start > self._block_start:
+            if self._block_start is not None:
+                self._close_block(self._block_start, self._block_energy)
+                self._previous = (self._block_start, self._block_energy)
+            self._block_start = block_start
+            self._block_energy = watt_seconds
+        elif self._previous is not None and block_start == self._previous[0]:
+            # A late piece of the previous block, from a slower device of the site
+            self._previous = (block_start, self._previous[1] + watt_seconds)
+            self._close_block(*self._previous)
+
+    def _close_block(self, block_start: float, watt_seconds: float) -> None:
+        """Check a finished block against the peaks."""
+        self._record_peak(watt_seconds / self._window, block_start, block_start + self._window)
+
+    def _roll_over(self, timestamp: float) -> None:
+        """Start a new day or billing period once the clock reaches it."""
+        day = _local_date(timestamp)
+        if self._day is None or day > self._day:
+            self._day = day
+            self.peak_today = None
+        period = _period_start(day, self.settings.billing_day)
+        if self._period is None or period > self._period:
+            self._period = period
+            self.peak_period = None
+
+    def _record_peak(self, watts: float | None, start: float, end: float) -> None:
+        """Update the peaks with the demand of a window."""
+        if watts is None:
+            return
+        day = _local_date(start)
+        if day == self._day and (self.peak_today is None or watts > self.peak_today[0]):
+            self.peak_today = (watts, end)
+        if _period_start(day, self.settings.billing_day) == self._period and (
+            self.peak_period is None or watts > self.peak_period[0]
+        ):
+            self.peak_period = (watts, end)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state worth keeping across restarts."""
+        return {
+            "settings": self.settings.key,
+            "day": self._day and self._day.isoformat(),
+            "period": self._period and self._period.isoformat(),
+            "peak_today": self.peak_today,
+            "peak_period": self.peak_period,
+            "block": None
+            if self._block_start is None
+            else [self._block_start, self._block_energy],
+        }
+
+    def restore(self, stored: Mapping[str, Any]) -> None:
+        """Load state saved by as_dict, unless it was kept under other settings."""
+        if stored.get("settings") != self.settings.key:
+            return
+        if stored.get("day"):
+            self._day = date.fromisoformat(stored["day"])
+            self.peak_today = stored.get("peak_today") and tuple(stored["peak_today"])
+        if stored.get("period"):
+            self._period = date.fromisoformat(stored["period"])
+            self.peak_period = stored.get("peak_period") and tuple(stored["peak_period"])
+        if block := stored.get("block"):
+            # Resume the block that was in progress; a stale one closes on the next piece
+            self._block_start, self._block_energy = block
+            self._since = self._block_start
+
+
+def _period_start(day: date, billing_day: int) -> date:
+    """Return the first day of the billing period a day falls in."""
+    if day.day >= billing_day:
+        return day.replace(day=billing_day)
+    if day.month == 1:
+        return date(day.year - 1, 12, billing_day)
+    return date(day.year, day.month - 1, billing_day)
+
+
+class EyedroSiteDemand:
+    """Demand of every device sharing the same settings, summed.
+
+    Each device adds its own energy pieces to the shared tracker, so block
+    energies add up exactly. The site sensors are created by the sensor
+    platform of one member, the owner; when the owner unloads, another
+    member's platform creates them again. They update on a dispatcher
+    signal sent when any member adds energy, at most every
+    SITE_DEMAND_UPDATE_DELAY seconds.
+    """
+
+    def __init__(self, hass: HomeAssistant, settings: DemandSettings) -> None:
+        """Initialize the site for one set of demand settings."""
+        self.hass = hass
+        self.tracker = DemandTracker(settings)
+        self.members: set[str] = set()
+        self.signal = SIGNAL_SITE_DEMAND_UPDATED.format(settings.key)
+        # Entry whose sensor platform created the site sensors
+        self.owner: str | None = None
+        # Callbacks creating the site sensors, by entry with a loaded platform
+        self._sensor_platforms: dict[str, Callable[[], None]] = {}
+        self._unsub_update: CALLBACK_TYPE | None = None
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.site_demand_{settings.key}"
+        )
+
+    async def async_load(self) -> None:
+        """Restore the site's peaks."""
+        if (stored := await self._store.async_load()) is not None:
+            self.tracker.restore(stored)
+
+    @callback
+    def async_add_sensor_platform(
+        self, entry_id: str, add_sensors: Callable[[], None]
+    ) -> None:
+        """Offer a member's sensor platform to create the site sensors."""
+        self._sensor_platforms[entry_id] = add_sensors
+        if self.owner is None:
+            self._async_hand_over()
+
+    @callback
+    def async_remove_sensor_platform(self, entry_id: str) -> None:
+        """Forget a member's platform, handing the sensors over if it owned them."""
+        self._sensor_platforms.pop(entry_id, None)
+        if self.owner == entry_id:
+            self.owner = None
+            self._async_hand_over()
+
+    @callback
+    def _async_hand_over(self) -> None:
+        """Have the first remaining member's platform create the site sensors."""
+        for entry_id, add_sensors in self._sensor_platforms.items():
+            self.owner = entry_id
+            add_sensors()
+            return
+
+    @callback
+    def async_updated(self) -> None:
+        """Save the site's peaks soon and update its sensors."""
+        self._store.async_delay_save(self.tracker.as_dict, STORAGE_SAVE_DELAY)
+        if self._unsub_update is None:
+            self._unsub_update = async_call_later(
+                self.hass, SITE_DEMAND_UPDATE_DELAY, self._async_send_update
+            )
+
+    @callback
+    def _async_send_update(self, _now: datetime) -> None:
+        """Tell the site sensors to write their state."""
+        self._unsub_update = None
+        async_dispatcher_send(self.hass, self.signal)
+
+    async def async_save(self) -> None:
+        """Save the site's peaks now."""
+        await self._store.async_save(self.tracker.as_dict())
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel a pending sensor update."""
+        if self._unsub_update is not None:
+            self._unsub_update()
+            self._unsub_update = None
+
+
+async def async_join_site_demand(
+    hass: HomeAssistant, entry_id: str, settings: DemandSettings
+) -> EyedroSiteDemand:
+    """Return the site for some demand settings, creating it on first use."""
+    sites: dict[DemandSettings, EyedroSiteDemand] = hass.data.setdefault(
+        DATA_SITE_DEMAND, {}
+    )
+    if (site := sites.get(settings)) is None:
+        site = EyedroSiteDemand(hass, settings)
+        await site.async_load()
+        # Another entry may have created it while the store loaded
+        site = sites.setdefault(settings, site)
+    site.members.add(entry_id)
+    return site
+
+
+async def async_leave_site_demand(
+    hass: HomeAssistant, entry_id: str, settings: DemandSettings
+) -> None:
+    """Remove a device from its site, saving and dropping the site when empty."""
+    sites: dict[DemandSettings, EyedroSiteDemand] = hass.data.get(DATA_SITE_DEMAND, {})
+    if (site := sites.get(settings)) is None:
+        return
+    site.members.discard(entry_id)
+    site.async_remove_sensor_platform(entry_id)
+    await site.async_save()
+    if not site.members:
+        site.async_shutdown()
+        del sites[settings]
+        if not sites:
+            hass.data.pop(DATA_SITE_DEMAND)
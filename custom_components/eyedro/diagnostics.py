@@ -0,0 +1,63 @@
+"""Diagnostics support for the Eyedro integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import EyedroDataUpdateCoordinator
+
+TO_REDACT = {CONF_HOST, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: EyedroDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    breaker = coordinator.breaker
+    data = coordinator.data or {}
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "last_exception": repr(coordinator.last_exception),
+            "poll_interval": coordinator.poll_interval.total_seconds(),
+            "sample_interval": coordinator.sample_interval,
+            "hub_mode": coordinator.hub is not None,
+            "adaptive_polling": coordinator.adaptive.enabled,
+            "history": coordinator.history is not None,
+            "statistics": coordinator.statistics is not None,
+            "rolling_statistics": coordinator.rolling is not None,
+            "load_events": coordinator.load_events is not None,
+            "demand": coordinator.demand is not None,
+            "live_subscribers": coordinator.live.subscriber_count if coordinator.live else 0,
+            "suppressed_writes": dict(coordinator.suppressed_writes),
+        },
+        "breaker": {
+            "state": breaker.state,
+            "failures": breaker.failures,
+            "trips": breaker.trips,
+        },
+        "load_signatures": (
+            coordinator.load_events.as_list() if coordinator.load_events else None
+        ),
+        "demand": coordinator.demand.as_dict() if coordinator.demand else None,
+        "site_demand": (
+            coordinator.site_demand.tracker.as_dict() if coordinator.site_demand else None
+        ),
+        # Timings are in seconds; buckets are cumulative counts per upper bound
+        "poll_stats": coordinator.api.stats.as_dict(),
+        "data": {
+            "reading": repr(data.get("reading")),
+            "samples": data.get("samples"),
+            "stale": data.get("stale", False),
+            "energy": data.get("energy"),
+            "rolling": data.get("rolling"),
+        },
+    }
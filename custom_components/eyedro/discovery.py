@@ -0,0 +1,100 @@
+"""Subnet scan for Eyedro devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Collection
+from dataclasses import dataclass
+import ipaddress
+import logging
+import time
+
+import aiohttp
+
+from .api import parse_getdata
+from .const import (
+    API_PATH_GETDATA,
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class DiscoveredDevice:
+    """An Eyedro device that answered a scan."""
+
+    host: str
+    port: int
+    channel_count: int
+
+
+async def _async_probe(
+    session: aiohttp.ClientSession, host: str, port: int, timeout: aiohttp.ClientTimeout
+) -> DiscoveredDevice | None:
+    """Return the device at host if it serves a valid /getdata response."""
+    try:
+        async with session.get(
+            f"http://{host}:{port}{API_PATH_GETDATA}", timeout=timeout
+        ) as response:
+            if response.status != 200:
+                return None
+            body = await response.read()
+        reading = parse_getdata(body, time.monotonic())
+    except (aiohttp.ClientError, TimeoutError, ValueError):
+        return None
+    return DiscoveredDevice(host, port, reading.channel_count)
+
+
+async def async_scan(
+    session: aiohttp.ClientSession,
+    network: ipaddress.IPv4Network,
+    port: int,
+    skip: Collection[str] = (),
+    progress: Callable[[int, int], None] | None = None,
+) -> AsyncIterator[DiscoveredDevice]:
+    """Probe every host of a network, yielding devices as they answer.
+
+    At most DISCOVERY_CONCURRENCY probes are in flight. Addresses with
+    nothing listening fail within DISCOVERY_CONNECT_TIMEOUT, so a /24 takes
+    a few seconds. Hosts in ``skip`` are not probed. ``progress`` is called
+    with (probed, total) after every probe.
+    """
+    hosts = [str(address) for address in network.hosts() if str(address) not in skip]
+    timeout = aiohttp.ClientTimeout(
+        total=DISCOVERY_TIMEOUT, sock_connect=DISCOVERY_CONNECT_TIMEOUT
+    )
+    queue = iter(hosts)
+    found: asyncio.Queue[DiscoveredDevice | None] = asyncio.Queue()
+    probed = 0
+
+    async def _async_worker() -> None:
+        """Probe hosts off the shared iterator until it runs out."""
+        nonlocal probed
+        for host in queue:
+            if (device := await _async_probe(session, host, port, timeout)) is not None:
+                found.put_nowait(device)
+            probed += 1
+            if progress is not None:
+                progress(probed, len(hosts))
+
+    async def _async_run_workers() -> None:
+        """Run the workers and mark the end of the results."""
+        try:
+            await asyncio.gather(
+                *(_async_worker() for _ in range(min(DISCOVERY_CONCURRENCY, len(hosts))))
+            )
+        finally:
+            found.put_nowait(None)
+
+    runner = asyncio.create_task(_async_run_workers())
+    try:
+        while (device := await found.get()) is not None:
+            _LOGGER.debug("Found Eyedro device at %s:%s", device.host, device.port)
+            yield device
+        await runner
+    finally:
+        # The caller stopped early or was cancelled
+        if not runner.done():
+            runner.cancel()
@@ -0,0 +1,31 @@
+"""Incremental power-to-energy integration for Eyedro readings."""
+from __future__ import annotations
+
+
+class EnergyIntegrator:
+    """Accumulate energy from power samples with the trapezoidal rule.
+
+    Timestamps must come from a monotonic clock. Intervals longer than
+    ``max_gap`` are skipped instead of being bridged, so an outage never
+    turns into a guessed block of energy. Only consumed (positive) energy
+    is accumulated so the total never decreases.
+    """
+
+    __slots__ = ("energy_kwh", "_last_timestamp", "_last_power")
+
+    def __init__(self, energy_kwh: float = 0.0) -> None:
+        """Initialize the integrator with an optional restored total."""
+        self.energy_kwh = energy_kwh
+        self._last_timestamp: float | None = None
+        self._last_power = 0.0
+
+    def add(self, timestamp: float, power_w: float, max_gap: float) -> None:
+        """Integrate the interval since the previous sample."""
+        if self._last_timestamp is not None:
+            elapsed = timestamp - self._last_timestamp
+            if 0 < elapsed <= max_gap:
+                watt_seconds = (self._last_power + power_w) / 2 * elapsed
+                if watt_seconds > 0:
+                    self.energy_kwh += watt_seconds / 3_600_000
+        self._last_timestamp = timestamp
+        self._last_power = power_w
@@ -0,0 +1,167 @@
+"""Streaming export of Eyedro history to CSV or Parquet files."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+import csv
+from datetime import UTC, datetime
+from functools import lru_cache
+from operator import truediv
+import os
+from typing import Any
+
+from .api import READING_FIELDS
+from .const import EXPORT_FORMAT_PARQUET, HISTORY_TIER_RAW
+
+# Device units per exported unit, by field: power factor in %, voltage in V,
+# current in A and power in W, as the sensors show them
+_SCALES = (10, 100, 1000, 1)
+
+# Compacted tiers hold these statistics of every value
+_STATISTICS = ("mean", "min", "max")
+
+
+def _columns(tier: str, channel_count: int) -> list[str]:
+    """Return the value columns of a tier, after the timestamp and sample count."""
+    names = [
+        f"{field}_{channel}"
+        for field in READING_FIELDS
+        for channel in range(1, channel_count + 1)
+    ]
+    if tier == HISTORY_TIER_RAW:
+        return names
+    return [f"{name}_{statistic}" for statistic in _STATISTICS for name in names]
+
+
+@lru_cache(maxsize=16)
+def _layout(length: int, channel_count: int) -> tuple[tuple[int, ...], list[int] | None]:
+    """Return the divisor of every packed value, and where each one goes.
+
+    The positions are None when the row has every channel, else the index
+    of each value in a row padded to channel_count channels.
+    """
+    count = length // len(READING_FIELDS)
+    divisors = tuple(scale for scale in _SCALES for _ in range(count))
+    if count == channel_count:
+        return divisors, None
+    positions = [
+        index * channel_count + channel
+        for index in range(len(READING_FIELDS))
+        for channel in range(count)
+    ]
+    return divisors, positions
+
+
+def _scaled(values: array, channel_count: int) -> list[float | None]:
+    """Return packed device values in exported units, padded to channel_count."""
+    divisors, positions = _layout(len(values), channel_count)
+    scaled: list[float | None] = list(map(truediv, values, divisors))
+    if positions is None:
+        return scaled
+    padded: list[float | None] = [None] * (len(READING_FIELDS) * channel_count)
+    for position, value in zip(positions, scaled):
+        padded[position] = value
+    return padded
+
+
+def _rows(
+    chunk: list[tuple[int, int, tuple[array, ...]]], channel_count: int
+) -> list[tuple[int, int, list[float | None]]]:
+    """Return the timestamp, sample count and exported values of each row."""
+    rows = []
+    for ts, samples, arrays in chunk:
+        if len(arrays) == 1:
+            rows.append((ts, samples, _scaled(arrays[0], channel_count)))
+            continue
+        values: list[float | None] = []
+        for packed in arrays:
+            values.extend(_scaled(packed, channel_count))
+        rows.append((ts, samples, values))
+    return rows
+
+
+def _write_csv(
+    chunks: Iterable[list[tuple[int, int, tuple[array, ...]]]],
+    columns: list[str],
+    channel_count: int,
+    path: str,
+) -> int:
+    """Write rows to a CSV file with an ISO 8601 UTC timestamp column."""
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["timestamp", "samples", *columns])
+        for chunk in chunks:
+            writer.writerows(
+                [
+                    datetime.fromtimestamp(ts / 1000, UTC).isoformat(timespec="milliseconds"),
+                    samples,
+                    *values,
+                ]
+                for ts, samples, values in _rows(chunk, channel_count)
+            )
+            written += len(chunk)
+    return written
+
+
+def _write_parquet(
+    chunks: Iterable[list[tuple[int, int, tuple[array, ...]]]],
+    columns: list[str],
+    channel_count: int,
+    path: str,
+) -> int:
+    """Write rows to a Parquet file, one row group per chunk."""
+    # Optional and heavy, so only imported when asked for
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    schema = pa.schema(
+        [
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            ("samples", pa.int32()),
+            *((column, pa.float64()) for column in columns),
+        ]
+    )
+    written = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            rows = _rows(chunk, channel_count)
+            data: dict[str, Any] = {
+                "timestamp": [ts for ts, _, _ in rows],
+                "samples": [samples for _, samples, _ in rows],
+            }
+            # Transpose the chunk's rows into columns
+            data.update(zip(columns, map(list, zip(*(values for _, _, values in rows)))))
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            written += len(rows)
+    return written
+
+
+def export_history(
+    chunks: Iterable[list[tuple[int, int, tuple[array, ...]]]],
+    channel_count: int,
+    tier: str,
+    path: str,
+    file_format: str,
+) -> int:
+    """Write chunks of history rows to a file and return the number of rows.
+
+    Blocks, so it runs in the executor; only one chunk is held in memory at
+    a time. The file is written next to its final path and moved into
+    place once complete, so a failed export leaves no partial file behind.
+
+    Raises:
+        ImportError: If Parquet is asked for and pyarrow is not installed
+        OSError: If the file cannot be written
+    """
+    write = _write_parquet if file_format == EXPORT_FORMAT_PARQUET else _write_csv
+    columns = _columns(tier, channel_count)
+    partial = f"{path}.part"
+    try:
+        written = write(chunks, columns, channel_count, partial)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return written
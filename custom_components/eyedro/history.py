@@ -0,0 +1,472 @@
+"""Local time-series history of raw Eyedro samples."""
+from __future__ import annotations
+
+import asyncio
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+from itertools import chain
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .api import READING_FIELDS, EyedroReading
+from .const import (
+    DOMAIN,
+    HISTORY_BATCH_SIZE,
+    HISTORY_COMPACT_INTERVAL,
+    HISTORY_EXPORT_CHUNK_ROWS,
+    HISTORY_FLUSH_INTERVAL,
+    HISTORY_HOUR_RETENTION,
+    HISTORY_MAX_PENDING,
+    HISTORY_MINUTE_RETENTION,
+    HISTORY_TIER_HOUR,
+    HISTORY_TIER_MINUTE,
+    HISTORY_TIER_RAW,
+)
+from .export import export_history
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bucket width of each compacted tier, in milliseconds
+_TIER_MS = {HISTORY_TIER_MINUTE: 60_000, HISTORY_TIER_HOUR: 3_600_000}
+
+# Source rows read per compaction query, as a span of time
+_COMPACT_CHUNK_MS = {HISTORY_TIER_MINUTE: 3_600_000, HISTORY_TIER_HOUR: 86_400_000}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS raw ("
+    "ts INTEGER PRIMARY KEY, data BLOB NOT NULL) WITHOUT ROWID",
+    *(
+        f"CREATE TABLE IF NOT EXISTS {tier} ("
+        "ts INTEGER PRIMARY KEY, samples INTEGER NOT NULL, "
+        "mean BLOB NOT NULL, min BLOB NOT NULL, max BLOB NOT NULL) WITHOUT ROWID"
+        for tier in _TIER_MS
+    ),
+)
+
+
+class HistoryRow(NamedTuple):
+    """One point of history.
+
+    ``timestamp`` is in epoch seconds: the sample time for raw rows, the
+    bucket start for compacted tiers. Raw rows hold a single sample, so
+    their mean, minimum and maximum are the same reading. The readings
+    carry the same epoch timestamp and hold raw device units.
+    """
+
+    timestamp: float
+    samples: int
+    mean: EyedroReading
+    minimum: EyedroReading
+    maximum: EyedroReading
+
+
+def history_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the database file of one config entry."""
+    return hass.config.path(STORAGE_DIR, DOMAIN, f"{entry_id}.db")
+
+
+def _pack(values: Iterable[int]) -> bytes:
+    """Pack per-channel values, field by field, into a blob."""
+    return array("i", values).tobytes()
+
+
+def _values(blob: bytes) -> array:
+    """Return the integers packed in a blob."""
+    values = array("i")
+    values.frombytes(blob)
+    return values
+
+
+def _unpack(timestamp: float, blob: bytes) -> EyedroReading:
+    """Turn a blob written by _pack back into a reading."""
+    values = _values(blob)
+    count = len(values) // len(READING_FIELDS)
+    return EyedroReading(
+        timestamp,
+        *(
+            tuple(values[index * count : (index + 1) * count])
+            for index in range(len(READING_FIELDS))
+        ),
+    )
+
+
+def _aggregate(
+    rows: Iterable[tuple[int, int, bytes, bytes, bytes]], bucket_ms: int
+) -> Iterator[tuple[int, int, bytes, bytes, bytes]]:
+    """Roll (ts, samples, mean, min, max) rows up into buckets of bucket_ms.
+
+    Rows must be in time order. Means are weighted by sample count and
+    rounded to whole device units.
+    """
+    bucket: int | None = None
+    samples = 0
+    sums: list[int] = []
+    lows = highs = array("i")
+    for ts, count, mean_blob, min_blob, max_blob in rows:
+        start = ts - ts % bucket_ms
+        means = _values(mean_blob)
+        # A new bucket, or the device started reporting a different channel count
+        if bucket is not None and (start != bucket or len(means) != len(sums)):
+            yield _bucket_row(bucket, samples, sums, lows, highs)
+            bucket = None
+        if bucket is None:
+            bucket, samples, sums = start, 0, [0] * len(means)
+            lows, highs = _values(min_blob), _values(max_blob)
+        else:
+            lows = array("i", map(min, lows, _values(min_blob)))
+            highs = array("i", map(max, highs, _values(max_blob)))
+        samples += count
+        sums = [total + value * count for total, value in zip(sums, means)]
+    if bucket is not None:
+        yield _bucket_row(bucket, samples, sums, lows, highs)
+
+
+def _bucket_row(
+    bucket: int, samples: int, sums: list[int], lows: array, highs: array
+) -> tuple[int, int, bytes, bytes, bytes]:
+    """Return the database row of one finished bucket."""
+    means = _pack(round(total / samples) for total in sums)
+    return bucket, samples, means, _pack(lows), _pack(highs)
+
+
+class _HistoryDatabase:
+    """SQLite file holding the raw and compacted tiers of one device.
+
+    Every method blocks and must run in the executor; a lock serializes
+    them because executor jobs may run on different threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open the database, creating it on first use."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def write(self, rows: list[tuple[int, bytes]]) -> None:
+        """Insert a batch of raw samples in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO raw VALUES (?, ?)", rows)
+
+    def compact(self, now_ms: int, raw_retention_ms: int) -> None:
+        """Roll finished minutes and hours up and apply retention."""
+        with self._lock:
+            self._compact_tier(HISTORY_TIER_RAW, HISTORY_TIER_MINUTE, now_ms)
+            self._compact_tier(HISTORY_TIER_MINUTE, HISTORY_TIER_HOUR, now_ms)
+            with self._conn:
+                for tier, retention_ms in (
+                    (HISTORY_TIER_RAW, raw_retention_ms),
+                    (HISTORY_TIER_MINUTE, HISTORY_MINUTE_RETENTION.total_seconds() * 1000),
+                    (HISTORY_TIER_HOUR, HISTORY_HOUR_RETENTION.total_seconds() * 1000),
+                ):
+                    self._conn.execute(
+                        f"DELETE FROM {tier} WHERE ts < ?", (now_ms - retention_ms,)
+                    )
+
+    def _compact_tier(self, source: str, target: str, now_ms: int) -> None:
+        """Aggregate every finished bucket of target not compacted yet."""
+        bucket_ms = _TIER_MS[target]
+        until = now_ms - now_ms % bucket_ms
+        (last,) = self._conn.execute(f"SELECT MAX(ts) FROM {target}").fetchone()
+        if last is None:
+            (start,) = self._conn.execute(f"SELECT MIN(ts) FROM {source}").fetchone()
+            if start is None:
+                return
+            start -= start % bucket_ms
+        else:
+            start = last + bucket_ms
+
+        if source == HISTORY_TIER_RAW:
+            select = "SELECT ts, 1, data, data, data FROM raw"
+        else:
+            select = f"SELECT ts, samples, mean, min, max FROM {source}"
+        chunk_ms = _COMPACT_CHUNK_MS[target]
+        # Chunks are whole buckets, so no bucket is split between two queries
+        while start < until:
+            end = min(start + chunk_ms, until)
+            rows = self._conn.execute(
+                f"{select} WHERE ts >= ? AND ts < ? ORDER BY ts", (start, end)
+            ).fetchall()
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {target} VALUES (?, ?, ?, ?, ?)",
+                    _aggregate(rows, bucket_ms),
+                )
+            start = end
+
+    def query(self, tier: str, start_ms: int, end_ms: int) -> list[HistoryRow]:
+        """Return the rows of one tier with start_ms <= ts < end_ms, oldest first."""
+        with self._lock:
+            if tier == HISTORY_TIER_RAW:
+                rows = []
+                for ts, blob in self._conn.execute(
+                    "SELECT ts, data FROM raw WHERE ts >= ? AND ts < ? ORDER BY ts",
+                    (start_ms, end_ms),
+                ):
+                    reading = _unpack(ts / 1000, blob)
+                    rows.append(HistoryRow(ts / 1000, 1, reading, reading, reading))
+                return rows
+            return [
+                HistoryRow(
+                    ts / 1000,
+                    samples,
+                    _unpack(ts / 1000, mean),
+                    _unpack(ts / 1000, low),
+                    _unpack(ts / 1000, high),
+                )
+                for ts, samples, mean, low, high in self._conn.execute(
+                    f"SELECT ts, samples, mean, min, max FROM {tier} "
+                    "WHERE ts >= ? AND ts < ? ORDER BY ts",
+                    (start_ms, end_ms),
+                )
+            ]
+
+    def channel_count(self, tier: str, start_ms: int, end_ms: int) -> int:
+        """Return the most channels held by any row with start_ms <= ts < end_ms."""
+        column = "data" if tier == HISTORY_TIER_RAW else "mean"
+        with self._lock:
+            (size,) = self._conn.execute(
+                f"SELECT MAX(LENGTH({column})) FROM {tier} WHERE ts >= ? AND ts < ?",
+                (start_ms, end_ms),
+            ).fetchone()
+        return (size or 0) // (array("i").itemsize * len(READING_FIELDS))
+
+    def chunks(
+        self, tier: str, start_ms: int, end_ms: int, size: int, stop: threading.Event
+    ) -> Iterator[list[tuple[int, int, tuple[array, ...]]]]:
+        """Yield the rows with start_ms <= ts < end_ms, oldest first, size at a time.
+
+        Rows are (ts, samples, values): one array of packed values for raw
+        samples, or the mean, min and max arrays for compacted tiers. The
+        lock is only held while a chunk is read, so samples keep being
+        written during a long export. Setting ``stop`` ends the export
+        with an error before the next chunk.
+        """
+        if tier == HISTORY_TIER_RAW:
+            select = "SELECT ts, 1, data FROM raw"
+        else:
+            select = f"SELECT ts, samples, mean, min, max FROM {tier}"
+        while True:
+            if stop.is_set():
+                raise sqlite3.ProgrammingError("History was closed during the export")
+            with self._lock:
+                rows = self._conn.execute(
+                    f"{select} WHERE ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+                    (start_ms, end_ms, size),
+                ).fetchall()
+            if not rows:
+                return
+            yield [(ts, samples, tuple(map(_values, blobs))) for ts, samples, *blobs in rows]
+            start_ms = rows[-1][0] + 1
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+
+class EyedroHistory:
+    """Append-only history of one device's raw samples.
+
+    Samples are queued in memory on the event loop and written in batches
+    from the executor, every HISTORY_FLUSH_INTERVAL or once
+    HISTORY_BATCH_SIZE samples are waiting. Compaction periodically rolls
+    finished minutes and hours into their own tiers and drops rows that are
+    past their tier's retention.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str, raw_retention: timedelta) -> None:
+        """Initialize the history; call async_open before use."""
+        self.hass = hass
+        self.path = path
+        self.raw_retention = raw_retention
+        self._db: _HistoryDatabase | None = None
+        self._pending: deque[tuple[int, bytes]] = deque(maxlen=HISTORY_MAX_PENDING)
+        self._flush_task: asyncio.Task | None = None
+        self._compact_task: asyncio.Task | None = None
+        # Exports running in the executor, and the flag that stops them
+        self._exports: set[asyncio.Future[int]] = set()
+        self._closing = threading.Event()
+
+    async def async_open(self) -> None:
+        """Open the database file."""
+        self._db = await self.hass.async_add_executor_job(_HistoryDatabase, self.path)
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start periodic flushing and compaction; return a callback to stop."""
+        unsubs = [
+            async_track_time_interval(
+                self.hass, self._async_handle_flush, HISTORY_FLUSH_INTERVAL
+            ),
+            async_track_time_interval(
+                self.hass, self._async_handle_compact, HISTORY_COMPACT_INTERVAL
+            ),
+        ]
+        # Catch up on buckets that finished while Home Assistant was stopped
+        self._async_handle_compact(None)
+
+        @callback
+        def _async_stop() -> None:
+            for unsub in unsubs:
+                unsub()
+
+        return _async_stop
+
+    @callback
+    def append(self, reading: EyedroReading) -> None:
+        """Queue one raw sample for the next batch."""
+        # Readings carry monotonic time; history is kept in epoch milliseconds
+        timestamp_ms = round((reading.timestamp + time.time() - time.monotonic()) * 1000)
+        self._pending.append((timestamp_ms, _pack(chain.from_iterable(reading.fields))))
+        if len(self._pending) >= HISTORY_BATCH_SIZE:
+            self._async_handle_flush(None)
+
+    @callback
+    def _async_handle_flush(self, _now: datetime | None) -> None:
+        """Start a flush unless one is already running."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self.hass.async_create_background_task(
+                self.async_flush(), f"eyedro history flush {self.path}"
+            )
+
+    @callback
+    def _async_handle_compact(self, _now: datetime | None) -> None:
+        """Start a compaction unless one is already running."""
+        if self._compact_task is None or self._compact_task.done():
+            self._compact_task = self.hass.async_create_background_task(
+                self.async_compact(), f"eyedro history compaction {self.path}"
+            )
+
+    async def async_flush(self) -> None:
+        """Write every queued sample."""
+        if not self._pending or self._db is None:
+            return
+        batch = list(self._pending)
+        self._pending.clear()
+        try:
+            await self.hass.async_add_executor_job(self._db.write, batch)
+        except sqlite3.Error as err:
+            _LOGGER.error("Error writing Eyedro history to %s: %s", self.path, err)
+
+    async def async_compact(self) -> None:
+        """Flush, then roll up finished buckets and apply retention."""
+        await self.async_flush()
+        if self._db is None:
+            return
+        try:
+            await self.hass.async_add_executor_job(
+                self._db.compact,
+                round(time.time() * 1000),
+                round(self.raw_retention.total_seconds() * 1000),
+            )
+        except sqlite3.Error as err:
+            _LOGGER.error("Error compacting Eyedro history in %s: %s", self.path, err)
+
+    async def async_query(
+        self, start: datetime, end: datetime, tier: str = HISTORY_TIER_RAW
+    ) -> list[HistoryRow]:
+        """Return the history between start (inclusive) and end (exclusive).
+
+        ``tier`` is HISTORY_TIER_RAW for every sample, or HISTORY_TIER_MINUTE
+        or HISTORY_TIER_HOUR for the compacted buckets. Raw queries include
+        samples that were still queued.
+        """
+        if self._db is None:
+            return []
+        if tier == HISTORY_TIER_RAW:
+            await self.async_flush()
+        return await self.hass.async_add_executor_job(
+            self._db.query,
+            tier,
+            round(start.timestamp() * 1000),
+            round(end.timestamp() * 1000),
+        )
+
+    async def async_export(
+        self,
+        path: str,
+        file_format: str,
+        start: datetime,
+        end: datetime,
+        tier: str = HISTORY_TIER_RAW,
+    ) -> int:
+        """Write the history between start and end to a file; return the rows written.
+
+        Rows are read and written a chunk at a time in the executor, so
+        memory use does not depend on the length of the range. Closing the
+        history stops the export after its current chunk and removes the
+        partial file.
+
+        Raises:
+            ImportError: If Parquet is asked for and pyarrow is not installed
+            OSError: If the file cannot be written
+            sqlite3.Error: If the database cannot be read
+        """
+        if self._db is None or self._closing.is_set():
+            raise sqlite3.ProgrammingError("History is closed")
+        if tier == HISTORY_TIER_RAW:
+            await self.async_flush()
+        db = self._db
+        stop = self._closing
+        start_ms = round(start.timestamp() * 1000)
+        end_ms = round(end.timestamp() * 1000)
+
+        def _export() -> int:
+            return export_history(
+                db.chunks(tier, start_ms, end_ms, HISTORY_EXPORT_CHUNK_ROWS, stop),
+                db.channel_count(tier, start_ms, end_ms),
+                tier,
+                path,
+                file_format,
+            )
+
+        export = self.hass.async_add_executor_job(_export)
+        self._exports.add(export)
+        export.add_done_callback(self._async_export_done)
+        # A cancelled caller leaves the export running until close stops it
+        return await asyncio.shield(export)
+
+    @callback
+    def _async_export_done(self, export: asyncio.Future[int]) -> None:
+        """Forget a finished export."""
+        self._exports.discard(export)
+        if not export.cancelled():
+            # Mark the error seen: the caller may have been cancelled meanwhile
+            export.exception()
+
+    async def async_close(self) -> None:
+        """Stop running exports, write what is queued and close the database."""
+        self._closing.set()
+        if self._exports:
+            await asyncio.wait(self._exports)
+        for task in (self._flush_task, self._compact_task):
+            if task is not None and not task.done():
+                await task
+        await self.async_flush()
+        if self._db is not None:
+            db, self._db = self._db, None
+            await self.hass.async_add_executor_job(db.close)
+
+
+def remove_history(path: str) -> None:
+    """Delete a database file and its write-ahead log."""
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(f"{path}{suffix}")
+        except FileNotFoundError:
+            pass
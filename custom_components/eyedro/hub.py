@@ -0,0 +1,282 @@
+"""Shared polling scheduler for Eyedro devices in hub mode."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import math
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_HUB
+
+if TYPE_CHECKING:
+    from .coordinator import EyedroDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _HubMember:
+    """Scheduling state for one device in the hub."""
+
+    coordinator: EyedroDataUpdateCoordinator
+    max_concurrent: int
+    # Interval group the member was placed in, in seconds
+    interval: float = 0.0
+    offset: float = 0.0
+    next_due: float = 0.0
+    task: asyncio.Task | None = None
+    skipped: int = 0
+
+
+class _Limiter:
+    """Semaphore whose capacity can change while requests hold it.
+
+    Lowering the limit lets requests in flight finish and holds back new
+    ones until fewer than the new limit are running; raising it admits
+    waiting requests straight away.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the limiter."""
+        self._limit = limit
+        self._active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        """Return the capacity."""
+        return self._limit
+
+    @limit.setter
+    def limit(self, limit: int) -> None:
+        """Change the capacity, admitting waiters if it grew."""
+        self._limit = limit
+        self._wake()
+
+    async def __aenter__(self) -> None:
+        """Wait for a free slot and take it."""
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled just after being admitted: hand the slot on
+                self._active -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        """Release the slot."""
+        self._active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Admit waiters in order while there is room."""
+        while self._waiters and self._active < self._limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+
+
+class EyedroHub:
+    """Poll many Eyedro coordinators from a single wall-clock aligned timer.
+
+    Devices sharing a poll interval are spread evenly across it with phase
+    offsets, and at most ``max_concurrent`` requests are in flight at once.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self._members: dict[EyedroDataUpdateCoordinator, _HubMember] = {}
+        # Caps requested by devices still fetching their first reading
+        self._joining: dict[EyedroDataUpdateCoordinator, int] = {}
+        self._limiter = _Limiter(1)
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def max_concurrent(self) -> int:
+        """Return the effective concurrency cap."""
+        return self._limiter.limit if len(self) else 0
+
+    def __len__(self) -> int:
+        """Return the number of devices in the hub, including those joining it."""
+        return len(self._members) + len(self._joining)
+
+    async def async_first_refresh(
+        self, coordinator: EyedroDataUpdateCoordinator, max_concurrent: int
+    ) -> None:
+        """Fetch a device's first reading while holding a concurrency slot.
+
+        Devices set up together after a restart would otherwise all be
+        polled at once before the hub takes over their schedule.
+        """
+        self._joining[coordinator] = max_concurrent
+        self._async_update_limit()
+        try:
+            async with self._limiter:
+                await coordinator.async_config_entry_first_refresh()
+        finally:
+            del self._joining[coordinator]
+            self._async_update_limit()
+
+    @callback
+    def async_add(
+        self, coordinator: EyedroDataUpdateCoordinator, max_concurrent: int
+    ) -> None:
+        """Start polling a coordinator from the hub."""
+        member = self._members[coordinator] = _HubMember(coordinator, max_concurrent)
+        member.interval = coordinator.poll_interval.total_seconds()
+        self._async_update_limit()
+        self._async_rebalance({member.interval})
+
+    @callback
+    def async_remove(self, coordinator: EyedroDataUpdateCoordinator) -> None:
+        """Stop polling a coordinator and cancel any request in flight."""
+        member = self._members.pop(coordinator, None)
+        if member is None:
+            return
+        if member.task is not None and not member.task.done():
+            member.task.cancel()
+        self._async_update_limit()
+        self._async_rebalance({member.interval})
+
+    @callback
+    def async_reschedule(self, coordinator: EyedroDataUpdateCoordinator) -> None:
+        """Move a coordinator to the group of its new interval."""
+        if (member := self._members.get(coordinator)) is None:
+            return
+        interval = coordinator.poll_interval.total_seconds()
+        if interval != member.interval:
+            left, member.interval = member.interval, interval
+            self._async_rebalance({left, interval})
+
+    @callback
+    def async_set_max_concurrent(
+        self, coordinator: EyedroDataUpdateCoordinator, max_concurrent: int
+    ) -> None:
+        """Update the concurrency cap requested by one coordinator."""
+        if (member := self._members.get(coordinator)) is not None:
+            member.max_concurrent = max_concurrent
+            self._async_update_limit()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the timer and every request in flight."""
+        for coordinator in list(self._members):
+            self.async_remove(coordinator)
+        self._async_cancel_timer()
+
+    @callback
+    def _async_update_limit(self) -> None:
+        """Apply the most conservative cap requested by any member."""
+        caps = [member.max_concurrent for member in self._members.values()]
+        caps.extend(self._joining.values())
+        if caps:
+            self._limiter.limit = min(caps)
+
+    @callback
+    def _async_rebalance(self, intervals: set[float]) -> None:
+        """Spread the members of some interval groups evenly and reschedule.
+
+        Other groups keep their offsets, so a device joining or changing
+        interval does not move the polls of unrelated meters.
+        """
+        now = time.time()
+        for interval in intervals:
+            members = [
+                member
+                for member in self._members.values()
+                if member.interval == interval
+            ]
+            for index, member in enumerate(members):
+                member.offset = interval * index / len(members)
+                member.next_due = _next_slot(interval, member.offset, now)
+
+        self._async_schedule()
+
+    @callback
+    def _async_cancel_timer(self) -> None:
+        """Cancel the pending timer, if any."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _async_schedule(self) -> None:
+        """Arm the timer for the earliest due member."""
+        self._async_cancel_timer()
+        if not self._members:
+            return
+        next_due = min(member.next_due for member in self._members.values())
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_handle_tick, dt_util.utc_from_timestamp(next_due)
+        )
+
+    @callback
+    def _async_handle_tick(self, _now: datetime) -> None:
+        """Start polls for every member whose slot has arrived."""
+        self._unsub_timer = None
+        now = time.time()
+        for member in self._members.values():
+            if member.next_due > now:
+                continue
+            # Slots come from the wall clock, so a late tick never shifts later ones
+            member.next_due = _next_slot(member.interval, member.offset, now)
+            if member.task is not None and not member.task.done():
+                member.skipped += 1
+                _LOGGER.debug(
+                    "Skipping poll of %s, previous request still running",
+                    member.coordinator.api._host,
+                )
+                continue
+            member.task = self.hass.async_create_background_task(
+                self._async_poll(member.coordinator),
+                f"eyedro hub poll {member.coordinator.api._host}",
+            )
+        self._async_schedule()
+
+    async def _async_poll(self, coordinator: EyedroDataUpdateCoordinator) -> None:
+        """Refresh one coordinator while holding a concurrency slot."""
+        async with self._limiter:
+            await coordinator.async_refresh()
+
+
+def _next_slot(interval: float, offset: float, now: float) -> float:
+    """Return the first wall-clock slot ``k * interval + offset`` after now."""
+    return (math.floor((now - offset) / interval) + 1) * interval + offset
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> EyedroHub:
+    """Return the integration-wide hub, creating it on first use."""
+    if (hub := hass.data.get(DATA_HUB)) is None:
+        hub = hass.data[DATA_HUB] = EyedroHub(hass)
+    return hub
+
+
+@callback
+def async_leave_hub(hass: HomeAssistant, coordinator: EyedroDataUpdateCoordinator) -> None:
+    """Remove a coordinator from the hub, tearing the hub down when empty."""
+    hub: EyedroHub | None = hass.data.get(DATA_HUB)
+    if hub is None:
+        return
+    hub.async_remove(coordinator)
+    if not len(hub):
+        hub.async_shutdown()
+        hass.data.pop(DATA_HUB)
@@ -0,0 +1,204 @@
+"""Low-overhead poll path instrumentation for Eyedro devices."""
+from __future__ import annotations
+
+from bisect import bisect_left
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+# Upper bounds of the histogram buckets in seconds, from parse times of a
+# few microseconds up to the request timeout; one overflow bucket follows
+HISTOGRAM_BOUNDS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Histograms of PollStats, in the order of the poll path
+TIMINGS = ("connect", "ttfb", "body", "parse", "request", "fanout")
+
+
+class Histogram:
+    """Count of observations per fixed bucket, plus their sum.
+
+    Observing is a bisect and two additions, so it is cheap enough for
+    every request. Quantiles are estimated as the upper bound of the bucket
+    they fall in.
+    """
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self) -> None:
+        """Start empty."""
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record one duration."""
+        self.counts[bisect_left(HISTOGRAM_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean duration in seconds."""
+        return self.total / self.count if self.count else None
+
+    def quantile(self, fraction: float) -> float | None:
+        """Return the bucket bound below which ``fraction`` of durations fall."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        # In the overflow bucket; the largest finite bound is the best guess
+        return HISTOGRAM_BOUNDS[-1]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as plain data, with cumulative buckets."""
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip((*map(str, HISTOGRAM_BOUNDS), "+Inf"), self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.mean,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class PollStats:
+    """Timings and outcome counts of one device's polls since setup.
+
+    ``connect`` only counts requests that opened a new connection, ``ttfb``
+    runs from sending the request (after connecting) to the response
+    headers, ``body`` is reading the response body, ``parse`` is turning it
+    into a reading, ``request`` is all of those together and ``fanout`` is
+    notifying every entity of a coordinator update. ``coalesced`` and
+    ``cache_hits`` count calls answered without a request of their own.
+    """
+
+    __slots__ = (
+        *TIMINGS,
+        "successes",
+        "failures",
+        "timeouts",
+        "coalesced",
+        "cache_hits",
+        "new_connections",
+        "reused_connections",
+    )
+
+    def __init__(self) -> None:
+        """Start empty."""
+        for name in TIMINGS:
+            setattr(self, name, Histogram())
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return every statistic as plain data."""
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            **{name: getattr(self, name).as_dict() for name in TIMINGS},
+        }
+
+
+async def _on_request_start(
+    _session: aiohttp.ClientSession,
+    context: SimpleNamespace,
+    _params: aiohttp.TraceRequestStartParams,
+) -> None:
+    """Note when the request started."""
+    context.start = time.perf_counter()
+    context.connect = 0.0
+
+
+async def _on_connection_create_start(
+    _session: aiohttp.ClientSession,
+    context: SimpleNamespace,
+    _params: aiohttp.TraceConnectionCreateStartParams,
+) -> None:
+    """Note when connecting started."""
+    context.connect_start = time.perf_counter()
+
+
+async def _on_connection_create_end(
+    _session: aiohttp.ClientSession,
+    context: SimpleNamespace,
+    _params: aiohttp.TraceConnectionCreateEndParams,
+) -> None:
+    """Record how long opening a new connection took."""
+    context.connect = time.perf_counter() - context.connect_start
+    if (stats := context.trace_request_ctx) is not None:
+        stats.connect.observe(context.connect)
+        stats.new_connections += 1
+
+
+async def _on_connection_reuseconn(
+    _session: aiohttp.ClientSession,
+    context: SimpleNamespace,
+    _params: aiohttp.TraceConnectionReuseconnParams,
+) -> None:
+    """Count a request served over a kept-alive connection."""
+    if (stats := context.trace_request_ctx) is not None:
+        stats.reused_connections += 1
+
+
+async def _on_request_end(
+    _session: aiohttp.ClientSession,
+    context: SimpleNamespace,
+    _params: aiohttp.TraceRequestEndParams,
+) -> None:
+    """Record the time to the response headers, excluding connecting."""
+    if (stats := context.trace_request_ctx) is not None:
+        stats.ttfb.observe(time.perf_counter() - context.start - context.connect)
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Return a trace config that feeds the PollStats passed per request.
+
+    Requests opt in with ``trace_request_ctx=stats``; any other request
+    through the same session is timed but not recorded.
+    """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
@@ -0,0 +1,190 @@
+"""Live per-channel readings for websocket subscribers."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .api import READING_FIELDS, EyedroReading
+from .const import (
+    DATA_LIVE,
+    DOMAIN,
+    LIVE_MAX_INTERVAL,
+    LIVE_MIN_INTERVAL,
+    WS_TYPE_SUBSCRIBE_LIVE,
+)
+
+
+class _Subscriber:
+    """One websocket subscription and the samples waiting to be sent to it.
+
+    Samples are delta encoded against the previous sample sent to this
+    subscriber: ``[milliseconds, value, ...]`` with the values of every
+    field in READING_FIELDS order, channel by channel within a field. The
+    first sample after a reset is relative to zero, so a client decodes
+    every sample the same way, as a running sum.
+    """
+
+    __slots__ = ("send", "interval", "next_send", "batch", "previous", "reset")
+
+    def __init__(self, send: Callable[[dict[str, Any]], None], interval: float) -> None:
+        """Initialize the subscriber to receive a batch every ``interval`` seconds."""
+        self.send = send
+        self.interval = interval
+        self.next_send = 0.0
+        self.batch: list[list[int]] = []
+        self.previous: list[int] | None = None
+        self.reset = True
+
+    def add(
+        self,
+        values: list[int],
+        delta: tuple[list[int], list[int]] | None,
+        now: float,
+        channel_count: int,
+    ) -> None:
+        """Queue one sample and send the batch once the interval is up.
+
+        ``delta`` is the feed's previous sample and the change from it,
+        reused when that is also the previous sample of this subscriber.
+        """
+        if self.previous is None or len(self.previous) != len(values):
+            # First sample, or the channel count changed: start over from zero
+            self.batch.clear()
+            self.batch.append(values)
+            self.reset = True
+        elif delta is not None and delta[0] is self.previous:
+            self.batch.append(delta[1])
+        else:
+            self.batch.append([new - old for new, old in zip(values, self.previous)])
+        self.previous = values
+        if now < self.next_send:
+            return
+
+        message: dict[str, Any] = {"samples": self.batch}
+        if self.reset:
+            message["reset"] = True
+            message["channels"] = channel_count
+            message["fields"] = READING_FIELDS
+            self.reset = False
+        self.send(message)
+        self.batch = []
+        self.next_send = now + self.interval
+
+
+class LiveFeed:
+    """Fan-out of one device's raw readings to websocket subscribers.
+
+    The coordinator adds every raw reading (each poll, or each high-rate
+    sample) straight to the feed; nothing goes through entity states or
+    the recorder. Each subscriber gets its own batch interval. A feed
+    belongs to a config entry rather than its coordinator, so
+    subscriptions carry on across reloads.
+    """
+
+    def __init__(self) -> None:
+        """Start without subscribers."""
+        self._subscribers: dict[int, _Subscriber] = {}
+        self._next_id = 0
+        # Latest sample, sent to new subscribers straight away
+        self._last: tuple[list[int], int] | None = None
+
+    @callback
+    def add(self, reading: EyedroReading) -> None:
+        """Queue a raw reading for every subscriber."""
+        # Milliseconds since the epoch, like the frontend's Date.now()
+        milliseconds = round((time.time() - (time.monotonic() - reading.timestamp)) * 1000)
+        values = [milliseconds]
+        for field in reading.fields:
+            values.extend(field)
+        last, self._last = self._last, (values, reading.channel_count)
+        if not self._subscribers:
+            return
+        # Subscribers that got the previous sample share one delta
+        delta = None
+        if last is not None and len(last[0]) == len(values):
+            delta = (last[0], [new - old for new, old in zip(values, last[0])])
+        now = time.monotonic()
+        for subscriber in self._subscribers.values():
+            subscriber.add(values, delta, now, reading.channel_count)
+
+    @callback
+    def async_subscribe(
+        self, send: Callable[[dict[str, Any]], None], interval: float
+    ) -> Callable[[], None]:
+        """Send batches of samples every ``interval`` seconds; return the unsubscribe."""
+        subscriber_id = self._next_id
+        self._next_id += 1
+        subscriber = self._subscribers[subscriber_id] = _Subscriber(send, interval)
+        if self._last is not None:
+            values, channel_count = self._last
+            subscriber.add(values, None, time.monotonic(), channel_count)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._subscribers.pop(subscriber_id, None)
+
+        return _unsubscribe
+
+    @property
+    def subscriber_count(self) -> int:
+        """Return the number of subscribers."""
+        return len(self._subscribers)
+
+
+@callback
+def async_get_live_feed(hass: HomeAssistant, entry_id: str) -> LiveFeed:
+    """Return the live feed of a config entry, creating it on first use."""
+    feeds: dict[str, LiveFeed] | None = hass.data.get(DATA_LIVE)
+    if feeds is None:
+        feeds = hass.data[DATA_LIVE] = {}
+        # One command serves every entry
+        websocket_api.async_register_command(hass, websocket_subscribe_live)
+    if (feed := feeds.get(entry_id)) is None:
+        feed = feeds[entry_id] = LiveFeed()
+    return feed
+
+
+@callback
+def async_remove_live_feed(hass: HomeAssistant, entry_id: str) -> None:
+    """Forget the live feed of a removed config entry."""
+    hass.data.get(DATA_LIVE, {}).pop(entry_id, None)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_TYPE_SUBSCRIBE_LIVE,
+        vol.Required("entry_id"): str,
+        vol.Optional("interval", default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=LIVE_MIN_INTERVAL, max=LIVE_MAX_INTERVAL)
+        ),
+    }
+)
+@callback
+def websocket_subscribe_live(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Subscribe to the raw readings of a device."""
+    entry_id = msg["entry_id"]
+    if entry_id not in hass.data.get(DOMAIN, {}):
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, f"Eyedro entry {entry_id} is not loaded"
+        )
+        return
+
+    @callback
+    def _send(message: dict[str, Any]) -> None:
+        connection.send_message(websocket_api.event_message(msg["id"], message))
+
+    # The result goes first; the latest sample follows right away
+    connection.send_result(msg["id"])
+    connection.subscriptions[msg["id"]] = async_get_live_feed(
+        hass, entry_id
+    ).async_subscribe(_send, msg["interval"])
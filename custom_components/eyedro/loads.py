@@ -0,0 +1,221 @@
+"""Streaming appliance on/off detection for Eyedro devices."""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import math
+from typing import Any
+
+from .api import EyedroReading
+from .const import (
+    LOAD_BASELINE_SAMPLES,
+    LOAD_CONFIRM_SAMPLES,
+    LOAD_MAX_SIGNATURES,
+    LOAD_SIGNATURE_TOLERANCE,
+    LOAD_STATE_OFF,
+    LOAD_STATE_ON,
+)
+
+
+def _reactive_power(power_w: int, power_factor: int) -> float:
+    """Return reactive power in var from power and power factor in milli-units."""
+    if not 0 < power_factor < 1000:
+        return 0.0
+    return abs(power_w) * math.sqrt((1000 / power_factor) ** 2 - 1)
+
+
+class _ChannelLevel:
+    """Steady level of one channel and a candidate level it may be moving to.
+
+    Values are power (W), current (mA) and reactive power (var). The steady
+    level follows slow drift as a running mean over the last few samples;
+    a sample at least ``threshold`` watts away starts a candidate level,
+    which becomes the new steady level once it held for
+    LOAD_CONFIRM_SAMPLES samples.
+    """
+
+    __slots__ = ("count", "level", "pending", "candidate")
+
+    def __init__(self) -> None:
+        """Start without a level."""
+        self.count = 0
+        self.level = [0.0, 0.0, 0.0]
+        self.pending = 0
+        self.candidate = [0.0, 0.0, 0.0]
+
+    def add(self, values: tuple[float, float, float], threshold: float) -> list[float] | None:
+        """Include one sample; return the change of a confirmed step, if any."""
+        if not self.count or abs(values[0] - self.level[0]) < threshold:
+            # Back at (or still at) the steady level; a spike was a transient
+            self.pending = 0
+            self.count = min(self.count + 1, LOAD_BASELINE_SAMPLES)
+            _update_mean(self.level, values, self.count)
+            return None
+
+        if self.pending and abs(values[0] - self.candidate[0]) >= threshold:
+            # Still moving, e.g. an inrush spike settling; start over from here
+            self.pending = 0
+        self.pending += 1
+        _update_mean(self.candidate, values, self.pending)
+        if self.pending < LOAD_CONFIRM_SAMPLES:
+            return None
+
+        change = [new - old for new, old in zip(self.candidate, self.level)]
+        self.level, self.candidate = self.candidate, self.level
+        self.count, self.pending = self.pending, 0
+        return change
+
+
+def _update_mean(mean: list[float], values: tuple[float, float, float], count: int) -> None:
+    """Move a running mean of ``count`` values toward a new sample in place."""
+    for index, value in enumerate(values):
+        mean[index] += (value - mean[index]) / count
+
+
+@dataclass(slots=True)
+class LoadSignature:
+    """A recurring load learned from the steps it causes."""
+
+    signature_id: int
+    channels: tuple[int, ...]
+    # Mean size of its steps, in W and var
+    power: float
+    reactive: float
+    occurrences: int
+
+    def distance(self, power: float, reactive: float) -> float:
+        """Return how far a step is from this signature in the P-Q plane."""
+        return math.hypot(power - self.power, reactive - self.reactive)
+
+
+class LoadChangeDetector:
+    """Detect loads switching on and off from every raw reading.
+
+    Each channel's power, current and reactive power (derived from the
+    power factor) are tracked in constant time per sample. Steps confirmed
+    on several channels in the same reading, like a 240V load across both
+    legs, are one change. Every change is matched to the nearest learned
+    signature on the same channels in the P-Q plane, or starts a new one,
+    so recurring loads get a stable signature id. An off step reports how
+    long the load with the same signature was on.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        """Initialize the detector for steps of at least ``threshold`` watts."""
+        self.threshold = threshold
+        self.signatures: dict[int, LoadSignature] = {}
+        self._next_id = 1
+        self._channels: list[_ChannelLevel] = []
+        self._last_timestamp: float | None = None
+        # Signature id -> monotonic time it switched on
+        self._running: dict[int, float] = {}
+
+    def add(self, reading: EyedroReading, max_gap: float) -> list[dict[str, Any]]:
+        """Include one raw reading and return the load changes it completes.
+
+        After a gap longer than ``max_gap`` the steady levels are learned
+        again, so a load that changed while the device was unreachable is
+        not reported late.
+        """
+        timestamp = reading.timestamp
+        if (
+            len(self._channels) != reading.channel_count
+            or self._last_timestamp is None
+            or timestamp - self._last_timestamp > max_gap
+        ):
+            self._channels = [_ChannelLevel() for _ in range(reading.channel_count)]
+        self._last_timestamp = timestamp
+
+        steps: dict[str, list[tuple[int, list[float]]]] = {}
+        for channel, (level, power_factor, current, power) in enumerate(
+            zip(self._channels, reading.power_factor, reading.current, reading.power),
+            start=1,
+        ):
+            values = (power, current, _reactive_power(power, power_factor))
+            if (change := level.add(values, self.threshold)) is not None:
+                state = LOAD_STATE_ON if change[0] > 0 else LOAD_STATE_OFF
+                steps.setdefault(state, []).append((channel, change))
+
+        return [
+            self._change(timestamp, state, channel_steps)
+            for state, channel_steps in steps.items()
+        ]
+
+    def _change(
+        self, timestamp: float, state: str, steps: list[tuple[int, list[float]]]
+    ) -> dict[str, Any]:
+        """Label one change and return its event data."""
+        channels = tuple(channel for channel, _ in steps)
+        power = abs(sum(change[0] for _, change in steps))
+        reactive = abs(sum(change[2] for _, change in steps))
+        # Both legs of a 240V load carry its full current
+        current = max(abs(change[1]) for _, change in steps) / 1000
+
+        signature = self._learn(channels, power, reactive)
+        duration = None
+        if state == LOAD_STATE_ON:
+            self._running[signature.signature_id] = timestamp
+        elif (started := self._running.pop(signature.signature_id, None)) is not None:
+            duration = round(timestamp - started, 1)
+
+        apparent = math.hypot(power, reactive)
+        return {
+            "state": state,
+            "channels": list(channels),
+            "power": round(power),
+            "current": round(current, 3),
+            "power_factor": round(power / apparent * 100, 1) if apparent else None,
+            "duration": duration,
+            "signature": signature.signature_id,
+            "occurrences": signature.occurrences,
+        }
+
+    def _learn(self, channels: tuple[int, ...], power: float, reactive: float) -> LoadSignature:
+        """Return the signature matching a step, updated with it, or a new one."""
+        best: LoadSignature | None = None
+        best_distance = math.inf
+        for signature in self.signatures.values():
+            if signature.channels != channels:
+                continue
+            distance = signature.distance(power, reactive)
+            tolerance = max(
+                LOAD_SIGNATURE_TOLERANCE * math.hypot(signature.power, signature.reactive),
+                self.threshold / 2,
+            )
+            if distance <= tolerance and distance < best_distance:
+                best, best_distance = signature, distance
+
+        if best is None:
+            if len(self.signatures) >= LOAD_MAX_SIGNATURES:
+                # Forget the load seen least often, the oldest of those first
+                rarest = min(self.signatures.values(), key=lambda item: item.occurrences)
+                del self.signatures[rarest.signature_id]
+                self._running.pop(rarest.signature_id, None)
+            best = self.signatures[self._next_id] = LoadSignature(
+                self._next_id, channels, power, reactive, 0
+            )
+            self._next_id += 1
+
+        best.occurrences += 1
+        # Running mean, weighted toward recent steps once well established
+        weight = min(best.occurrences, LOAD_BASELINE_SAMPLES)
+        best.power += (power - best.power) / weight
+        best.reactive += (reactive - best.reactive) / weight
+        return best
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the signature table as plain data for storage."""
+        return [asdict(signature) for signature in self.signatures.values()]
+
+    def restore(self, signatures: list[dict[str, Any]]) -> None:
+        """Load a signature table saved by as_list."""
+        self.signatures = {
+            item["signature_id"]: LoadSignature(
+                item["signature_id"],
+                tuple(item["channels"]),
+                item["power"],
+                item["reactive"],
+                item["occurrences"],
+            )
+            for item in signatures
+        }
+        self._next_id = max(self.signatures, default=0) + 1
@@ -0,0 +1,179 @@
+"""Hourly long-term statistics import for Eyedro devices."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+
+from .api import EyedroReading
+from .const import (
+    DOMAIN,
+    SENSOR_CHANNEL_ENERGY,
+    SENSOR_CHANNEL_POWER,
+    SENSOR_TOTAL_ENERGY,
+    SENSOR_TOTAL_POWER,
+)
+
+# Hours kept for the recorder while it is not loaded yet
+PENDING_HOURS = 24
+
+
+class _HourAccumulator:
+    """Running count, sum, min and max of one value over an hour."""
+
+    __slots__ = ("count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        """Start empty."""
+        self.count = 0
+        self.total = 0
+        self.minimum = 0
+        self.maximum = 0
+
+    def add(self, value: int) -> None:
+        """Include one value."""
+        if self.count:
+            self.minimum = min(self.minimum, value)
+            self.maximum = max(self.maximum, value)
+        else:
+            self.minimum = self.maximum = value
+        self.count += 1
+        self.total += value
+
+
+class EyedroLongTermStatistics:
+    """Aggregate one device's readings per hour and import them as statistics.
+
+    Total and per-channel power get hourly mean, min and max in kW; total
+    and per-channel energy get the kWh counter at the end of each hour as
+    state and sum, which the Energy dashboard can use directly. An hour is
+    imported by the first reading after it ends, as one batch for the
+    device: each statistic gets a single recorder call carrying every row
+    it has waiting, which is just that hour unless the recorder was still
+    loading when earlier hours ended. An hour in progress when Home
+    Assistant stops is not imported.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, host: str, name: str, only: bool = False
+    ) -> None:
+        """Initialize the aggregator for the device at host.
+
+        ``only`` means the statistics replace the measurement and energy
+        sensors, which are then not created, so they write no state rows.
+        """
+        self.hass = hass
+        self.name = name
+        self.only = only
+        self._object_id = slugify(host)
+        self._hour: datetime | None = None
+        # Index 0 is the total, then one per channel
+        self._power: list[_HourAccumulator] = []
+        self._energy: tuple[float, list[float]] | None = None
+        # Rows not handed to the recorder yet, and the metadata of each
+        # statistic, which never changes, by statistic id
+        self._pending: dict[str, list[StatisticData]] = {}
+        self._metadata: dict[str, StatisticMetaData] = {}
+
+    def statistic_id(self, key: str) -> str:
+        """Return the external statistic id for a sensor key."""
+        return f"{DOMAIN}:{self._object_id}_{key}"
+
+    @callback
+    def add(
+        self, reading: EyedroReading, energy_total: float, energy_channels: list[float]
+    ) -> None:
+        """Include one raw reading and the energy counters after it, in kWh."""
+        hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if hour != self._hour or len(self._power) != reading.channel_count + 1:
+            if self._hour is not None and self._power[0].count:
+                self._async_import_hour()
+            self._hour = hour
+            self._power = [_HourAccumulator() for _ in range(reading.channel_count + 1)]
+
+        powers = reading.power
+        self._power[0].add(sum(powers))
+        for accumulator, power in zip(self._power[1:], powers):
+            accumulator.add(power)
+        self._energy = (energy_total, list(energy_channels))
+
+    @callback
+    def _async_import_hour(self) -> None:
+        """Import the statistics of the hour that just ended."""
+        start = self._hour
+        channel_count = len(self._power) - 1
+
+        for index, accumulator in enumerate(self._power):
+            if index:
+                key = SENSOR_CHANNEL_POWER.format(index)
+                name = f"{self.name} Channel {index} Power"
+            else:
+                key, name = SENSOR_TOTAL_POWER, f"{self.name} Total Power"
+            # Accumulated in watts, imported in kW like the sensors
+            self._async_queue(
+                key,
+                name,
+                UnitOfPower.KILO_WATT,
+                StatisticData(
+                    start=start,
+                    mean=round(accumulator.total / accumulator.count / 1000, 3),
+                    min=accumulator.minimum / 1000,
+                    max=accumulator.maximum / 1000,
+                ),
+            )
+
+        if self._energy is not None:
+            energy_total, energy_channels = self._energy
+            energy = [(SENSOR_TOTAL_ENERGY, f"{self.name} Total Energy", energy_total)]
+            energy.extend(
+                (
+                    SENSOR_CHANNEL_ENERGY.format(channel + 1),
+                    f"{self.name} Channel {channel + 1} Energy",
+                    kwh,
+                )
+                for channel, kwh in enumerate(energy_channels[:channel_count])
+            )
+            for key, name, kwh in energy:
+                self._async_queue(
+                    key,
+                    name,
+                    UnitOfEnergy.KILO_WATT_HOUR,
+                    StatisticData(start=start, state=round(kwh, 4), sum=round(kwh, 4)),
+                )
+
+        self._async_flush()
+
+    @callback
+    def _async_queue(
+        self, key: str, name: str, unit: str, statistic: StatisticData
+    ) -> None:
+        """Add one statistic row to the device's next batch."""
+        statistic_id = self.statistic_id(key)
+        if statistic_id not in self._metadata:
+            has_sum = "sum" in statistic
+            self._metadata[statistic_id] = StatisticMetaData(
+                has_mean=not has_sum,
+                has_sum=has_sum,
+                name=name,
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=unit,
+            )
+        rows = self._pending.setdefault(statistic_id, [])
+        rows.append(statistic)
+        del rows[:-PENDING_HOURS]
+
+    @callback
+    def _async_flush(self) -> None:
+        """Hand every waiting row to the recorder, one call per statistic."""
+        if "recorder" not in self.hass.config.components:
+            return
+        for statistic_id, rows in self._pending.items():
+            async_add_external_statistics(self.hass, self._metadata[statistic_id], rows)
+        self._pending = {}
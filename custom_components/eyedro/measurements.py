@@ -0,0 +1,112 @@
+"""Derived electrical measurements for Eyedro readings."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+import math
+
+from .api import EyedroReading
+from .const import (
+    SENSOR_AVERAGE_POWER_FACTOR,
+    SENSOR_AVERAGE_VOLTAGE,
+    SENSOR_TOTAL_CURRENT,
+    SENSOR_TOTAL_POWER,
+)
+
+
+class EyedroMeasurements:
+    """Every value the sensors publish, derived from one reading.
+
+    Computed once per coordinator refresh in a single pass over all
+    channels, already converted to sensor units and rounded, so sensor
+    state reads are attribute lookups. Per-channel values are tuples
+    indexed by channel.
+    """
+
+    __slots__ = (
+        "channel_count",
+        "total_power",
+        "total_current",
+        "average_voltage",
+        "average_power_factor",
+        "total_apparent_power",
+        "total_reactive_power",
+        "current_imbalance",
+        "voltage_imbalance",
+        "channel_power",
+        "channel_current",
+        "channel_voltage",
+        "channel_power_factor",
+        "channel_apparent_power",
+        "channel_reactive_power",
+    )
+
+    def __init__(self, reading: EyedroReading) -> None:
+        """Derive every measurement from a reading."""
+        count = reading.channel_count
+        amps: list[float] = []
+        volts: list[float] = []
+        apparent: list[float] = []
+        reactive: list[float] = []
+        total_apparent = total_reactive = 0.0
+
+        for voltage_cv, current_ma, power_w in zip(
+            reading.voltage, reading.current, reading.power
+        ):
+            # Voltage is in centivolts and current in milliamps
+            channel_volts = voltage_cv / 100
+            channel_amps = current_ma / 1000
+            volt_amperes = channel_volts * channel_amps
+            vars_ = math.sqrt(max(volt_amperes * volt_amperes - power_w * power_w, 0.0))
+            volts.append(channel_volts)
+            amps.append(channel_amps)
+            apparent.append(round(volt_amperes, 1))
+            reactive.append(round(vars_, 1))
+            total_apparent += volt_amperes
+            total_reactive += vars_
+
+        self.channel_count = count
+        # Power is in watts (kW for sensors), power factor in milli-units (% for sensors)
+        self.total_power = round(sum(reading.power) / 1000, 3)
+        self.total_current = round(sum(reading.current) / 1000, 3)
+        self.average_voltage = round(sum(reading.voltage) / (100 * count), 2)
+        self.average_power_factor = round(sum(reading.power_factor) / (10 * count), 2)
+        self.total_apparent_power = round(total_apparent, 1)
+        self.total_reactive_power = round(total_reactive, 1)
+        self.current_imbalance = _imbalance(amps)
+        self.voltage_imbalance = _imbalance(volts)
+        self.channel_power = tuple(round(power / 1000, 3) for power in reading.power)
+        self.channel_current = tuple(round(value, 3) for value in amps)
+        self.channel_voltage = tuple(round(value, 2) for value in volts)
+        self.channel_power_factor = tuple(
+            round(power_factor / 10, 2) for power_factor in reading.power_factor
+        )
+        self.channel_apparent_power = tuple(apparent)
+        self.channel_reactive_power = tuple(reactive)
+
+
+def _imbalance(values: list[float]) -> float | None:
+    """Return the maximum deviation from the mean, in percent of the mean."""
+    if len(values) < 2:
+        return None
+    mean = sum(values) / len(values)
+    if mean == 0:
+        return 0.0
+    return round(max(abs(value - mean) for value in values) / mean * 100, 2)
+
+
+def window_extremes(
+    stats: Mapping[str, tuple[float, int, int] | None], channel_count: int
+) -> dict[str, tuple[float, float]]:
+    """Convert summed per-field window stats to (min, max) per sensor, in sensor units."""
+    conversions = (
+        (SENSOR_TOTAL_POWER, "power", 1000, 3),
+        (SENSOR_TOTAL_CURRENT, "current", 1000, 3),
+        (SENSOR_AVERAGE_VOLTAGE, "voltage", 100 * channel_count, 2),
+        (SENSOR_AVERAGE_POWER_FACTOR, "power_factor", 10 * channel_count, 2),
+    )
+    extremes = {}
+    for key, field, divisor, digits in conversions:
+        if (field_stats := stats.get(field)) is not None:
+            _mean, low, high = field_stats
+            extremes[key] = (round(low / divisor, digits), round(high / divisor, digits))
+    return extremes
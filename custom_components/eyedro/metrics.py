@@ -0,0 +1,199 @@
+"""OpenMetrics scrape endpoint for Eyedro devices."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import BREAKER_OPEN, DATA_METRICS, DOMAIN, METRICS_URL
+
+if TYPE_CHECKING:
+    from .coordinator import EyedroDataUpdateCoordinator
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# (family, type, unit, help), in the order they are rendered
+METRIC_FAMILIES = (
+    ("eyedro_up", "gauge", "", "Whether the last update of the device succeeded"),
+    ("eyedro_power_watts", "gauge", "watts", "Active power per channel"),
+    ("eyedro_current_amperes", "gauge", "amperes", "Current per channel"),
+    ("eyedro_voltage_volts", "gauge", "volts", "Voltage per channel"),
+    ("eyedro_power_factor_ratio", "gauge", "ratio", "Power factor per channel"),
+    ("eyedro_energy_kwh", "counter", "kwh", "Energy integrated per channel"),
+    ("eyedro_poll_interval_seconds", "gauge", "seconds", "Current poll interval"),
+    ("eyedro_window_samples", "gauge", "", "High-rate samples in the last published window"),
+    ("eyedro_breaker_open", "gauge", "", "Whether the circuit breaker refuses requests"),
+    ("eyedro_consecutive_failures", "gauge", "", "Failed requests since the last success"),
+    ("eyedro_breaker_trips", "counter", "", "Times the circuit breaker opened"),
+    ("eyedro_suppressed_writes", "counter", "", "State writes skipped by deadbands"),
+)
+
+_HEADERS = {
+    family: "".join(
+        (
+            f"# TYPE {family} {kind}\n",
+            f"# UNIT {family} {unit}\n" if unit else "",
+            f"# HELP {family} {help_text}.\n",
+        )
+    )
+    for family, kind, unit, help_text in METRIC_FAMILIES
+}
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _DeviceMetrics:
+    """Formatted sample lines of one device, per metric family."""
+
+    __slots__ = ("data", "state", "lines")
+
+    def __init__(self) -> None:
+        """Start with nothing rendered."""
+        self.data: Any = None
+        self.state: tuple | None = None
+        self.lines: dict[str, list[str]] = {}
+
+
+def _poll_state(coordinator: EyedroDataUpdateCoordinator) -> tuple:
+    """Return everything besides the data that a scrape shows for a device."""
+    breaker = coordinator.breaker
+    # Values restored from the previous run are not a successful update
+    data = coordinator.data
+    return (
+        coordinator.last_update_success and not (data and data.get("stale")),
+        coordinator.poll_interval,
+        breaker.state,
+        breaker.failures,
+        breaker.trips,
+        coordinator.suppressed_writes.total(),
+    )
+
+
+def _render_device(
+    coordinator: EyedroDataUpdateCoordinator, state: tuple
+) -> dict[str, list[str]]:
+    """Format every sample line of one device."""
+    last_update_success, poll_interval, breaker_state, failures, trips, suppressed = state
+    device = f'host="{_escape(coordinator.api._host)}"'
+    lines: dict[str, list[str]] = {family: [] for family, *_ in METRIC_FAMILIES}
+
+    lines["eyedro_up"].append(f"eyedro_up{{{device}}} {int(last_update_success)}\n")
+    lines["eyedro_poll_interval_seconds"].append(
+        f"eyedro_poll_interval_seconds{{{device}}} {poll_interval.total_seconds()}\n"
+    )
+    lines["eyedro_breaker_open"].append(
+        f"eyedro_breaker_open{{{device}}} {int(breaker_state == BREAKER_OPEN)}\n"
+    )
+    lines["eyedro_consecutive_failures"].append(
+        f"eyedro_consecutive_failures{{{device}}} {failures}\n"
+    )
+    lines["eyedro_breaker_trips"].append(f"eyedro_breaker_trips_total{{{device}}} {trips}\n")
+    lines["eyedro_suppressed_writes"].append(
+        f"eyedro_suppressed_writes_total{{{device}}} {suppressed}\n"
+    )
+
+    if not (data := coordinator.data) or data.get("stale"):
+        return lines
+
+    # Straight from the raw reading, converted from device units
+    reading = data["reading"]
+    for channel, (power_factor, voltage, current, power) in enumerate(
+        zip(*reading.fields), start=1
+    ):
+        labels = f'{device},channel="{channel}"'
+        lines["eyedro_power_watts"].append(f"eyedro_power_watts{{{labels}}} {power}\n")
+        lines["eyedro_current_amperes"].append(
+            f"eyedro_current_amperes{{{labels}}} {current / 1000}\n"
+        )
+        lines["eyedro_voltage_volts"].append(
+            f"eyedro_voltage_volts{{{labels}}} {voltage / 100}\n"
+        )
+        lines["eyedro_power_factor_ratio"].append(
+            f"eyedro_power_factor_ratio{{{labels}}} {power_factor / 1000}\n"
+        )
+
+    # Per channel only, so summing the family gives the device total
+    for channel, kwh in enumerate(data["energy"]["channels"], start=1):
+        lines["eyedro_energy_kwh"].append(
+            f'eyedro_energy_kwh_total{{{device},channel="{channel}"}} {kwh}\n'
+        )
+
+    if "samples" in data:
+        lines["eyedro_window_samples"].append(
+            f"eyedro_window_samples{{{device}}} {data['samples']}\n"
+        )
+    return lines
+
+
+class EyedroMetricsView(HomeAssistantView):
+    """Serve the latest readings of every Eyedro device in OpenMetrics format.
+
+    Everything comes from coordinator data, never the state machine, so a
+    scrape costs the same however many other entities Home Assistant has.
+    Each device's lines are formatted once per coordinator update and the
+    assembled body is reused until some device changes.
+    """
+
+    url = METRICS_URL
+    name = "api:eyedro:metrics"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+        self._devices: dict[str, _DeviceMetrics] = {}
+        self._body = b"# EOF\n"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics of every loaded device."""
+        return web.Response(
+            body=self._async_render(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+    @callback
+    def _async_render(self) -> bytes:
+        """Return the scrape body, reformatting only devices that changed."""
+        coordinators: dict[str, EyedroDataUpdateCoordinator] = self.hass.data.get(
+            DOMAIN, {}
+        )
+        changed = coordinators.keys() != self._devices.keys()
+        if changed:
+            self._devices = {
+                entry_id: self._devices.get(entry_id) or _DeviceMetrics()
+                for entry_id in coordinators
+            }
+
+        for entry_id, coordinator in coordinators.items():
+            device = self._devices[entry_id]
+            state = _poll_state(coordinator)
+            if device.data is coordinator.data and device.state == state:
+                continue
+            device.data = coordinator.data
+            device.state = state
+            device.lines = _render_device(coordinator, state)
+            changed = True
+
+        if changed:
+            parts: list[str] = []
+            for family, *_ in METRIC_FAMILIES:
+                parts.append(_HEADERS[family])
+                for device in self._devices.values():
+                    parts.extend(device.lines[family])
+            parts.append("# EOF\n")
+            self._body = "".join(parts).encode()
+        return self._body
+
+
+@callback
+def async_register_metrics_view(hass: HomeAssistant) -> None:
+    """Register the scrape endpoint once; it serves whatever devices are loaded."""
+    if DATA_METRICS in hass.data or getattr(hass, "http", None) is None:
+        return
+    view = hass.data[DATA_METRICS] = EyedroMetricsView(hass)
+    hass.http.register_view(view)
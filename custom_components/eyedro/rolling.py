@@ -0,0 +1,146 @@
+"""Incremental rolling-window statistics for Eyedro readings."""
+from __future__ import annotations
+
+from collections import deque
+import math
+from typing import NamedTuple
+
+from .api import EyedroReading
+from .const import (
+    ROLLING_WINDOWS,
+    SENSOR_AVERAGE_VOLTAGE,
+    SENSOR_ROLLING,
+    SENSOR_TOTAL_POWER,
+)
+
+
+class RollingValues(NamedTuple):
+    """Statistics of one window, in sensor units."""
+
+    mean: float
+    minimum: float
+    maximum: float
+    # None until the window holds two values
+    standard_deviation: float | None
+    count: int
+
+
+class RollingWindow:
+    """Mean, min, max and standard deviation over the last ``length`` seconds.
+
+    Values are integers in raw device units, so the running sum and sum of
+    squares are exact and never drift however long the window runs. Min and
+    max are the heads of monotonic deques. Adding a value and evicting
+    expired ones is amortized O(1), whatever the window length.
+    """
+
+    __slots__ = ("length", "_values", "_sum", "_sum_squares", "_minima", "_maxima")
+
+    def __init__(self, length: float) -> None:
+        """Start empty."""
+        self.length = length
+        self._values: deque[tuple[float, int]] = deque()
+        self._sum = 0
+        self._sum_squares = 0
+        # Candidates for the min (increasing) and max (decreasing), oldest first
+        self._minima: deque[tuple[float, int]] = deque()
+        self._maxima: deque[tuple[float, int]] = deque()
+
+    def add(self, timestamp: float, value: int) -> None:
+        """Include a value and drop the ones that fell out of the window."""
+        entry = (timestamp, value)
+        self._values.append(entry)
+        self._sum += value
+        self._sum_squares += value * value
+        minima = self._minima
+        while minima and minima[-1][1] >= value:
+            minima.pop()
+        minima.append(entry)
+        maxima = self._maxima
+        while maxima and maxima[-1][1] <= value:
+            maxima.pop()
+        maxima.append(entry)
+
+        cutoff = timestamp - self.length
+        values = self._values
+        while values[0][0] <= cutoff:
+            _, old = values.popleft()
+            self._sum -= old
+            self._sum_squares -= old * old
+        while minima[0][0] <= cutoff:
+            minima.popleft()
+        while maxima[0][0] <= cutoff:
+            maxima.popleft()
+
+    def values(self, scale: float, digits: int) -> RollingValues | None:
+        """Return the statistics divided by ``scale`` and rounded."""
+        if not (count := len(self._values)):
+            return None
+        deviation = None
+        if count > 1:
+            # Sample variance from the exact integer sums
+            variance = (count * self._sum_squares - self._sum * self._sum) / (
+                count * (count - 1)
+            )
+            deviation = round(math.sqrt(variance) / scale, digits)
+        return RollingValues(
+            round(self._sum / count / scale, digits),
+            round(self._minima[0][1] / scale, digits),
+            round(self._maxima[0][1] / scale, digits),
+            deviation,
+            count,
+        )
+
+
+class RollingStatistics:
+    """Rolling windows of total power and average voltage for one device.
+
+    Every raw reading is added to one window per quantity and length in
+    constant time; the sensors read the statistics once per refresh.
+    """
+
+    __slots__ = ("_channel_count", "_power", "_voltage")
+
+    def __init__(self) -> None:
+        """Start with empty windows."""
+        self._channel_count = 0
+        self._power: dict[int, RollingWindow] = {}
+        # Sum of the channel voltages, averaged when read
+        self._voltage: dict[int, RollingWindow] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        """Empty every window."""
+        self._power = {minutes: RollingWindow(minutes * 60) for minutes in ROLLING_WINDOWS}
+        self._voltage = {
+            minutes: RollingWindow(minutes * 60) for minutes in ROLLING_WINDOWS
+        }
+
+    def add(self, reading: EyedroReading) -> None:
+        """Include one raw reading."""
+        if reading.channel_count != self._channel_count:
+            # Voltage sums over a different number of channels don't mix
+            self._reset()
+            self._channel_count = reading.channel_count
+        timestamp = reading.timestamp
+        power = sum(reading.power)
+        voltage = sum(reading.voltage)
+        for window in self._power.values():
+            window.add(timestamp, power)
+        for window in self._voltage.values():
+            window.add(timestamp, voltage)
+
+    def snapshot(self) -> dict[str, RollingValues | None]:
+        """Return the statistics of every window by sensor key, in sensor units."""
+        snapshot = {}
+        for minutes, window in self._power.items():
+            # Watts, published in kW
+            snapshot[SENSOR_ROLLING.format(SENSOR_TOTAL_POWER, minutes)] = window.values(
+                1000, 3
+            )
+        for minutes, window in self._voltage.items():
+            # Centivolts summed over the channels, published as the average in V
+            snapshot[SENSOR_ROLLING.format(SENSOR_AVERAGE_VOLTAGE, minutes)] = (
+                window.values(100 * self._channel_count, 2)
+            )
+        return snapshot
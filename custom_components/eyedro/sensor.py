@@ -1,23 +1,272 @@
 """Sensor platform for Eyedro integration."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+import time
+from typing import Any
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfPower, UnitOfElectricCurrent, UnitOfElectricPotential, PERCENTAGE
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfApparentPower,
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
+    UnitOfEnergy,
+    UnitOfPower,
+    UnitOfReactivePower,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
+    ATTR_CACHE_HITS,
+    ATTR_COALESCED,
+    ATTR_CONSECUTIVE_FAILURES,
+    ATTR_COUNT,
+    ATTR_FAILURES,
+    ATTR_MAX,
+    ATTR_MEAN,
+    ATTR_MEDIAN,
+    ATTR_MIN,
+    ATTR_MODE,
+    ATTR_NEXT_CHANGE,
+    ATTR_NEXT_PROBE,
+    ATTR_PEAK_TIME,
+    ATTR_PERIOD,
+    ATTR_PERIOD_START,
+    ATTR_STALE,
+    ATTR_STANDARD_DEVIATION,
+    ATTR_SUCCESSES,
+    ATTR_TIMEOUTS,
+    ATTR_TRIPS,
+    ATTR_WINDOW,
+    ATTR_WINDOW_MAX,
+    ATTR_WINDOW_MIN,
+    ATTR_WINDOW_SAMPLES,
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
     DOMAIN,
+    ROLLING_WINDOWS,
     SENSOR_AVERAGE_POWER_FACTOR,
     SENSOR_AVERAGE_VOLTAGE,
+    SENSOR_CHANNEL_APPARENT_POWER,
+    SENSOR_CHANNEL_CURRENT,
+    SENSOR_CHANNEL_ENERGY,
+    SENSOR_CHANNEL_POWER,
+    SENSOR_CHANNEL_POWER_FACTOR,
+    SENSOR_CHANNEL_REACTIVE_POWER,
+    SENSOR_CHANNEL_VOLTAGE,
+    SENSOR_CONNECTION_STATE,
+    SENSOR_CURRENT_IMBALANCE,
+    SENSOR_DEMAND,
+    SENSOR_ENERGY_COST,
+    SENSOR_PEAK_DEMAND_PERIOD,
+    SENSOR_PEAK_DEMAND_TODAY,
+    SENSOR_PERIOD_ENERGY_COST,
+    SENSOR_REQUEST_FAILURES,
+    SENSOR_ROLLING,
+    SENSOR_SUPPRESSED_WRITES,
+    SENSOR_TARIFF_RATE,
+    SENSOR_TIMING,
+    SENSOR_TOTAL_APPARENT_POWER,
     SENSOR_TOTAL_CURRENT,
+    SENSOR_TOTAL_ENERGY,
     SENSOR_TOTAL_POWER,
+    SENSOR_TOTAL_REACTIVE_POWER,
+    SENSOR_VOLTAGE_IMBALANCE,
 )
 from .coordinator import EyedroDataUpdateCoordinator
+from .demand import DemandTracker, EyedroSiteDemand
+from .instrumentation import TIMINGS, Histogram
+from .measurements import EyedroMeasurements
+from .tariff import TariffMeter
+
+
+@dataclass(frozen=True, kw_only=True)
+class EyedroSensorEntityDescription(SensorEntityDescription):
+    """Describes an Eyedro sensor that reads precomputed measurements."""
+
+    value_fn: Callable[[EyedroMeasurements], float | None]
+    # Deadband policy entry that filters this sensor's writes
+    deadband_key: str | None = None
+    # Fraction of that entry's absolute deadband applying to this sensor
+    deadband_scale: float = 1.0
+
+
+SENSOR_DESCRIPTIONS: tuple[EyedroSensorEntityDescription, ...] = (
+    EyedroSensorEntityDescription(
+        key=SENSOR_TOTAL_POWER,
+        name="Eyedro Total Power",
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.total_power,
+        deadband_key=SENSOR_TOTAL_POWER,
+    ),
+    EyedroSensorEntityDescription(
+        key=SENSOR_TOTAL_CURRENT,
+        name="Eyedro Total Current",
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.total_current,
+        deadband_key=SENSOR_TOTAL_CURRENT,
+    ),
+    EyedroSensorEntityDescription(
+        key=SENSOR_AVERAGE_VOLTAGE,
+        name="Eyedro Average Voltage",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.average_voltage,
+        deadband_key=SENSOR_AVERAGE_VOLTAGE,
+    ),
+    EyedroSensorEntityDescription(
+        key=SENSOR_AVERAGE_POWER_FACTOR,
+        name="Eyedro Average Power Factor",
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.POWER_FACTOR,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.average_power_factor,
+        deadband_key=SENSOR_AVERAGE_POWER_FACTOR,
+    ),
+    EyedroSensorEntityDescription(
+        key=SENSOR_TOTAL_APPARENT_POWER,
+        name="Eyedro Total Apparent Power",
+        native_unit_of_measurement=UnitOfApparentPower.VOLT_AMPERE,
+        device_class=SensorDeviceClass.APPARENT_POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.total_apparent_power,
+    ),
+    EyedroSensorEntityDescription(
+        key=SENSOR_TOTAL_REACTIVE_POWER,
+        name="Eyedro Total Reactive Power",
+        native_unit_of_measurement=UnitOfReactivePower.VOLT_AMPERE_REACTIVE,
+        device_class=SensorDeviceClass.REACTIVE_POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.total_reactive_power,
+    ),
+)
+
+# Only meaningful when the device reports more than one channel
+IMBALANCE_DESCRIPTIONS: tuple[EyedroSensorEntityDescription, ...] = (
+    EyedroSensorEntityDescription(
+        key=SENSOR_CURRENT_IMBALANCE,
+        name="Eyedro Current Imbalance",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.current_imbalance,
+    ),
+    EyedroSensorEntityDescription(
+        key=SENSOR_VOLTAGE_IMBALANCE,
+        name="Eyedro Voltage Imbalance",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda measurements: measurements.voltage_imbalance,
+    ),
+)
+
+
+def channel_descriptions(
+    channel: int, channel_count: int
+) -> tuple[EyedroSensorEntityDescription, ...]:
+    """Return the sensor descriptions for one channel (0-based).
+
+    Power and current add up across channels, so each channel gets its
+    share of the total's deadband; voltage and power factor are averaged
+    and keep the whole one.
+    """
+    number = channel + 1
+    share = 1 / channel_count
+    return (
+        EyedroSensorEntityDescription(
+            key=SENSOR_CHANNEL_POWER.format(number),
+            name=f"Eyedro Channel {number} Power",
+            native_unit_of_measurement=UnitOfPower.KILO_WATT,
+            device_class=SensorDeviceClass.POWER,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda measurements: measurements.channel_power[channel],
+            deadband_key=SENSOR_TOTAL_POWER,
+            deadband_scale=share,
+        ),
+        EyedroSensorEntityDescription(
+            key=SENSOR_CHANNEL_CURRENT.format(number),
+            name=f"Eyedro Channel {number} Current",
+            native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+            device_class=SensorDeviceClass.CURRENT,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda measurements: measurements.channel_current[channel],
+            deadband_key=SENSOR_TOTAL_CURRENT,
+            deadband_scale=share,
+        ),
+        EyedroSensorEntityDescription(
+            key=SENSOR_CHANNEL_VOLTAGE.format(number),
+            name=f"Eyedro Channel {number} Voltage",
+            native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+            device_class=SensorDeviceClass.VOLTAGE,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda measurements: measurements.channel_voltage[channel],
+            deadband_key=SENSOR_AVERAGE_VOLTAGE,
+        ),
+        EyedroSensorEntityDescription(
+            key=SENSOR_CHANNEL_POWER_FACTOR.format(number),
+            name=f"Eyedro Channel {number} Power Factor",
+            native_unit_of_measurement=PERCENTAGE,
+            device_class=SensorDeviceClass.POWER_FACTOR,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda measurements: measurements.channel_power_factor[channel],
+            deadband_key=SENSOR_AVERAGE_POWER_FACTOR,
+        ),
+        EyedroSensorEntityDescription(
+            key=SENSOR_CHANNEL_APPARENT_POWER.format(number),
+            name=f"Eyedro Channel {number} Apparent Power",
+            native_unit_of_measurement=UnitOfApparentPower.VOLT_AMPERE,
+            device_class=SensorDeviceClass.APPARENT_POWER,
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_registry_enabled_default=False,
+            value_fn=lambda measurements: measurements.channel_apparent_power[channel],
+        ),
+        EyedroSensorEntityDescription(
+            key=SENSOR_CHANNEL_REACTIVE_POWER.format(number),
+            name=f"Eyedro Channel {number} Reactive Power",
+            native_unit_of_measurement=UnitOfReactivePower.VOLT_AMPERE_REACTIVE,
+            device_class=SensorDeviceClass.REACTIVE_POWER,
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_registry_enabled_default=False,
+            value_fn=lambda measurements: measurements.channel_reactive_power[channel],
+        ),
+    )
+
+# Name, unit and device class of each quantity with rolling statistics
+ROLLING_QUANTITIES: dict[str, tuple[str, str, SensorDeviceClass]] = {
+    SENSOR_TOTAL_POWER: ("Total Power", UnitOfPower.KILO_WATT, SensorDeviceClass.POWER),
+    SENSOR_AVERAGE_VOLTAGE: (
+        "Average Voltage",
+        UnitOfElectricPotential.VOLT,
+        SensorDeviceClass.VOLTAGE,
+    ),
+}
+
+# Name of each demand sensor
+DEMAND_SENSORS: dict[str, str] = {
+    SENSOR_DEMAND: "Demand",
+    SENSOR_PEAK_DEMAND_TODAY: "Peak Demand Today",
+    SENSOR_PEAK_DEMAND_PERIOD: "Peak Demand This Billing Period",
+}
 
 
 async def async_setup_entry(
@@ -27,13 +276,72 @@ async def async_setup_entry(
 ) -> None:
     """Set up Eyedro sensors from a config entry."""
     coordinator: EyedroDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    channel_count = coordinator.data["measurements"].channel_count
 
-    sensors = [
-        EyedroTotalPowerSensor(coordinator, SENSOR_TOTAL_POWER),
-        EyedroTotalCurrentSensor(coordinator, SENSOR_TOTAL_CURRENT),
-        EyedroAverageVoltageSensor(coordinator, SENSOR_AVERAGE_VOLTAGE),
-        EyedroAveragePowerFactorSensor(coordinator, SENSOR_AVERAGE_POWER_FACTOR),
+    diagnostics: list[EyedroSensor] = [
+        EyedroSuppressedWritesSensor(coordinator, SENSOR_SUPPRESSED_WRITES),
+        EyedroConnectionStateSensor(coordinator, SENSOR_CONNECTION_STATE),
+        EyedroRequestFailuresSensor(coordinator, SENSOR_REQUEST_FAILURES),
+    ]
+    diagnostics.extend(
+        EyedroTimingSensor(coordinator, SENSOR_TIMING.format(timing), timing)
+        for timing in TIMINGS
+    )
+
+    rolling: list[EyedroSensor] = []
+    if coordinator.rolling is not None:
+        rolling.extend(
+            EyedroRollingSensor(coordinator, quantity, minutes)
+            for quantity in ROLLING_QUANTITIES
+            for minutes in ROLLING_WINDOWS
+        )
+
+    if coordinator.demand is not None:
+        rolling.extend(
+            EyedroDemandSensor(coordinator, coordinator.demand, kind)
+            for kind in DEMAND_SENSORS
+        )
+    # One member's platform at a time creates the site's sensors; the site
+    # asks another member to when that one unloads
+    if (site := coordinator.site_demand) is not None:
+        site.async_add_sensor_platform(
+            entry.entry_id,
+            lambda: async_add_entities(
+                EyedroSiteDemandSensor(site, kind) for kind in DEMAND_SENSORS
+            ),
+        )
+
+    if (tariff := coordinator.tariff) is not None:
+        rolling.append(EyedroTariffRateSensor(coordinator, tariff))
+        rolling.append(EyedroCostSensor(coordinator, tariff))
+        rolling.extend(
+            EyedroCostSensor(coordinator, tariff, period) for period in tariff.tariff.periods
+        )
+
+    # In statistics-only mode hourly statistics replace the recorded sensors;
+    # rolling statistics, demand and cost are opted into on their own, so they stay
+    if coordinator.statistics is not None and coordinator.statistics.only:
+        async_add_entities([*diagnostics, *rolling])
+        return
+
+    descriptions = list(SENSOR_DESCRIPTIONS)
+    if channel_count > 1:
+        descriptions.extend(IMBALANCE_DESCRIPTIONS)
+    for channel in range(channel_count):
+        descriptions.extend(channel_descriptions(channel, channel_count))
+
+    sensors: list[EyedroSensor] = [
+        EyedroMeasurementSensor(coordinator, description) for description in descriptions
     ]
+    sensors.append(EyedroEnergySensor(coordinator, SENSOR_TOTAL_ENERGY))
+    sensors.extend(rolling)
+    sensors.extend(diagnostics)
+
+    # One energy counter per channel reported by the device
+    sensors.extend(
+        EyedroEnergySensor(coordinator, SENSOR_CHANNEL_ENERGY.format(channel + 1), channel)
+        for channel in range(channel_count)
+    )
 
     async_add_entities(sensors)
 
@@ -45,114 +353,471 @@ class EyedroSensor(CoordinatorEntity, SensorEntity):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._attr_unique_id = f"{DOMAIN}_{coordinator.api._host}_{unique_id_suffix}"
+        self._key = unique_id_suffix
+        # Deadband policy entry for this sensor, None to always publish
+        self._deadband_key: str | None = None
+        self._deadband_scale = 1.0
+        self._published_value: Any = None
+        self._published_available: bool | None = None
+        self._published_at = 0.0
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state unless the change is inside the deadband."""
+        value = self.native_value
+        available = self.available
+        now = time.monotonic()
+
+        if (
+            available == self._published_available
+            and value is not None
+            and self._published_value is not None
+            and self._deadband_key is not None
+            and not self.coordinator.deadband.should_publish(
+                self._deadband_key,
+                self._published_value,
+                value,
+                now - self._published_at,
+                self._deadband_scale,
+            )
+        ):
+            if value != self._published_value:
+                self.coordinator.suppressed_writes[self._key] += 1
+            return
+
+        self._published_value = value
+        self._published_available = available
+        self._published_at = now
+        self.async_write_ha_state()
+
+
+class EyedroMeasurementSensor(EyedroSensor):
+    """Sensor that publishes one precomputed measurement."""
+
+    entity_description: EyedroSensorEntityDescription
+
+    # Window extremes change every update and are not worth recording
+    _unrecorded_attributes = frozenset(
+        {ATTR_WINDOW_MIN, ATTR_WINDOW_MAX, ATTR_WINDOW_SAMPLES}
+    )
+
+    def __init__(
+        self,
+        coordinator: EyedroDataUpdateCoordinator,
+        description: EyedroSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, description.key)
+        self.entity_description = description
+        self._deadband_key = description.deadband_key
+        self._deadband_scale = description.deadband_scale
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if not self.coordinator.data:
+            return None
+        return self.entity_description.value_fn(self.coordinator.data["measurements"])
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the min/max over the sample window when sampling is enabled."""
+        data = self.coordinator.data
+        if not data:
+            return None
+        if data.get("stale"):
+            return {ATTR_STALE: True}
+        if "window" not in data:
+            return None
 
-class EyedroTotalPowerSensor(EyedroSensor):
-    """Sensor for total power consumption."""
+        extremes = data["window"].get(self._key)
+        if extremes is None:
+            return None
 
-    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
-    _attr_device_class = SensorDeviceClass.POWER
-    _attr_state_class = SensorStateClass.MEASUREMENT
+        low, high = extremes
+        return {
+            ATTR_WINDOW_MIN: low,
+            ATTR_WINDOW_MAX: high,
+            ATTR_WINDOW_SAMPLES: data["samples"],
+        }
 
-    def __init__(self, coordinator: EyedroDataUpdateCoordinator, unique_id_suffix: str) -> None:
-        """Initialize the sensor."""
+
+class EyedroEnergySensor(EyedroSensor):
+    """Sensor for energy consumed, integrated by the coordinator."""
+
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(
+        self,
+        coordinator: EyedroDataUpdateCoordinator,
+        unique_id_suffix: str,
+        channel: int | None = None,
+    ) -> None:
+        """Initialize the sensor for one channel, or the total when channel is None."""
         super().__init__(coordinator, unique_id_suffix)
-        self._attr_name = "Eyedro Total Power"
+        self._channel = channel
+        if channel is None:
+            self._attr_name = "Eyedro Total Energy"
+        else:
+            self._attr_name = f"Eyedro Channel {channel + 1} Energy"
 
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        if not self.coordinator.data or "channels" not in self.coordinator.data:
+        if not self.coordinator.data or "energy" not in self.coordinator.data:
             return None
 
-        channels = self.coordinator.data["channels"]
-        if len(channels) < 2:
+        energy = self.coordinator.data["energy"]
+        if self._channel is None:
+            return energy["total"]
+
+        if self._channel >= len(energy["channels"]):
             return None
+        return energy["channels"][self._channel]
 
-        # Power is in watts, convert to kW by dividing by 1000
-        total_power_watts = channels[0]["power"] + channels[1]["power"]
-        return round(total_power_watts / 1000, 3)
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Mark a counter restored from the previous run."""
+        if self.coordinator.data and self.coordinator.data.get("stale"):
+            return {ATTR_STALE: True}
+        return None
 
 
-class EyedroTotalCurrentSensor(EyedroSensor):
-    """Sensor for total current."""
+class EyedroRollingSensor(EyedroSensor):
+    """Sensor for the rolling mean of a quantity, maintained by the coordinator."""
 
-    _attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
-    _attr_device_class = SensorDeviceClass.CURRENT
     _attr_state_class = SensorStateClass.MEASUREMENT
 
-    def __init__(self, coordinator: EyedroDataUpdateCoordinator, unique_id_suffix: str) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator, unique_id_suffix)
-        self._attr_name = "Eyedro Total Current"
+    # The spread of the window moves with every sample
+    _unrecorded_attributes = frozenset(
+        {ATTR_MIN, ATTR_MAX, ATTR_STANDARD_DEVIATION, ATTR_COUNT}
+    )
+
+    def __init__(
+        self, coordinator: EyedroDataUpdateCoordinator, quantity: str, minutes: int
+    ) -> None:
+        """Initialize the sensor for one of ROLLING_QUANTITIES over a window."""
+        super().__init__(coordinator, SENSOR_ROLLING.format(quantity, minutes))
+        name, unit, device_class = ROLLING_QUANTITIES[quantity]
+        self._attr_name = f"Eyedro {name} {minutes}-Minute Mean"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        # Filtered like the instantaneous sensor of the same quantity
+        self._deadband_key = quantity
 
     @property
     def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        if not self.coordinator.data or "channels" not in self.coordinator.data:
+        """Return the mean over the window."""
+        data = self.coordinator.data
+        if not data or (values := data.get("rolling", {}).get(self._key)) is None:
             return None
+        return values.mean
 
-        channels = self.coordinator.data["channels"]
-        if len(channels) < 2:
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the min, max and standard deviation over the window."""
+        data = self.coordinator.data
+        if not data or (values := data.get("rolling", {}).get(self._key)) is None:
             return None
+        return {
+            ATTR_MIN: values.minimum,
+            ATTR_MAX: values.maximum,
+            ATTR_STANDARD_DEVIATION: values.standard_deviation,
+            ATTR_COUNT: values.count,
+        }
+
+
+class _DemandValues:
+    """State of a demand sensor, read from a DemandTracker."""
+
+    _tracker: DemandTracker
+    _kind: str
+
+    @property
+    def _peak(self) -> tuple[float, float] | None:
+        """Return the peak this sensor shows, None for the current demand."""
+        if self._kind == SENSOR_PEAK_DEMAND_TODAY:
+            return self._tracker.peak_today
+        return self._tracker.peak_period
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the demand in kW."""
+        if self._kind == SENSOR_DEMAND:
+            watts = self._tracker.demand
+        else:
+            watts = (peak := self._peak) and peak[0]
+        return None if watts is None else round(watts / 1000, 3)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return how demand is measured, and when a peak was reached."""
+        settings = self._tracker.settings
+        attributes: dict[str, Any] = {ATTR_WINDOW: settings.window, ATTR_MODE: settings.mode}
+        if self._kind == SENSOR_PEAK_DEMAND_TODAY:
+            attributes[ATTR_PEAK_TIME] = self._tracker.peak_today_time
+        elif self._kind == SENSOR_PEAK_DEMAND_PERIOD:
+            attributes[ATTR_PEAK_TIME] = self._tracker.peak_period_time
+            attributes[ATTR_PERIOD_START] = self._tracker.period_start
+        return attributes
+
+
+class EyedroDemandSensor(_DemandValues, EyedroSensor):
+    """Sensor for the current demand or a peak of a device."""
+
+    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+    _attr_device_class = SensorDeviceClass.POWER
+
+    def __init__(
+        self, coordinator: EyedroDataUpdateCoordinator, tracker: DemandTracker, kind: str
+    ) -> None:
+        """Initialize the sensor for one of DEMAND_SENSORS."""
+        super().__init__(coordinator, kind)
+        self._tracker = tracker
+        self._kind = kind
+        self._attr_name = f"Eyedro {DEMAND_SENSORS[kind]}"
+        if kind == SENSOR_DEMAND:
+            self._attr_state_class = SensorStateClass.MEASUREMENT
 
-        # Current is in milliamps, convert to amps by dividing by 1000
-        total_current_ma = channels[0]["current"] + channels[1]["current"]
-        return round(total_current_ma / 1000, 3)
 
+class EyedroSiteDemandSensor(_DemandValues, SensorEntity):
+    """Sensor for the current demand or a peak of every device of a site.
 
-class EyedroAverageVoltageSensor(EyedroSensor):
-    """Sensor for average voltage."""
+    Not tied to any one device: it updates when any member of the site
+    adds energy, and outlives the entry whose platform created it.
+    """
+
+    _attr_should_poll = False
+    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+    _attr_device_class = SensorDeviceClass.POWER
+
+    def __init__(self, site: EyedroSiteDemand, kind: str) -> None:
+        """Initialize the sensor for one of DEMAND_SENSORS."""
+        self._site = site
+        self._tracker = site.tracker
+        self._kind = kind
+        self._attr_unique_id = f"{DOMAIN}_site_{site.tracker.settings.key}_{kind}"
+        self._attr_name = f"Eyedro Site {DEMAND_SENSORS[kind]}"
+        if kind == SENSOR_DEMAND:
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    async def async_added_to_hass(self) -> None:
+        """Write the state whenever the site is updated."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self._site.signal, self.async_write_ha_state)
+        )
+
+
+class EyedroCostSensor(EyedroSensor):
+    """Sensor for the cost of the energy used, in total or in one tariff period."""
+
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_state_class = SensorStateClass.TOTAL
+
+    def __init__(
+        self,
+        coordinator: EyedroDataUpdateCoordinator,
+        meter: TariffMeter,
+        period: str | None = None,
+    ) -> None:
+        """Initialize the sensor for one period, or the total when period is None."""
+        super().__init__(
+            coordinator,
+            SENSOR_ENERGY_COST if period is None else SENSOR_PERIOD_ENERGY_COST.format(period),
+        )
+        self._meter = meter
+        self._period = period
+        self._attr_native_unit_of_measurement = coordinator.hass.config.currency
+        if period is None:
+            self._attr_name = "Eyedro Energy Cost"
+        else:
+            self._attr_name = f"Eyedro Energy Cost {period.replace('_', ' ').title()}"
+
+    @property
+    def native_value(self) -> float:
+        """Return the cost so far."""
+        if self._period is None:
+            return round(self._meter.total, 4)
+        return round(self._meter.costs[self._period], 4)
+
+
+class EyedroTariffRateSensor(EyedroSensor):
+    """Sensor for the price of energy right now, with its period and next change."""
 
-    _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
-    _attr_device_class = SensorDeviceClass.VOLTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
+    def __init__(self, coordinator: EyedroDataUpdateCoordinator, meter: TariffMeter) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, SENSOR_TARIFF_RATE)
+        self._meter = meter
+        self._attr_name = "Eyedro Tariff Rate"
+        self._attr_native_unit_of_measurement = (
+            f"{coordinator.hass.config.currency}/{UnitOfEnergy.KILO_WATT_HOUR}"
+        )
+
+    @property
+    def native_value(self) -> float:
+        """Return the price per kWh."""
+        rule, _ = self._meter.rate_at(time.time())
+        return rule.price
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the period in force and when the price changes next."""
+        rule, change = self._meter.rate_at(time.time())
+        return {ATTR_PERIOD: rule.period, ATTR_NEXT_CHANGE: change}
+
+
+class EyedroSuppressedWritesSensor(EyedroSensor):
+    """Diagnostic sensor counting state writes skipped by the deadband."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
     def __init__(self, coordinator: EyedroDataUpdateCoordinator, unique_id_suffix: str) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, unique_id_suffix)
-        self._attr_name = "Eyedro Average Voltage"
+        self._attr_name = "Eyedro Suppressed State Writes"
 
     @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        if not self.coordinator.data or "channels" not in self.coordinator.data:
-            return None
+    def native_value(self) -> int:
+        """Return the number of suppressed writes since setup."""
+        return self.coordinator.suppressed_writes.total()
 
-        channels = self.coordinator.data["channels"]
-        if len(channels) < 2:
-            return None
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the suppressed writes per sensor."""
+        return dict(self.coordinator.suppressed_writes)
 
-        # Voltage is in tens of millivolts, convert to volts by dividing by 100
-        # Average of two values: (v1 + v2) / 200
-        total_voltage_tens_mv = channels[0]["voltage"] + channels[1]["voltage"]
-        return round(total_voltage_tens_mv / 200, 2)
 
+class EyedroConnectionStateSensor(EyedroSensor):
+    """Diagnostic sensor showing the device's circuit breaker state."""
 
-class EyedroAveragePowerFactorSensor(EyedroSensor):
-    """Sensor for average power factor."""
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = [BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN]
 
-    _attr_native_unit_of_measurement = PERCENTAGE
-    _attr_device_class = SensorDeviceClass.POWER_FACTOR
-    _attr_state_class = SensorStateClass.MEASUREMENT
+    # The probe time moves with every failed attempt
+    _unrecorded_attributes = frozenset({ATTR_NEXT_PROBE})
 
     def __init__(self, coordinator: EyedroDataUpdateCoordinator, unique_id_suffix: str) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, unique_id_suffix)
-        self._attr_name = "Eyedro Average Power Factor"
+        self._attr_name = "Eyedro Connection State"
+
+    @property
+    def available(self) -> bool:
+        """Stay available while the device is not, that is when this matters."""
+        return True
+
+    @property
+    def native_value(self) -> str:
+        """Return the breaker state."""
+        return self.coordinator.breaker.state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return failure counts and when the next probe is due."""
+        breaker = self.coordinator.breaker
+        next_probe = None
+        if breaker.state == BREAKER_OPEN:
+            next_probe = dt_util.utcnow() + timedelta(
+                seconds=max(breaker.retry_at - time.monotonic(), 0)
+            )
+        return {
+            ATTR_CONSECUTIVE_FAILURES: breaker.failures,
+            ATTR_TRIPS: breaker.trips,
+            ATTR_NEXT_PROBE: next_probe,
+        }
+
+
+class EyedroTimingSensor(EyedroSensor):
+    """Diagnostic sensor with the 95th percentile of one poll path timing."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    # Summary values move with every poll
+    _unrecorded_attributes = frozenset({ATTR_COUNT, ATTR_MEAN, ATTR_MEDIAN})
+
+    def __init__(
+        self, coordinator: EyedroDataUpdateCoordinator, unique_id_suffix: str, timing: str
+    ) -> None:
+        """Initialize the sensor for one of the TIMINGS histograms."""
+        super().__init__(coordinator, unique_id_suffix)
+        self._timing = timing
+        label = {"ttfb": "Time to First Byte", "fanout": "Fan-Out"}.get(
+            timing, timing.capitalize()
+        )
+        self._attr_name = f"Eyedro {label} Time"
+
+    @property
+    def available(self) -> bool:
+        """Stay available so slow or failing devices can be inspected."""
+        return True
+
+    @property
+    def _histogram(self) -> Histogram:
+        """Return the histogram this sensor reports."""
+        return getattr(self.coordinator.api.stats, self._timing)
 
     @property
     def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        if not self.coordinator.data or "channels" not in self.coordinator.data:
+        """Return the 95th percentile since setup, as a bucket bound."""
+        if (p95 := self._histogram.quantile(0.95)) is None:
             return None
+        return round(p95 * 1000, 3)
 
-        channels = self.coordinator.data["channels"]
-        if len(channels) < 2:
-            return None
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the observation count, mean and median in milliseconds."""
+        histogram = self._histogram
+        mean = histogram.mean
+        median = histogram.quantile(0.5)
+        return {
+            ATTR_COUNT: histogram.count,
+            ATTR_MEAN: None if mean is None else round(mean * 1000, 3),
+            ATTR_MEDIAN: None if median is None else round(median * 1000, 3),
+        }
+
+
+class EyedroRequestFailuresSensor(EyedroSensor):
+    """Diagnostic sensor counting failed requests to the device."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator: EyedroDataUpdateCoordinator, unique_id_suffix: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, unique_id_suffix)
+        self._attr_name = "Eyedro Request Failures"
+
+    @property
+    def available(self) -> bool:
+        """Stay available while requests fail."""
+        return True
 
-        # Power factor is in milli-units (988 = 0.988), convert to percent by dividing by 10
-        # Average of two values: (pf1 + pf2) / 20 = (pf1/10 + pf2/10) / 2
-        total_pf_milli_units = channels[0]["power_factor"] + channels[1]["power_factor"]
-        return round(total_pf_milli_units / 20, 2)
+    @property
+    def native_value(self) -> int:
+        """Return failed requests, timeouts included, since setup."""
+        stats = self.coordinator.api.stats
+        return stats.failures + stats.timeouts
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the outcome counts, and the calls that needed no request."""
+        stats = self.coordinator.api.stats
+        return {
+            ATTR_SUCCESSES: stats.successes,
+            ATTR_FAILURES: stats.failures,
+            ATTR_TIMEOUTS: stats.timeouts,
+            ATTR_COALESCED: stats.coalesced,
+            ATTR_CACHE_HITS: stats.cache_hits,
+        }
@@ -0,0 +1,98 @@
+"""Services of the Eyedro integration."""
+from __future__ import annotations
+
+import sqlite3
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_END,
+    ATTR_FILENAME,
+    ATTR_FORMAT,
+    ATTR_START,
+    ATTR_TIER,
+    DOMAIN,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_PARQUET,
+    HISTORY_TIER_HOUR,
+    HISTORY_TIER_MINUTE,
+    HISTORY_TIER_RAW,
+    SERVICE_EXPORT,
+)
+from .coordinator import EyedroDataUpdateCoordinator
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(
+            [EXPORT_FORMAT_CSV, EXPORT_FORMAT_PARQUET]
+        ),
+        vol.Optional(ATTR_TIER, default=HISTORY_TIER_RAW): vol.In(
+            [HISTORY_TIER_RAW, HISTORY_TIER_MINUTE, HISTORY_TIER_HOUR]
+        ),
+        vol.Required(ATTR_FILENAME): cv.string,
+    }
+)
+
+
+@callback
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the integration's services, which serve every loaded device."""
+
+    async def _async_export(call: ServiceCall) -> ServiceResponse:
+        """Write a device's local history for a time range to a file."""
+        entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+        coordinator: EyedroDataUpdateCoordinator | None = hass.data.get(DOMAIN, {}).get(
+            entry_id
+        )
+        if coordinator is None:
+            raise ServiceValidationError(f"Eyedro entry {entry_id} is not loaded")
+        if coordinator.history is None:
+            raise ServiceValidationError(
+                f"Local History is not enabled for Eyedro device {coordinator.api._host}"
+            )
+
+        # Relative to the configuration directory unless absolute
+        path = hass.config.path(call.data[ATTR_FILENAME])
+        if not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(
+                f"Cannot write to {path}, add its directory to allowlist_external_dirs"
+            )
+        start = dt_util.as_utc(call.data[ATTR_START])
+        end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+        if end <= start:
+            raise ServiceValidationError("The end of the range must be after its start")
+
+        try:
+            rows = await coordinator.history.async_export(
+                path, call.data[ATTR_FORMAT], start, end, call.data[ATTR_TIER]
+            )
+        except ImportError as err:
+            raise HomeAssistantError(
+                "Parquet export needs the pyarrow package, install it or export CSV"
+            ) from err
+        except (OSError, sqlite3.Error) as err:
+            raise HomeAssistantError(f"Error exporting Eyedro history to {path}: {err}") from err
+        return {"filename": path, "rows": rows}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT,
+        _async_export,
+        schema=EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,80 @@
+"""Shared HTTP connection pool for the Eyedro integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant
+
+from .const import (
+    DATA_SESSION,
+    SESSION_DNS_CACHE_TTL,
+    SESSION_KEEPALIVE_TIMEOUT,
+    SESSION_LIMIT_PER_HOST,
+)
+from .instrumentation import create_trace_config
+
+
+@dataclass
+class EyedroSessionPool:
+    """Integration-wide aiohttp session and its reference count."""
+
+    session: aiohttp.ClientSession
+    refs: int = 0
+    unsub_close: CALLBACK_TYPE | None = None
+
+
+def async_acquire_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the shared session, creating the pool on first use.
+
+    Every call must be paired with ``async_release_session``.
+    """
+    pool: EyedroSessionPool | None = hass.data.get(DATA_SESSION)
+    if pool is None:
+        # One connector for every meter: idle connections are kept alive
+        # between polls and each device gets a small, bounded number of sockets
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=SESSION_LIMIT_PER_HOST,
+            keepalive_timeout=SESSION_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=SESSION_DNS_CACHE_TTL,
+        )
+        # Times connect and TTFB of requests that pass their PollStats
+        pool = EyedroSessionPool(
+            session=aiohttp.ClientSession(
+                connector=connector, trace_configs=[create_trace_config()]
+            )
+        )
+
+        async def _async_close_pool(_event: Event) -> None:
+            """Close the pool when Home Assistant shuts down."""
+            pool.unsub_close = None
+            hass.data.pop(DATA_SESSION, None)
+            await pool.session.close()
+
+        pool.unsub_close = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, _async_close_pool
+        )
+        hass.data[DATA_SESSION] = pool
+
+    pool.refs += 1
+    return pool.session
+
+
+async def async_release_session(hass: HomeAssistant) -> None:
+    """Drop a reference to the shared session, closing it after the last one."""
+    pool: EyedroSessionPool | None = hass.data.get(DATA_SESSION)
+    if pool is None:
+        return
+
+    pool.refs -= 1
+    if pool.refs > 0:
+        return
+
+    hass.data.pop(DATA_SESSION)
+    if pool.unsub_close is not None:
+        pool.unsub_close()
+        pool.unsub_close = None
+    await pool.session.close()
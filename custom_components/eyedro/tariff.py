@@ -0,0 +1,307 @@
+"""Time-of-use tariffs and the cost of the energy Eyedro devices use."""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import math
+import re
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import TARIFF_COMPILE_DAYS
+
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MINUTES_PER_DAY = 1440
+
+_PERIOD_PATTERN = re.compile(r"^[a-z][a-z0-9_]*$")
+_TIME_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+@dataclass(frozen=True, slots=True)
+class TariffRule:
+    """Price of one period on some days of some months, for some hours."""
+
+    period: str
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    # [start, end) minutes after local midnight
+    minutes: tuple[tuple[int, int], ...]
+    price: float
+
+    def applies(self, month: int, weekday: int) -> bool:
+        """Return whether the rule is in force on days of a month and weekday."""
+        return month in self.months and weekday in self.weekdays
+
+
+@dataclass(frozen=True, slots=True)
+class Tariff:
+    """Time-of-use rate schedule: the first rule in force sets the price.
+
+    Written one rule per line (or separated by ``;``), each rule being
+    ``<period> <months> <days> <hours> <price per kWh>``::
+
+        peak      jun-sep  mon-fri  16:00-21:00        0.42
+        shoulder  jun-sep  mon-fri  07:00-16:00        0.24
+        peak      oct-may  mon-fri  07:00-11:00,17:00-21:00  0.31
+        off_peak  *        *        *                  0.12
+
+    Months are ``jan``-``dec`` or 1-12 and days ``mon``-``sun``, as lists
+    of single values and ranges, which may wrap around (``nov-feb``). Hours
+    are ``HH:MM-HH:MM`` local time, up to ``24:00``; a range such as
+    ``21:00-07:00`` covers both ends of each matching day. ``*`` matches
+    everything. Every minute of the year must be covered by some rule.
+    """
+
+    rules: tuple[TariffRule, ...]
+
+    @classmethod
+    def from_text(cls, text: str) -> Tariff:
+        """Parse a tariff.
+
+        Raises:
+            ValueError: If a rule is malformed or some time has no price
+        """
+        rules = []
+        for line in re.split(r"[\n;]", text):
+            line = line.split("#", 1)[0].strip()
+            if line:
+                rules.append(_parse_rule(line))
+        if not rules:
+            raise ValueError("the tariff has no rules")
+        tariff = cls(tuple(rules))
+        tariff._check_coverage()
+        return tariff
+
+    @property
+    def periods(self) -> tuple[str, ...]:
+        """Return the names of the periods, in the order they first appear."""
+        return tuple(dict.fromkeys(rule.period for rule in self.rules))
+
+    def day_segments(self, month: int, weekday: int) -> list[tuple[int, TariffRule]]:
+        """Return the minute each rule takes over on days of a month and weekday."""
+        # Paint the day's minutes, the first rule last so it ends up on top
+        owners: list[TariffRule | None] = [None] * MINUTES_PER_DAY
+        for rule in reversed(self.rules):
+            if rule.applies(month, weekday):
+                for start, end in rule.minutes:
+                    owners[start:end] = [rule] * (end - start)
+
+        segments: list[tuple[int, TariffRule]] = []
+        for minute, rule in enumerate(owners):
+            if rule is None:
+                raise ValueError(
+                    f"no rule covers {WEEKDAYS[weekday]} in {MONTHS[month - 1]} "
+                    f"at {minute // 60:02d}:{minute % 60:02d}"
+                )
+            if not segments or segments[-1][1] is not rule:
+                segments.append((minute, rule))
+        return segments
+
+    def _check_coverage(self) -> None:
+        """Raise ValueError unless some rule covers every minute of the year."""
+        for month in range(1, 13):
+            for weekday in range(7):
+                self.day_segments(month, weekday)
+
+
+def _parse_rule(line: str) -> TariffRule:
+    """Parse one ``<period> <months> <days> <hours> <price>`` rule."""
+    fields = line.split()
+    if len(fields) != 5:
+        raise ValueError(f"expected period, months, days, hours and price in '{line}'")
+    period, months, weekdays, hours, price = fields
+    period = period.lower()
+    if not _PERIOD_PATTERN.match(period):
+        raise ValueError(
+            f"period '{period}' must be a letter followed by letters, digits or _"
+        )
+    try:
+        value = float(price)
+    except ValueError:
+        raise ValueError(f"price '{price}' is not a number") from None
+    if not math.isfinite(value):
+        raise ValueError(f"price '{price}' is not a number")
+    return TariffRule(
+        period,
+        _parse_set(months, MONTHS, 1),
+        _parse_set(weekdays, WEEKDAYS, 0),
+        _parse_hours(hours),
+        value,
+    )
+
+
+def _parse_set(text: str, names: tuple[str, ...], first: int) -> frozenset[int]:
+    """Parse a list of names (or numbers) and wrapping ranges of them."""
+    if text == "*":
+        return frozenset(range(first, first + len(names)))
+
+    def _value(item: str) -> int:
+        item = item.lower()
+        if item in names:
+            return names.index(item)
+        if item.isdigit() and first <= int(item) < first + len(names):
+            return int(item) - first
+        raise ValueError(f"'{item}' is not one of {', '.join(names)}")
+
+    values: set[int] = set()
+    for item in text.split(","):
+        low, _, high = item.partition("-")
+        start = _value(low)
+        end = _value(high) if high else start
+        # Ranges wrap around the end of the year or week
+        for offset in range((end - start) % len(names) + 1):
+            values.add((start + offset) % len(names) + first)
+    return frozenset(values)
+
+
+def _parse_hours(text: str) -> tuple[tuple[int, int], ...]:
+    """Parse ``*`` or a list of ``HH:MM-HH:MM`` ranges into minutes of the day."""
+    if text == "*":
+        return ((0, MINUTES_PER_DAY),)
+    spans: list[tuple[int, int]] = []
+    for item in text.split(","):
+        start, _, end = item.partition("-")
+        low, high = _parse_time(start), _parse_time(end)
+        if low == high:
+            raise ValueError(f"hours '{item}' are empty")
+        if low < high:
+            spans.append((low, high))
+        else:
+            # Past midnight: the end of the day and the start of it
+            spans.extend(((low, MINUTES_PER_DAY), (0, high)))
+    return tuple(span for span in spans if span[0] < span[1])
+
+
+def _parse_time(text: str) -> int:
+    """Parse ``HH:MM`` into minutes after midnight, allowing 24:00."""
+    if not (match := _TIME_PATTERN.match(text)):
+        raise ValueError(f"'{text}' is not a time like 07:30")
+    hours, minutes = int(match[1]), int(match[2])
+    if minutes > 59 or hours * 60 + minutes > MINUTES_PER_DAY:
+        raise ValueError(f"'{text}' is not a time of day")
+    return hours * 60 + minutes
+
+
+def _local_date(timestamp: float) -> date:
+    """Return the local date of a Unix timestamp."""
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).date()
+
+
+class TariffIndex:
+    """Intervals of constant price, compiled ahead from a tariff.
+
+    The rules are evaluated once per (month, weekday) and laid out as
+    sorted interval boundaries in Unix time for TARIFF_COMPILE_DAYS local
+    days at a time, so DST changes fall where they belong. A lookup is a
+    binary search over the boundaries, skipped entirely while timestamps
+    stay in the interval of the previous lookup or move on to the next,
+    which is how samples arrive. Either way its cost does not depend on
+    the number of rules.
+    """
+
+    def __init__(self, tariff: Tariff) -> None:
+        """Initialize the index; nothing is compiled until the first lookup."""
+        self.tariff = tariff
+        self._days: dict[tuple[int, int], list[tuple[int, TariffRule]]] = {}
+        # Interval i runs from _bounds[i] to _bounds[i + 1] at _rules[i]'s price
+        self._bounds: list[float] = []
+        self._rules: list[TariffRule] = []
+        self._position = 0
+
+    def lookup(self, timestamp: float) -> tuple[TariffRule, float]:
+        """Return the rule in force at a Unix timestamp and when it stops being."""
+        bounds = self._bounds
+        position = self._position
+        if not (bounds and bounds[position] <= timestamp < bounds[position + 1]):
+            if position + 2 < len(bounds) and bounds[position + 1] <= timestamp < bounds[
+                position + 2
+            ]:
+                position += 1
+            else:
+                if not (bounds and bounds[0] <= timestamp < bounds[-1]):
+                    self._compile(_local_date(timestamp))
+                    bounds = self._bounds
+                position = bisect_right(bounds, timestamp) - 1
+            self._position = position
+        return self._rules[position], bounds[position + 1]
+
+    def _compile(self, first_day: date) -> None:
+        """Lay out the intervals of TARIFF_COMPILE_DAYS days from a local date."""
+        bounds: list[float] = []
+        rules: list[TariffRule] = []
+        for offset in range(TARIFF_COMPILE_DAYS):
+            day = first_day + timedelta(days=offset)
+            key = (day.month, day.weekday())
+            if (segments := self._days.get(key)) is None:
+                segments = self._days[key] = self.tariff.day_segments(*key)
+            midnight = dt_util.start_of_local_day(day)
+            for minute, rule in segments:
+                start = (midnight + timedelta(minutes=minute)).timestamp()
+                if bounds and start <= bounds[-1]:
+                    # Skipped by the clock going forward
+                    rules[-1] = rule
+                elif not rules or rules[-1] is not rule:
+                    bounds.append(start)
+                    rules.append(rule)
+        end = dt_util.start_of_local_day(first_day + timedelta(days=TARIFF_COMPILE_DAYS))
+        bounds.append(end.timestamp())
+        self._bounds = bounds
+        self._rules = rules
+        self._position = 0
+
+
+class TariffMeter:
+    """Cost of the energy a device uses, per period and in total.
+
+    Fed consecutive pieces of energy with their wall-clock start and end,
+    like DemandTracker. A piece crossing a price change is split at the
+    change in proportion to time, so each part is billed at its own price.
+    Only consumed energy costs anything, like the energy sensors count.
+    """
+
+    def __init__(self, tariff: Tariff) -> None:
+        """Start from zero cost."""
+        self.tariff = tariff
+        self._index = TariffIndex(tariff)
+        self.costs: dict[str, float] = dict.fromkeys(tariff.periods, 0.0)
+        self.total = 0.0
+
+    @callback
+    def add(self, start: float, end: float, watt_seconds: float) -> None:
+        """Include the energy used between two Unix timestamps."""
+        if end <= start or watt_seconds <= 0:
+            return
+        # kWh per second
+        power = watt_seconds / (end - start) / 3_600_000
+        while start < end:
+            rule, change = self._index.lookup(start)
+            piece_end = min(end, change)
+            cost = power * (piece_end - start) * rule.price
+            self.costs[rule.period] += cost
+            self.total += cost
+            start = piece_end
+
+    def rate_at(self, timestamp: float) -> tuple[TariffRule, datetime]:
+        """Return the rule in force at a Unix timestamp and when the price changes next."""
+        rule, change = self._index.lookup(timestamp)
+        return rule, dt_util.utc_from_timestamp(change)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the costs to keep across restarts."""
+        return {"costs": self.costs, "total": self.total}
+
+    def restore(self, stored: Mapping[str, Any]) -> None:
+        """Load costs saved by as_dict; periods no longer in the tariff are dropped.
+
+        The total is the sum of the periods kept, so it always matches the
+        period sensors, even after a period was removed from the tariff.
+        """
+        for period, cost in stored.get("costs", {}).items():
+            if period in self.costs:
+                self.costs[period] = cost
+        self.total = sum(self.costs.values())
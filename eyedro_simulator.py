@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""Local stand-in for Eyedro devices.
+
+Serves the /getdata endpoint for any number of simulated meters, one TCP
+port per meter, so the integration, the benchmarks and the API test script
+can run without hardware. Uses only Python standard library (no external
+dependencies).
+
+Each meter produces a realistic load waveform: a base load with a slow
+daily swing, a cycling compressor and randomly switched appliances. Voltage
+sags slightly under load and current follows from power, voltage and power
+factor. Faults can be injected per request: added latency with jitter,
+malformed payloads, connection resets and requests that never get an
+answer, so the client times out.
+
+Usage:
+    python3 eyedro_simulator.py [--devices N] [--base-port PORT] [options]
+
+Example:
+    python3 eyedro_simulator.py --devices 10 --latency 20 --jitter 10
+    python3 eyedro_simulator.py --devices 1 --channels 4 --malformed-rate 0.05
+    python3 eyedro_simulator.py --devices 100 --timeout-rate 0.01 --reset-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import ipaddress
+import json
+import math
+import random
+import socket
+import struct
+import time
+
+DEFAULT_BASE_PORT = 18080
+
+# (name, watts, on seconds, off seconds) for loads switched at random
+APPLIANCES = (
+    ("kettle", 1500, 150, 3600),
+    ("dryer", 2800, 2400, 14400),
+    ("microwave", 1100, 180, 5400),
+    ("ev_charger", 7200, 7200, 43200),
+    ("heat_pump", 3500, 900, 1800),
+)
+
+MALFORMED_BODIES = (
+    b'{"data": [[988, 11665]]}',
+    b'{"dat": [[988, 11665, 11800, 1360, 0]]}',
+    b'{"data": "offline"}',
+    b'{"data": [[988, 11665, 11800',
+    b"<html>Service Unavailable</html>",
+)
+
+
+@dataclass
+class FaultProfile:
+    """Faults injected into every simulated meter."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    malformed_rate: float = 0.0
+    reset_rate: float = 0.0
+    timeout_rate: float = 0.0
+
+
+@dataclass
+class _Appliance:
+    """Random on/off state of one appliance on a channel."""
+
+    watts: int
+    on_seconds: float
+    off_seconds: float
+    on: bool = False
+    toggle_at: float = 0.0
+
+
+@dataclass
+class SimulatedMeter:
+    """Generates /getdata readings for one meter."""
+
+    channels: int = 2
+    seed: int | None = None
+    time_scale: float = 1.0
+    started: float = field(default_factory=time.monotonic)
+    requests: int = 0
+
+    def __post_init__(self) -> None:
+        """Pick the meter's loads."""
+        self._random = random.Random(self.seed)
+        self._base = [self._random.uniform(150, 600) for _ in range(self.channels)]
+        self._phase = self._random.uniform(0, 2 * math.pi)
+        self._compressor_period = self._random.uniform(900, 2400)
+        self._appliances = [
+            [
+                _Appliance(
+                    watts,
+                    on_seconds,
+                    off_seconds,
+                    toggle_at=self._random.expovariate(1 / off_seconds),
+                )
+                for _name, watts, on_seconds, off_seconds in self._random.sample(
+                    APPLIANCES, k=2
+                )
+            ]
+            for _ in range(self.channels)
+        ]
+
+    def elapsed(self) -> float:
+        """Return simulated seconds since the meter started."""
+        return (time.monotonic() - self.started) * self.time_scale
+
+    def _channel_power(self, channel: int, now: float) -> float:
+        """Return the load on one channel in watts."""
+        power = self._base[channel] * (
+            1 + 0.3 * math.sin(2 * math.pi * now / 86400 + self._phase)
+        )
+        # Refrigerator compressor: 40% duty cycle
+        if (now % self._compressor_period) < 0.4 * self._compressor_period:
+            power += 120 if channel == 0 else 0
+        for appliance in self._appliances[channel]:
+            if now >= appliance.toggle_at:
+                appliance.on = not appliance.on
+                mean = appliance.on_seconds if appliance.on else appliance.off_seconds
+                appliance.toggle_at = now + self._random.expovariate(1 / mean)
+            if appliance.on:
+                power += appliance.watts
+        return max(0.0, power + self._random.gauss(0, 5))
+
+    def reading(self) -> list[list[int]]:
+        """Return one reading in raw device units."""
+        now = self.elapsed()
+        data = []
+        for channel in range(self.channels):
+            power = self._channel_power(channel, now)
+            voltage = 120.5 - power / 1500 + self._random.gauss(0, 0.15)
+            power_factor = min(1.0, 0.86 + 0.12 * min(power / 2000, 1.0))
+            current = power / (voltage * power_factor)
+            data.append(
+                [
+                    round(power_factor * 1000),
+                    round(voltage * 100),
+                    round(current * 1000),
+                    round(power),
+                    0,
+                ]
+            )
+        return data
+
+    def body(self, faults: FaultProfile) -> bytes | None:
+        """Return the response body, a malformed one, or None for a reset."""
+        self.requests += 1
+        roll = self._random.random()
+        if roll < faults.reset_rate:
+            return None
+        if roll < faults.reset_rate + faults.malformed_rate:
+            return self._random.choice(MALFORMED_BODIES)
+        return json.dumps({"data": self.reading()}).encode()
+
+
+class EyedroSimulator:
+    """Serve a fleet of simulated meters on consecutive ports."""
+
+    def __init__(
+        self,
+        devices: int = 1,
+        channels: int = 2,
+        host: str = "127.0.0.1",
+        base_port: int = DEFAULT_BASE_PORT,
+        faults: FaultProfile | None = None,
+        time_scale: float = 1.0,
+        seed: int | None = None,
+        spread_hosts: bool = False,
+    ) -> None:
+        """Initialize the simulator.
+
+        With spread_hosts every meter also gets its own address, counting up
+        from host, like devices on a real network.
+        """
+        self.host = host
+        self.spread_hosts = spread_hosts
+        self.base_port = base_port
+        self.faults = faults or FaultProfile()
+        self.meters = [
+            SimulatedMeter(
+                channels=channels,
+                seed=None if seed is None else seed + index,
+                time_scale=time_scale,
+            )
+            for index in range(devices)
+        ]
+        self._servers: list[asyncio.Server] = []
+        self._connections: dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._random = random.Random(seed)
+
+    @property
+    def ports(self) -> list[int]:
+        """Return the port of every meter."""
+        return [self.base_port + index for index in range(len(self.meters))]
+
+    @property
+    def hosts(self) -> list[str]:
+        """Return the address of every meter."""
+        if not self.spread_hosts:
+            return [self.host] * len(self.meters)
+        first = ipaddress.ip_address(self.host)
+        return [str(first + index) for index in range(len(self.meters))]
+
+    async def start(self) -> None:
+        """Start listening for every meter."""
+        for host, port, meter in zip(self.hosts, self.ports, self.meters):
+            server = await asyncio.start_server(
+                lambda reader, writer, meter=meter: self._handle(meter, reader, writer),
+                host,
+                port,
+                reuse_address=True,
+            )
+            self._servers.append(server)
+
+    async def stop(self) -> None:
+        """Stop every meter."""
+        for server in self._servers:
+            server.close()
+        # Idle keep-alive connections would otherwise hold the servers open
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*self._connections.values(), return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+
+    async def __aenter__(self) -> EyedroSimulator:
+        """Start the simulator as an async context manager."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop the simulator."""
+        await self.stop()
+
+    async def _handle(
+        self,
+        meter: SimulatedMeter,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Serve keep-alive HTTP/1.1 requests on one connection."""
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    if header.lower().startswith(b"connection:") and b"close" in header.lower():
+                        keep_alive = False
+
+                delay = self.faults.latency + self._random.uniform(0, self.faults.jitter)
+                if delay:
+                    await asyncio.sleep(delay / 1000)
+
+                parts = request_line.split()
+                if self._random.random() < self.faults.timeout_rate:
+                    # Never answer; wait for the client to give up and close
+                    await reader.read()
+                    return
+                if len(parts) < 2 or parts[1].split(b"?")[0] != b"/getdata":
+                    self._write(writer, 404, b"Not Found", keep_alive)
+                elif (body := meter.body(self.faults)) is None:
+                    _reset(writer)
+                    return
+                else:
+                    self._write(writer, 200, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            if not writer.is_closing():
+                writer.close()
+
+    @staticmethod
+    def _write(
+        writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool
+    ) -> None:
+        """Write one HTTP response."""
+        reason = "OK" if status == 200 else "Not Found"
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n".encode()
+            + body
+        )
+
+
+def _reset(writer: asyncio.StreamWriter) -> None:
+    """Abort the connection with a TCP RST instead of a clean close."""
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    writer.transport.abort()
+
+
+async def _run(args: argparse.Namespace) -> None:
+    """Run the simulator until interrupted."""
+    simulator = EyedroSimulator(
+        devices=args.devices,
+        channels=args.channels,
+        host=args.host,
+        base_port=args.base_port,
+        faults=FaultProfile(
+            latency=args.latency,
+            jitter=args.jitter,
+            malformed_rate=args.malformed_rate,
+            reset_rate=args.reset_rate,
+            timeout_rate=args.timeout_rate,
+        ),
+        time_scale=args.time_scale,
+        seed=args.seed,
+        spread_hosts=args.spread_hosts,
+    )
+    async with simulator:
+        hosts, ports = simulator.hosts, simulator.ports
+        host = f"{hosts[0]}-{hosts[-1]}" if args.spread_hosts else hosts[0]
+        print(
+            f"Simulating {len(ports)} Eyedro device(s) on "
+            f"http://{host}:{ports[0]}-{ports[-1]}/getdata",
+            flush=True,
+        )
+        await asyncio.Event().wait()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Simulate Eyedro devices locally")
+    parser.add_argument("--devices", type=int, default=1, help="Number of meters (default: 1)")
+    parser.add_argument("--channels", type=int, default=2, help="Channels per meter (default: 2)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument(
+        "--spread-hosts",
+        action="store_true",
+        help="Give every meter its own address counting up from --host "
+        "(the whole of 127.0.0.0/8 works on Linux)",
+    )
+    parser.add_argument(
+        "--base-port",
+        type=int,
+        default=DEFAULT_BASE_PORT,
+        help=f"Port of the first meter, the rest follow (default: {DEFAULT_BASE_PORT})",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency up to this many ms")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of malformed responses")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Fraction of connection resets")
+    parser.add_argument(
+        "--timeout-rate", type=float, default=0.0, help="Fraction of requests never answered"
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="Simulated seconds per real second, to compress load cycles",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for repeatable runs")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
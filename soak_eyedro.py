@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""Soak test for the Eyedro integration against a faulty simulated fleet.
+
+Loads one config entry per simulated meter through the real
+async_setup_entry, so the coordinators, the sensor platform and every
+feature the options turn on run as they would in Home Assistant, only with
+short poll intervals and compressed simulated time. eyedro_simulator.py
+runs in a separate process and injects timeouts, connection resets and
+malformed JSON; a few entries are reloaded every so often to exercise
+setup and unload, and every device has a live feed subscriber.
+
+While it runs, it samples:
+
+- resident memory (RSS)
+- live objects, by type
+- open sockets
+- event loop lag percentiles, from a timer measuring how late it wakes
+
+After a warm-up each series is fitted with a straight line. If any of them
+grows by more than its tolerance over the run, the soak fails with exit
+status 1, so it can gate a release. The tolerance is never less than three
+standard errors of the fitted rise, so noise in a short run is not taken
+for a trend. RSS and sockets are read from /proc
+and need Linux.
+
+Run from the repository root with Home Assistant installed.
+
+Usage:
+    python3 soak_eyedro.py [--devices 200] [--duration 600] [options]
+
+Example:
+    python3 soak_eyedro.py --devices 300 --duration 3600 --timeout-rate 0.02
+    python3 soak_eyedro.py --devices 50 --duration 300 --report soak.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import gc
+import inspect
+import ipaddress
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+from typing import Any
+
+from homeassistant import config_entries, loader
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity, entity_registry as er
+
+from custom_components.eyedro.const import (
+    CONF_DEMAND,
+    CONF_FAST_START,
+    CONF_HISTORY,
+    CONF_HUB_MODE,
+    CONF_LOAD_EVENTS,
+    CONF_ROLLING_STATISTICS,
+    CONF_TARIFF,
+    DOMAIN,
+)
+from custom_components.eyedro.live import async_get_live_feed
+from eyedro_simulator import DEFAULT_BASE_PORT
+
+SIMULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eyedro_simulator.py")
+
+# Options of every entry unless --bare; hub mode alternates between entries.
+# Long-term statistics are left out as they need the recorder.
+SOAK_OPTIONS = {
+    CONF_DEMAND: True,
+    CONF_FAST_START: True,
+    CONF_HISTORY: True,
+    CONF_LOAD_EVENTS: True,
+    CONF_ROLLING_STATISTICS: True,
+    CONF_TARIFF: "peak * mon-fri 07:00-11:00,17:00-21:00 0.31\noff_peak * * * 0.12",
+}
+
+# How often the lag probe wakes, in seconds
+LAG_PROBE_INTERVAL = 0.05
+
+# Standard errors a rise must exceed before it counts as a trend. Noisy series
+# such as lag percentiles need a longer run, with more samples, to show one.
+TREND_SIGMAS = 3
+
+# Series checked for upward trends: (name, absolute tolerance option, relative tolerance)
+TRENDS = (
+    ("rss_mb", "rss_tolerance", 0.05),
+    ("sockets", "socket_tolerance", 0.1),
+    ("lag_p50_ms", "lag_tolerance", 0.5),
+    ("lag_p99_ms", "lag_tolerance", 0.5),
+)
+
+# Logged for every injected fault; anything else logged is worth seeing
+EXPECTED_ERROR = "Error fetching %s data: %s"
+
+# Object types listed in the report, the fastest growing first
+TOP_OBJECT_TYPES = 10
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return the given percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _growth(times: list[float], values: list[float]) -> tuple[float, float, float]:
+    """Return where a least squares line through the values starts, how much it
+    rises, and the standard error of that rise."""
+    count = len(times)
+    mean_t = sum(times) / count
+    mean_v = sum(values) / count
+    spread = sum((t - mean_t) ** 2 for t in times)
+    if not spread:
+        return mean_v, 0.0, 0.0
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / spread
+    span = times[-1] - times[0]
+    start = mean_v + slope * (times[0] - mean_t)
+    if count < 3:
+        return start, slope * span, 0.0
+    residuals = sum((v - mean_v - slope * (t - mean_t)) ** 2 for t, v in zip(times, values))
+    error = math.sqrt(residuals / (count - 2) / spread) * span
+    return start, slope * span, error
+
+
+def _rss_mb() -> float | None:
+    """Return the resident memory of this process in MiB."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            pages = int(file.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _open_sockets() -> int | None:
+    """Return the number of sockets this process has open."""
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return None
+    count = 0
+    for fd in fds:
+        try:
+            count += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            # Closed while listing
+            pass
+    return count
+
+
+def _object_counts() -> Counter[str]:
+    """Return the number of live objects tracked by the garbage collector, by type."""
+    gc.collect()
+    counts: Counter[str] = Counter()
+    for obj in gc.get_objects():
+        cls = type(obj)
+        module = cls.__module__
+        counts[cls.__qualname__ if module == "builtins" else f"{module}.{cls.__qualname__}"] += 1
+    return counts
+
+
+def _is_unexpected(record: logging.LogRecord) -> bool:
+    """Return whether a log record is more than a failed poll."""
+    return record.msg != EXPECTED_ERROR
+
+
+def _config_entry(
+    index: int, host: str, port: int, args: argparse.Namespace
+) -> config_entries.ConfigEntry:
+    """Return a config entry for one simulated meter."""
+    options = {} if args.bare else {**SOAK_OPTIONS, CONF_HUB_MODE: index % 2 == 1}
+    kwargs: dict[str, Any] = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": DOMAIN,
+        "title": f"Soak {index}",
+        "data": {
+            CONF_HOST: host,
+            CONF_PORT: port,
+            CONF_SCAN_INTERVAL: args.scan_interval,
+        },
+        "options": options,
+        "source": config_entries.SOURCE_USER,
+        "unique_id": f"soak_{index}",
+    }
+    # Required by newer Home Assistant releases
+    parameters = inspect.signature(config_entries.ConfigEntry).parameters
+    if "discovery_keys" in parameters:
+        kwargs["discovery_keys"] = MappingProxyType({})
+    if "subentries_data" in parameters:
+        kwargs["subentries_data"] = ()
+    return config_entries.ConfigEntry(**kwargs)
+
+
+class _LagProbe:
+    """Timer measuring how late the event loop wakes it."""
+
+    def __init__(self) -> None:
+        """Start without measurements."""
+        self.lags: list[float] = []
+        self.skip = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start probing."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop probing."""
+        if self._task is not None:
+            self._task.cancel()
+
+    def take(self) -> list[float]:
+        """Return the lags in seconds since the last call."""
+        lags, self.lags = self.lags, []
+        return lags
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag = loop.time() - start - LAG_PROBE_INTERVAL
+            if self.skip:
+                # Spans a snapshot of every object, which blocks on purpose
+                self.skip = False
+            else:
+                self.lags.append(max(0.0, lag))
+
+
+async def _start_simulator(args: argparse.Namespace) -> asyncio.subprocess.Process:
+    """Start the simulated fleet in its own process, so it does not skew the samples."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        SIMULATOR,
+        "--devices", str(args.devices),
+        "--channels", str(args.channels),
+        "--host", args.host,
+        "--base-port", str(args.base_port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--malformed-rate", str(args.malformed_rate),
+        "--reset-rate", str(args.reset_rate),
+        "--timeout-rate", str(args.timeout_rate),
+        "--time-scale", str(args.time_scale),
+        "--seed", "1",
+        # Sensors are unique by host, so every meter needs its own
+        "--spread-hosts",
+        stdout=asyncio.subprocess.PIPE,
+    )
+    # Listening once it says so
+    if not await process.stdout.readline():
+        raise RuntimeError("eyedro_simulator.py exited before listening")
+    return process
+
+
+async def _start_hass(config_dir: str) -> HomeAssistant:
+    """Return a minimal Home Assistant with config entries and registries."""
+    hass = HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    entity.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await asyncio.gather(dr.async_load(hass), er.async_load(hass))
+    await hass.async_start()
+    return hass
+
+
+def _poll_counts(hass: HomeAssistant, last: dict[str, tuple[Any, int, int, int]]) -> list[int]:
+    """Return the successful, failed and timed out polls since the last call."""
+    totals = [0, 0, 0]
+    for entry_id, coordinator in hass.data.get(DOMAIN, {}).items():
+        stats = coordinator.api.stats
+        counts = (stats.successes, stats.failures, stats.timeouts)
+        previous = last.get(entry_id)
+        # A reloaded entry starts counting again with a new API client
+        base = previous[1:] if previous is not None and previous[0] is coordinator.api else (0, 0, 0)
+        for index, (count, old) in enumerate(zip(counts, base)):
+            totals[index] += count - old
+        last[entry_id] = (coordinator.api, *counts)
+    return totals
+
+
+def _trends(samples: list[dict[str, Any]], args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Return the growth of every series after the warm-up, worst object types included."""
+    measured = [sample for sample in samples if sample["elapsed"] >= args.warmup]
+    times = [sample["elapsed"] for sample in measured]
+    trends = []
+    for name, option, relative in TRENDS:
+        values = [sample[name] for sample in measured]
+        if None in values:
+            continue
+        start, growth, error = _growth(times, values)
+        tolerance = max(getattr(args, option), relative * start, TREND_SIGMAS * error)
+        trends.append(
+            {
+                "series": name,
+                "start": start,
+                "growth": growth,
+                "tolerance": tolerance,
+                "failed": growth > tolerance,
+            }
+        )
+
+    object_trends = []
+    for type_name in set().union(*(sample["objects"] for sample in measured)):
+        start, growth, error = _growth(
+            times, [sample["objects"].get(type_name, 0) for sample in measured]
+        )
+        tolerance = max(args.object_tolerance, 0.05 * start, TREND_SIGMAS * error)
+        object_trends.append(
+            {
+                "series": f"objects {type_name}",
+                "start": start,
+                "growth": growth,
+                "tolerance": tolerance,
+                "failed": growth > tolerance,
+            }
+        )
+    object_trends.sort(key=lambda trend: trend["growth"], reverse=True)
+    failed = [trend for trend in object_trends if trend["failed"]]
+    return trends + (failed or object_trends[:TOP_OBJECT_TYPES])
+
+
+async def _soak(args: argparse.Namespace) -> bool:
+    """Run the soak and return whether every series stayed flat."""
+    simulator = await _start_simulator(args)
+    probe = _LagProbe()
+    samples: list[dict[str, Any]] = []
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await _start_hass(config_dir)
+            first = ipaddress.ip_address(args.host)
+            entries = [
+                _config_entry(index, str(first + index), args.base_port + index, args)
+                for index in range(args.devices)
+            ]
+            for entry in entries:
+                await hass.config_entries.async_add(entry)
+            await hass.async_block_till_done()
+
+            # A websocket client on every device's live feed
+            for entry in entries:
+                async_get_live_feed(hass, entry.entry_id).async_subscribe(
+                    lambda message: None, 1.0
+                )
+
+            loaded = sum(entry.state is config_entries.ConfigEntryState.LOADED for entry in entries)
+            print(f"Loaded {loaded} of {len(entries)} entries, soaking for {args.duration:.0f}s")
+            print(
+                f"{'elapsed':>8} {'rss MiB':>8} {'objects':>9} {'sockets':>8} "
+                f"{'lag p50':>8} {'lag p99':>8} {'lag max':>8} {'ok':>7} {'failed':>7} "
+                f"{'timeout':>7}"
+            )
+
+            rng = random.Random(1)
+            polls: dict[str, tuple[Any, int, int, int]] = {}
+            started = time.monotonic()
+            next_reload = args.reload_interval
+            probe.start()
+            while (elapsed := time.monotonic() - started) < args.duration:
+                await asyncio.sleep(args.sample_interval)
+                elapsed = time.monotonic() - started
+
+                if args.reload_interval and elapsed >= next_reload:
+                    next_reload += args.reload_interval
+                    for entry in rng.sample(entries, min(args.reload_count, len(entries))):
+                        await hass.config_entries.async_reload(entry.entry_id)
+
+                lags = [lag * 1000 for lag in probe.take()] or [0.0]
+                probe.skip = True
+                objects = _object_counts()
+                sample = {
+                    "elapsed": elapsed,
+                    "rss_mb": _rss_mb(),
+                    "sockets": _open_sockets(),
+                    "lag_p50_ms": _percentile(lags, 50),
+                    "lag_p99_ms": _percentile(lags, 99),
+                    "lag_max_ms": max(lags),
+                    "polls": _poll_counts(hass, polls),
+                    "objects": objects,
+                }
+                samples.append(sample)
+                print(
+                    f"{elapsed:>8.0f} {sample['rss_mb'] or 0:>8.1f} {objects.total():>9} "
+                    f"{sample['sockets'] or 0:>8} {sample['lag_p50_ms']:>8.2f} "
+                    f"{sample['lag_p99_ms']:>8.2f} {sample['lag_max_ms']:>8.2f} "
+                    + " ".join(f"{count:>7}" for count in sample["polls"])
+                )
+
+            probe.stop()
+            for entry in entries:
+                await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_stop()
+    finally:
+        probe.stop()
+        simulator.terminate()
+        await simulator.wait()
+
+    measured = [sample for sample in samples if sample["elapsed"] >= args.warmup]
+    if len(measured) < 3:
+        print("Too few samples after the warm-up to judge a trend; run longer")
+        return False
+
+    trends = _trends(samples, args)
+    print()
+    print(f"{'series':<60} {'start':>10} {'growth':>10} {'tolerance':>10}")
+    for trend in trends:
+        print(
+            f"{trend['series']:<60} {trend['start']:>10.1f} {trend['growth']:>10.1f} "
+            f"{trend['tolerance']:>10.1f}{'  FAIL' if trend['failed'] else ''}"
+        )
+    ok = not any(trend["failed"] for trend in trends)
+    print("PASS" if ok else "FAIL: growing over the soak")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump({"samples": samples, "trends": trends, "passed": ok}, file, indent=2)
+    return ok
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Soak the Eyedro integration against simulated meters with faults"
+    )
+    parser.add_argument("--devices", type=int, default=200, help="Simulated meters (default: 200)")
+    parser.add_argument("--channels", type=int, default=2, help="Channels per meter (default: 2)")
+    parser.add_argument(
+        "--duration", type=float, default=600, help="Seconds to run for (default: 600)"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=60,
+        help="Seconds before samples count toward trends (default: 60)",
+    )
+    parser.add_argument(
+        "--sample-interval", type=float, default=10, help="Seconds between samples (default: 10)"
+    )
+    parser.add_argument(
+        "--scan-interval", type=float, default=1.0, help="Poll interval in seconds (default: 1)"
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=60,
+        help="Simulated seconds per real second (default: 60)",
+    )
+    parser.add_argument(
+        "--bare", action="store_true", help="Use default options instead of every feature"
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=60,
+        help="Seconds between entry reloads, 0 to never reload (default: 60)",
+    )
+    parser.add_argument(
+        "--reload-count", type=int, default=5, help="Entries reloaded each time (default: 5)"
+    )
+    parser.add_argument("--latency", type=float, default=5.0, help="Simulated latency in ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="Simulated jitter in ms")
+    parser.add_argument(
+        "--timeout-rate", type=float, default=0.005, help="Fraction of requests never answered"
+    )
+    parser.add_argument(
+        "--reset-rate", type=float, default=0.01, help="Fraction of connection resets"
+    )
+    parser.add_argument(
+        "--malformed-rate", type=float, default=0.01, help="Fraction of malformed responses"
+    )
+    parser.add_argument(
+        "--rss-tolerance", type=float, default=10, help="Allowed RSS growth in MiB (default: 10)"
+    )
+    parser.add_argument(
+        "--object-tolerance",
+        type=float,
+        default=1000,
+        help="Allowed growth in live objects of any one type (default: 1000)",
+    )
+    parser.add_argument(
+        "--socket-tolerance", type=float, default=10, help="Allowed growth in open sockets"
+    )
+    parser.add_argument(
+        "--lag-tolerance",
+        type=float,
+        default=5,
+        help="Allowed growth in event loop lag percentiles in ms (default: 5)",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address of the first simulated meter, the rest count up (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--base-port",
+        type=int,
+        default=DEFAULT_BASE_PORT,
+        help=f"Port of the first simulated meter (default: {DEFAULT_BASE_PORT})",
+    )
+    parser.add_argument("--report", help="Write every sample and trend to this JSON file")
+    parser.add_argument(
+        "--verbose", action="store_true", help="Also log the failed polls the faults cause"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if not args.verbose:
+        for handler in logging.getLogger().handlers:
+            handler.addFilter(_is_unexpected)
+
+    sys.exit(0 if asyncio.run(_soak(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
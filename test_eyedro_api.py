@@ -1,28 +1,89 @@
 #!/usr/bin/env python3
-"""Test script to validate Eyedro API response format.
+"""Test script for Eyedro devices: response validation and load testing.
+
+Without --duration, queries each device once and validates that the
+response matches the expected format from the official API documentation.
+
+With --duration, polls every device concurrently at a target rate for that
+many seconds over keep-alive connections, streams every sample as NDJSON
+(wall-clock timestamp, round-trip time, status, error and the raw channel
+data) to stdout or a file, and prints p50/p95/p99 latency and error rates
+per device to stderr. Use it to size poll rates before rolling out to a new
+site; the captures can be replayed or analysed offline.
 
-This script queries an Eyedro device and validates that the response
-matches the expected format from the official API documentation.
 Uses only Python standard library (no external dependencies).
 
+Devices are given as HOST, HOST:PORT or HOST:FIRST-LAST for a range of
+ports, such as a fleet started by eyedro_simulator.py.
+
 Usage:
-    python3 test_eyedro_api.py <IP_ADDRESS> [PORT]
+    python3 test_eyedro_api.py HOST[:PORT] [HOST[:PORT] ...]
+    python3 test_eyedro_api.py HOST[:PORT] ... --duration SECONDS [--rate HZ] [--output FILE]
 
 Example:
     python3 test_eyedro_api.py 192.168.2.66
-    python3 test_eyedro_api.py 192.168.2.66 8080
+    python3 test_eyedro_api.py 192.168.2.66:8080
+    python3 test_eyedro_api.py 192.168.2.66 192.168.2.67 --duration 600 --rate 1 --output site.ndjson
+    python3 test_eyedro_api.py 127.0.0.1:18080-18099 --duration 60 --rate 5 > /dev/null
 """
+from __future__ import annotations
+
 import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
 import json
 import sys
-import urllib.request
+import time
+from typing import Any, TextIO
 import urllib.error
-from typing import Any
+import urllib.request
+
+DEFAULT_PORT = 8080
+DEFAULT_TIMEOUT = 10.0
+
+
+def parse_targets(specs: list[str], default_port: int = DEFAULT_PORT) -> list[tuple[str, int]]:
+    """Expand HOST, HOST:PORT and HOST:FIRST-LAST into (host, port) pairs.
+
+    An IPv6 address takes a port in brackets, [ADDR]:PORT; given bare, it
+    uses the default port.
+    """
+    targets = []
+    for spec in specs:
+        if spec.startswith("["):
+            host, bracket, ports = spec[1:].partition("]")
+            if not bracket or (ports and not ports.startswith(":")):
+                raise argparse.ArgumentTypeError(f"invalid device: {spec}")
+            ports = ports[1:]
+        elif spec.count(":") > 1:
+            host, ports = spec, ""
+        else:
+            host, _, ports = spec.rpartition(":")
+            if not host:
+                host, ports = spec, ""
+        if not ports:
+            targets.append((host, default_port))
+            continue
+        first, _, last = ports.partition("-")
+        try:
+            port_range = range(int(first), int(last or first) + 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid device: {spec}") from None
+        if not port_range:
+            raise argparse.ArgumentTypeError(f"empty port range: {spec}")
+        targets.extend((host, port) for port in port_range)
+    return targets
+
+
+def _netloc(host: str, port: int) -> str:
+    """Return host:port, with an IPv6 address in brackets."""
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
 
 
 def test_eyedro_api(host: str, port: int = 8080) -> None:
     """Test the Eyedro API endpoint and validate response format."""
-    url = f"http://{host}:{port}/getdata"
+    url = f"http://{_netloc(host, port)}/getdata"
     print(f"Testing Eyedro API at: {url}")
     print("-" * 60)
 
@@ -134,27 +195,374 @@ def test_eyedro_api(host: str, port: int = 8080) -> None:
         sys.exit(1)
 
 
+def parse_getdata(body: bytes) -> list[list[int]]:
+    """Return the channel data of a /getdata body.
+
+    Raises:
+        ValueError: If the body is not a valid response
+    """
+    try:
+        data = json.loads(body)["data"]
+    except (KeyError, TypeError):
+        raise ValueError("missing 'data' key") from None
+    if not isinstance(data, list) or not data:
+        raise ValueError("'data' is not a non-empty list")
+    for channel in data:
+        if not isinstance(channel, list) or len(channel) < 4:
+            raise ValueError("channel has fewer than 4 elements")
+        if not all(isinstance(value, int) for value in channel[:4]):
+            raise ValueError("channel values are not integers")
+    return data
+
+
+class ConnectError(OSError):
+    """Error to indicate the device did not accept a connection."""
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection to a device, reopened as needed."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize without connecting."""
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def get(self, path: str) -> tuple[int, bytes, float | None]:
+        """Request a path and return the status, body and connect time.
+
+        The connect time is None when a kept-alive connection was reused.
+        """
+        connect = None
+        if self._writer is None:
+            start = time.perf_counter()
+            try:
+                self._reader, self._writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            except OSError as err:
+                raise ConnectError(err.errno, str(err)) from err
+            connect = time.perf_counter() - start
+
+        self._writer.write(
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {_netloc(self.host, self.port)}\r\n"
+            "Connection: keep-alive\r\n\r\n".encode()
+        )
+        status, body, keep_alive = await self._read_response(self._reader)
+        if not keep_alive:
+            self.close()
+        return status, body, connect
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bytes, bool]:
+        """Read one response, returning its status, body and whether to keep the connection."""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by device")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise ConnectionError(f"malformed status line: {status_line!r}") from None
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+        keep_alive = headers.get("connection") != "close"
+
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            await reader.readline()
+            body = b"".join(chunks)
+        else:
+            # Delimited by the device closing the connection
+            body = await reader.read()
+            keep_alive = False
+        return status, body, keep_alive
+
+    def close(self) -> None:
+        """Drop the connection; the next request opens a new one."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+@dataclass
+class HostStats:
+    """Outcome of every request made to one device."""
+
+    rtts: list[float] = field(default_factory=list)
+    requests: int = 0
+    errors: Counter[str] = field(default_factory=Counter)
+    # Scheduled requests skipped because the previous one was still running
+    missed: int = 0
+    new_connections: int = 0
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return the given percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def _sample(connection: _Connection, timeout: float) -> dict[str, Any]:
+    """Make one request and return its NDJSON fields.
+
+    ``error`` is None on success, else one of ``timeout``, ``connect``
+    (refused or unreachable), ``reset`` (connection lost or garbled mid-request),
+    ``http_<status>`` or ``invalid`` (not a valid /getdata response).
+    """
+    record: dict[str, Any] = {"ts": time.time(), "error": None}
+    start = time.perf_counter()
+    try:
+        status, body, connect = await asyncio.wait_for(
+            connection.get("/getdata"), timeout
+        )
+    except asyncio.TimeoutError:
+        connection.close()
+        record["error"] = "timeout"
+        return record
+    except ConnectError:
+        record["error"] = "connect"
+        return record
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        connection.close()
+        record["error"] = "reset"
+        return record
+
+    record["rtt_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    record["connect_ms"] = None if connect is None else round(connect * 1000, 3)
+    record["status"] = status
+    record["bytes"] = len(body)
+    if status != 200:
+        record["error"] = f"http_{status}"
+        return record
+    try:
+        record["data"] = parse_getdata(body)
+    except ValueError:
+        record["error"] = "invalid"
+    return record
+
+
+async def _poll_device(
+    host: str,
+    port: int,
+    period: float,
+    start: float,
+    deadline: float,
+    timeout: float,
+    stats: HostStats,
+    output: TextIO,
+) -> None:
+    """Poll one device on a fixed schedule until the deadline.
+
+    Requests to a device never overlap: a slot that comes up while the
+    previous request is still running is skipped and counted as missed.
+    """
+    loop = asyncio.get_running_loop()
+    connection = _Connection(host, port)
+    device = _netloc(host, port)
+    slot = start
+    try:
+        while slot < deadline:
+            await asyncio.sleep(max(slot - loop.time(), 0))
+            stats.requests += 1
+            record = await _sample(connection, timeout)
+            if record["error"] is None:
+                stats.rtts.append(record["rtt_ms"] / 1000)
+            else:
+                stats.errors[record["error"]] += 1
+            if record.get("connect_ms") is not None:
+                stats.new_connections += 1
+            output.write(
+                json.dumps(
+                    {"device": device, "seq": stats.requests, **record},
+                    separators=(",", ":"),
+                )
+                + "\n"
+            )
+
+            # Move to the next slot still ahead; the ones in between were missed
+            slot += period
+            if (now := loop.time()) > slot:
+                skipped = int((now - slot) / period) + 1
+                stats.missed += skipped
+                slot += skipped * period
+    finally:
+        connection.close()
+
+
+async def load_test(
+    targets: list[tuple[str, int]],
+    rate: float,
+    duration: float,
+    timeout: float,
+    output: TextIO,
+    stats: dict[str, HostStats],
+) -> None:
+    """Poll every device ``rate`` times a second for ``duration`` seconds.
+
+    Devices are spread evenly across the poll period so their requests do
+    not all start at the same instant. ``stats`` is filled per device as
+    samples come in, so an interrupted test still has its results.
+    """
+    period = 1 / rate
+    start = asyncio.get_running_loop().time()
+    tasks = []
+    for index, (host, port) in enumerate(targets):
+        host_stats = stats.setdefault(_netloc(host, port), HostStats())
+        tasks.append(
+            _poll_device(
+                host,
+                port,
+                period,
+                start + index * period / len(targets),
+                start + duration,
+                timeout,
+                host_stats,
+                output,
+            )
+        )
+    await asyncio.gather(*tasks)
+
+
+def print_summary(stats: dict[str, HostStats], duration: float, file: TextIO) -> None:
+    """Print latency percentiles and error rates per device and overall."""
+    total = HostStats()
+    rows = []
+    for device, host_stats in stats.items():
+        rows.append((device, host_stats))
+        total.rtts.extend(host_stats.rtts)
+        total.requests += host_stats.requests
+        total.errors.update(host_stats.errors)
+        total.missed += host_stats.missed
+        total.new_connections += host_stats.new_connections
+    if len(rows) > 1:
+        rows.append(("all", total))
+
+    print(
+        f"{'device':<22} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8} {'errors':>7} {'missed':>6} {'conns':>5}",
+        file=file,
+    )
+    for device, host_stats in rows:
+        rtts = host_stats.rtts
+        if rtts:
+            latency = " ".join(
+                f"{value * 1000:>8.1f}"
+                for value in (
+                    _percentile(rtts, 50),
+                    _percentile(rtts, 95),
+                    _percentile(rtts, 99),
+                    max(rtts),
+                )
+            )
+        else:
+            latency = " ".join(f"{'-':>8}" for _ in range(4))
+        errors = sum(host_stats.errors.values())
+        error_rate = errors / host_stats.requests if host_stats.requests else 0.0
+        print(
+            f"{device:<22} {host_stats.requests:>8} "
+            f"{host_stats.requests / duration:>7.1f} {latency} "
+            f"{error_rate:>7.1%} {host_stats.missed:>6} {host_stats.new_connections:>5}",
+            file=file,
+        )
+
+    if total.errors:
+        print(
+            "errors: "
+            + ", ".join(f"{kind} {count}" for kind, count in total.errors.most_common()),
+            file=file,
+        )
+
+
+async def _run_load_test(args: argparse.Namespace) -> int:
+    """Run the load test and print its summary; return the exit code."""
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    stats: dict[str, HostStats] = {}
+    start = time.monotonic()
+    try:
+        await load_test(
+            args.devices, args.rate, args.duration, args.timeout, output, stats
+        )
+    finally:
+        # Also reached on Ctrl-C, with whatever was sampled so far
+        if output is sys.stdout:
+            output.flush()
+        else:
+            output.close()
+        print_summary(stats, time.monotonic() - start, sys.stderr)
+    # Fail when no device answered at all
+    return 0 if any(host_stats.rtts for host_stats in stats.values()) else 1
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
-        description="Test script to validate Eyedro API response format"
+        description="Validate Eyedro API responses or load test many devices"
     )
     parser.add_argument(
-        "host",
-        help="IP address of the Eyedro device (e.g., 192.168.2.66)",
+        "devices",
+        nargs="+",
+        metavar="HOST[:PORT]",
+        help="Eyedro device (e.g., 192.168.2.66 or 192.168.2.66:8080); "
+        "HOST:FIRST-LAST expands to a range of ports. Put an IPv6 address "
+        "with a port in brackets, e.g. [fe80::1]:8080",
     )
     parser.add_argument(
-        "port",
-        nargs="?",
+        "--port",
         type=int,
-        default=8080,
-        help="Port number (default: 8080)",
+        default=DEFAULT_PORT,
+        help=f"Port for devices given without one (default: {DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Load test for this many seconds instead of validating once",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1.0,
+        help="Requests per second per device during a load test (default: 1)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Request timeout in seconds (default: {DEFAULT_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="NDJSON file for the samples of a load test (default: stdout)",
     )
     args = parser.parse_args()
+    try:
+        args.devices = parse_targets(args.devices, args.port)
+    except argparse.ArgumentTypeError as err:
+        parser.error(str(err))
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    if args.duration is None:
+        for host, port in args.devices:
+            test_eyedro_api(host, port)
+        return
 
-    test_eyedro_api(args.host, args.port)
+    try:
+        sys.exit(asyncio.run(_run_load_test(args)))
+    except KeyboardInterrupt:
+        sys.exit(130)
 
 
 if __name__ == "__main__":
     main()
-
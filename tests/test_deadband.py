@@ -0,0 +1,55 @@
+"""Tests for the deadband applied to Eyedro sensor writes."""
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from custom_components.eyedro.const import CONF_DEADBAND_POWER, SENSOR_TOTAL_POWER
+from custom_components.eyedro.deadband import DeadbandPolicy
+from custom_components.eyedro.sensor import EyedroMeasurementSensor, channel_descriptions
+
+
+def _channel_power_sensor(channel_count: int) -> EyedroMeasurementSensor:
+    """Return the first channel's power sensor with a 1 kW total power deadband."""
+    coordinator = MagicMock()
+    coordinator.deadband = DeadbandPolicy.from_options({CONF_DEADBAND_POWER: 1.0})
+    coordinator.suppressed_writes = Counter()
+    coordinator.api._host = "192.0.2.1"
+    description = channel_descriptions(0, channel_count)[0]
+    sensor = EyedroMeasurementSensor(coordinator, description)
+    sensor.async_write_ha_state = MagicMock()
+    return sensor
+
+
+def _update(sensor: EyedroMeasurementSensor, power: float) -> None:
+    """Feed one channel power reading to the sensor."""
+    sensor.coordinator.data = {"measurements": SimpleNamespace(channel_power=(power,))}
+    sensor._handle_coordinator_update()
+
+
+def test_policy_scales_absolute_deadband() -> None:
+    """A scaled deadband filters smaller changes than the whole one."""
+    policy = DeadbandPolicy.from_options({CONF_DEADBAND_POWER: 1.0})
+    assert not policy.should_publish(SENSOR_TOTAL_POWER, 2.0, 2.4, 0)
+    assert policy.should_publish(SENSOR_TOTAL_POWER, 2.0, 2.4, 0, 0.25)
+    assert not policy.should_publish(SENSOR_TOTAL_POWER, 2.0, 2.2, 0, 0.25)
+
+
+def test_channel_change_below_total_deadband_is_written() -> None:
+    """One channel of four moving by less than the total's deadband is still recorded."""
+    sensor = _channel_power_sensor(4)
+    _update(sensor, 1.0)
+    _update(sensor, 1.4)
+    assert sensor.async_write_ha_state.call_count == 2
+
+    # Within the channel's quarter of the deadband
+    _update(sensor, 1.5)
+    assert sensor.async_write_ha_state.call_count == 2
+    assert sensor.coordinator.suppressed_writes[sensor.entity_description.key] == 1
+
+
+def test_single_channel_keeps_whole_deadband() -> None:
+    """A one-channel device filters its channel like the total."""
+    sensor = _channel_power_sensor(1)
+    _update(sensor, 1.0)
+    _update(sensor, 1.4)
+    assert sensor.async_write_ha_state.call_count == 1
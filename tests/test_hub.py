@@ -0,0 +1,55 @@
+"""Tests for the shared polling scheduler of hub mode."""
+import asyncio
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.eyedro.const import DATA_HUB
+from custom_components.eyedro.hub import async_get_hub, async_leave_hub
+
+
+class _Coordinator:
+    """Coordinator stand-in counting first refreshes in flight."""
+
+    in_flight = 0
+    peak = 0
+
+    def __init__(self, index: int) -> None:
+        self.api = SimpleNamespace(_host=f"192.0.2.{index}")
+        self.poll_interval = timedelta(seconds=10)
+
+    async def async_config_entry_first_refresh(self) -> None:
+        cls = type(self)
+        cls.in_flight += 1
+        cls.peak = max(cls.peak, cls.in_flight)
+        await asyncio.sleep(0.01)
+        cls.in_flight -= 1
+
+    async def async_refresh(self) -> None:
+        """Polls after the first one are not counted."""
+
+
+def test_concurrent_setup_respects_max_concurrent(tmp_path: Path) -> None:
+    """Entries set up together fetch no more first readings at once than the cap."""
+
+    async def _test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        hub = async_get_hub(hass)
+        coordinators = [_Coordinator(index) for index in range(12)]
+
+        async def _async_setup(coordinator: _Coordinator) -> None:
+            await hub.async_first_refresh(coordinator, 3)
+            hub.async_add(coordinator, 3)
+
+        await asyncio.gather(*(_async_setup(coordinator) for coordinator in coordinators))
+        assert _Coordinator.peak == 3
+        assert len(hub) == 12
+
+        for coordinator in coordinators:
+            async_leave_hub(hass, coordinator)
+        assert DATA_HUB not in hass.data
+        await hass.async_stop(force=True)
+
+    asyncio.run(_test())
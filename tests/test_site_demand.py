@@ -0,0 +1,109 @@
+"""Tests for the demand sensors shared by the devices of a site."""
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from custom_components.eyedro import demand
+from custom_components.eyedro.demand import (
+    DemandSettings,
+    DemandTracker,
+    async_join_site_demand,
+    async_leave_site_demand,
+)
+
+SETTINGS = DemandSettings(window=15, mode="block", billing_day=1)
+
+
+@pytest.fixture(autouse=True)
+def _fast_updates(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Update the site sensors without waiting a second."""
+    monkeypatch.setattr(demand, "SITE_DEMAND_UPDATE_DELAY", 0.01)
+
+
+def _run(tmp_path: Path, test) -> None:
+    """Run a test coroutine against a bare Home Assistant instance."""
+
+    async def _async_run() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        try:
+            await test(hass)
+        finally:
+            await hass.async_stop(force=True)
+
+    asyncio.run(_async_run())
+
+
+def test_owner_unload_hands_sensors_over(tmp_path: Path) -> None:
+    """The site sensors are recreated by a remaining member when the owner unloads."""
+
+    async def _test(hass: HomeAssistant) -> None:
+        site = await async_join_site_demand(hass, "first", SETTINGS)
+        assert await async_join_site_demand(hass, "second", SETTINGS) is site
+        add_first, add_second = MagicMock(), MagicMock()
+        site.async_add_sensor_platform("first", add_first)
+        site.async_add_sensor_platform("second", add_second)
+        assert site.owner == "first"
+        add_first.assert_called_once()
+        add_second.assert_not_called()
+
+        await async_leave_site_demand(hass, "first", SETTINGS)
+        assert site.owner == "second"
+        assert site.members == {"second"}
+        add_second.assert_called_once()
+
+        # The remaining member still updates the site sensors
+        updates = []
+        async_dispatcher_connect(hass, site.signal, lambda: updates.append(None))
+        site.async_updated()
+        site.async_updated()
+        await asyncio.sleep(0.05)
+        assert len(updates) == 1
+
+        await async_leave_site_demand(hass, "second", SETTINGS)
+        assert site.owner is None
+        assert demand.DATA_SITE_DEMAND not in hass.data
+
+    _run(tmp_path, _test)
+
+
+def test_non_owner_unload_keeps_owner(tmp_path: Path) -> None:
+    """A member other than the owner leaving does not recreate the sensors."""
+
+    async def _test(hass: HomeAssistant) -> None:
+        site = await async_join_site_demand(hass, "first", SETTINGS)
+        await async_join_site_demand(hass, "second", SETTINGS)
+        add_first, add_second = MagicMock(), MagicMock()
+        site.async_add_sensor_platform("first", add_first)
+        site.async_add_sensor_platform("second", add_second)
+
+        await async_leave_site_demand(hass, "second", SETTINGS)
+        assert site.owner == "first"
+        add_first.assert_called_once()
+        add_second.assert_not_called()
+        await async_leave_site_demand(hass, "first", SETTINGS)
+
+    _run(tmp_path, _test)
+
+
+def test_rolling_site_demand_prorates_every_straddling_piece() -> None:
+    """Pieces of two devices straddling the window start count only inside it."""
+    tracker = DemandTracker(DemandSettings(window=5, mode="rolling", billing_day=1))
+    start = 1_700_000_000.0
+    # Both devices draw 1 kW in 100 s pieces, the second 30 s out of step,
+    # and both report up to 850 s after the start
+    for index in range(8):
+        first = start + index * 100
+        tracker.add(first, first + 100, 100_000)
+        second = first + 30
+        tracker.add(second, second + 100, 100_000)
+    tracker.add(start + 800, start + 850, 50_000)
+    tracker.add(start + 830, start + 850, 20_000)
+
+    # The window is 550-850 s after the start, cutting a piece of each device
+    assert tracker.demand == pytest.approx(2000)
+    assert tracker.peak_today[0] == pytest.approx(2000)